@@ -1,10 +1,11 @@
-import ast
 import math
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Callable, List, Tuple
 import sympy as sp
 
+from expresiones import compilar_segura
+
 try:
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
     import matplotlib.pyplot as plt
@@ -17,27 +18,8 @@ except Exception:
 
 def _make_safe_func(expr: str) -> Callable[[float], float]:
     """Convierte expresión string a función evaluable de forma segura"""
-    allowed_names = {k: getattr(math, k) for k in dir(math) if not k.startswith("__")}
-    allowed_names.update({"abs": abs, "pow": pow})
-    
-    expr_ast = ast.parse(expr, mode='eval')
-    for node in ast.walk(expr_ast):
-        if isinstance(node, ast.Name):
-            if node.id != 'x' and node.id not in allowed_names:
-                raise ValueError(f"Nombre no permitido en expresión: {node.id}")
-        elif isinstance(node, (ast.Call, ast.BinOp, ast.UnaryOp, ast.Expression,
-                               ast.Load, ast.Add, ast.Sub, ast.Mult, ast.Div,
-                               ast.Pow, ast.USub, ast.UAdd, ast.Mod, ast.Constant,
-                               ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.Gt,
-                               ast.LtE, ast.GtE, ast.And, ast.Or, ast.BoolOp)):
-            continue
-        else:
-            raise ValueError(f"Nodo AST no permitido: {type(node).__name__}")
-    
-    code = compile(expr_ast, '<string>', 'eval')
-    def f(x: float) -> float:
-        return eval(code, {'__builtins__': {}}, {**allowed_names, 'x': x})
-    return f
+    # Validación AST y compilación compartidas (y cacheadas) en expresiones.py
+    return compilar_segura(expr, ("x",))
 
 
 def numerical_derivative(f: Callable[[float], float], x: float, h: float = 1e-6) -> float:
@@ -5,6 +5,10 @@ import sympy as sp
 from sympy import symbols, sin, cos, tan, log, ln, exp, sqrt, pi, E
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from expresiones import compilar_sympy, compilar_derivadas
+
+# Desplazamientos (en múltiplos de h) que usa cada fórmula de diferencias finitas
+PASOS_METODO = {'progresiva': (0, 1), 'regresiva': (-1, 0), 'central': (-1, 0, 1)}
 
 class DiferenciasFinitasCalculator:
     def __init__(self, root):
@@ -180,18 +184,47 @@ class DiferenciasFinitasCalculator:
         tk.Label(h_frame, text="Paso h:", font=('Arial', 10, 'bold')).pack(anchor=tk.W)
         ttk.Entry(h_frame, textvariable=self.h_value, font=('Consolas', 10)).pack(fill=tk.X, pady=(5, 0))
         
-    def evaluar_funcion(self, expr_str, x_val, y_val=None):
-        """Evalúa una función usando sympy"""
+    def evaluar_funcion(self, expr_str, x_val, y_val=None, finita=True):
+        """Evalúa una función con su versión lambdify (compilada una vez por expresión).
+        Acepta escalares (devuelve float) o arrays de puntos (devuelve np.ndarray).
+        Con finita=True un valor fuera del dominio (NaN/inf) es un error; con False queda
+        en NaN, como necesita el gráfico."""
         try:
-            x, y = symbols('x y')
-            expr = sp.sympify(expr_str)
-            
-            if y_val is not None:
-                return float(expr.subs([(x, x_val), (y, y_val)]))
-            else:
-                return float(expr.subs(x, x_val))
+            with np.errstate(all='ignore'):
+                if y_val is not None:
+                    f = compilar_sympy(expr_str, ('x', 'y'))
+                    valores = f(np.asarray(x_val, dtype=float), np.asarray(y_val, dtype=float))
+                    forma = np.broadcast_shapes(np.shape(x_val), np.shape(y_val))
+                else:
+                    f = compilar_sympy(expr_str, ('x',))
+                    valores = f(np.asarray(x_val, dtype=float))
+                    forma = np.shape(x_val)
+            # Expresiones constantes devuelven un escalar: se expande a la forma de la entrada
+            valores = np.broadcast_to(np.asarray(valores, dtype=float), forma)
         except Exception as e:
             raise ValueError(f"Error al evaluar la función: {str(e)}")
+        malos = ~np.isfinite(valores)
+        if finita and malos.any():
+            xs = np.broadcast_to(x_val, forma)[malos]
+            if y_val is not None:
+                ys = np.broadcast_to(y_val, forma)[malos]
+                puntos = ", ".join(f"({x:g}, {y:g})" for x, y in zip(xs, ys))
+            else:
+                puntos = ", ".join(f"x = {x:g}" for x in xs)
+            raise ValueError(f"Error al evaluar la función: no está definida (o no es finita) en {puntos}")
+        return float(valores) if valores.ndim == 0 else np.array(valores)
+
+    def evaluar_stencil(self, expr_str, metodo, h, x_val, y_val=None, finita=True):
+        """Evalúa f sólo en los puntos que usa el método, en un solo llamado vectorizado.
+        Devuelve {desplazamiento: valor}; en 2D las claves son (dx, dy) en múltiplos de h."""
+        pasos = PASOS_METODO[metodo]
+        if y_val is None:
+            valores = self.evaluar_funcion(expr_str, x_val + h * np.array(pasos, dtype=float), finita=finita)
+            return dict(zip(pasos, valores))
+        claves = [(0, 0)] + [(k, 0) for k in pasos if k] + [(0, k) for k in pasos if k]
+        d = h * np.array(claves, dtype=float)
+        valores = self.evaluar_funcion(expr_str, x_val + d[:, 0], y_val + d[:, 1], finita=finita)
+        return dict(zip(claves, valores))
     
     def calcular(self):
         try:
@@ -219,11 +252,12 @@ class DiferenciasFinitasCalculator:
                 resultado += "PASO 1 - EVALUACIÓN DE LA FUNCIÓN:\n"
                 resultado += "-" * 40 + "\n"
                 
-                f_x = self.evaluar_funcion(funcion, x_punto)
+                # Sólo los puntos del stencil que usa el método, en un solo llamado vectorizado
+                v = self.evaluar_stencil(funcion, metodo, h, x_punto)
+                f_x, f_x_minus_h, f_x_plus_h = v[0], v.get(-1), v.get(1)
                 resultado += f"f({x_punto}) = {f_x:.8f}\n"
                 
                 if metodo == 'progresiva':
-                    f_x_plus_h = self.evaluar_funcion(funcion, x_punto + h)
                     resultado += f"f({x_punto + h}) = f({x_punto} + {h}) = {f_x_plus_h:.8f}\n\n"
                     
                     resultado += "PASO 2 - APLICAR FÓRMULA DE DIFERENCIA PROGRESIVA:\n"
@@ -235,7 +269,6 @@ class DiferenciasFinitasCalculator:
                     resultado += f"f'({x_punto}) ≈ {derivada:.8f}\n\n"
                     
                 elif metodo == 'regresiva':
-                    f_x_minus_h = self.evaluar_funcion(funcion, x_punto - h)
                     resultado += f"f({x_punto - h}) = f({x_punto} - {h}) = {f_x_minus_h:.8f}\n\n"
                     
                     resultado += "PASO 2 - APLICAR FÓRMULA DE DIFERENCIA REGRESIVA:\n"
@@ -247,8 +280,6 @@ class DiferenciasFinitasCalculator:
                     resultado += f"f'({x_punto}) ≈ {derivada:.8f}\n\n"
                     
                 elif metodo == 'central':
-                    f_x_plus_h = self.evaluar_funcion(funcion, x_punto + h)
-                    f_x_minus_h = self.evaluar_funcion(funcion, x_punto - h)
                     resultado += f"f({x_punto + h}) = f({x_punto} + {h}) = {f_x_plus_h:.8f}\n"
                     resultado += f"f({x_punto - h}) = f({x_punto} - {h}) = {f_x_minus_h:.8f}\n\n"
                     
@@ -262,10 +293,8 @@ class DiferenciasFinitasCalculator:
                 
                 # Calcular derivada exacta si es posible
                 try:
-                    x = symbols('x')
-                    expr = sp.sympify(funcion)
-                    derivada_exacta = sp.diff(expr, x)
-                    valor_exacto = float(derivada_exacta.subs(x, x_punto))
+                    (derivada_exacta,), (df_exacta,) = compilar_derivadas(funcion, ('x',))
+                    valor_exacto = float(df_exacta(x_punto))
                     error = abs(derivada - valor_exacto)
                     
                     resultado += "COMPARACIÓN CON DERIVADA EXACTA:\n"
@@ -291,12 +320,14 @@ class DiferenciasFinitasCalculator:
                 resultado += "PASO 1 - EVALUACIÓN DE LA FUNCIÓN:\n"
                 resultado += "-" * 40 + "\n"
                 
-                f_xy = self.evaluar_funcion(funcion, x_punto, y_punto)
+                # Stencil en cruz con sólo los puntos que usa el método, en un solo llamado vectorizado
+                v = self.evaluar_stencil(funcion, metodo, h, x_punto, y_punto)
+                f_xy = v[(0, 0)]
+                f_x_plus_h_y, f_x_minus_h_y = v.get((1, 0)), v.get((-1, 0))
+                f_x_y_plus_h, f_x_y_minus_h = v.get((0, 1)), v.get((0, -1))
                 resultado += f"f({x_punto},{y_punto}) = {f_xy:.8f}\n"
                 
                 if metodo == 'progresiva':
-                    f_x_plus_h_y = self.evaluar_funcion(funcion, x_punto + h, y_punto)
-                    f_x_y_plus_h = self.evaluar_funcion(funcion, x_punto, y_punto + h)
                     resultado += f"f({x_punto + h},{y_punto}) = {f_x_plus_h_y:.8f}\n"
                     resultado += f"f({x_punto},{y_punto + h}) = {f_x_y_plus_h:.8f}\n\n"
                     
@@ -317,8 +348,6 @@ class DiferenciasFinitasCalculator:
                     resultado += f"∂f/∂y({x_punto},{y_punto}) ≈ {derivada_y:.8f}\n\n"
                     
                 elif metodo == 'regresiva':
-                    f_x_minus_h_y = self.evaluar_funcion(funcion, x_punto - h, y_punto)
-                    f_x_y_minus_h = self.evaluar_funcion(funcion, x_punto, y_punto - h)
                     resultado += f"f({x_punto - h},{y_punto}) = {f_x_minus_h_y:.8f}\n"
                     resultado += f"f({x_punto},{y_punto - h}) = {f_x_y_minus_h:.8f}\n\n"
                     
@@ -339,11 +368,6 @@ class DiferenciasFinitasCalculator:
                     resultado += f"∂f/∂y({x_punto},{y_punto}) ≈ {derivada_y:.8f}\n\n"
                     
                 elif metodo == 'central':
-                    f_x_plus_h_y = self.evaluar_funcion(funcion, x_punto + h, y_punto)
-                    f_x_minus_h_y = self.evaluar_funcion(funcion, x_punto - h, y_punto)
-                    f_x_y_plus_h = self.evaluar_funcion(funcion, x_punto, y_punto + h)
-                    f_x_y_minus_h = self.evaluar_funcion(funcion, x_punto, y_punto - h)
-                    
                     resultado += f"f({x_punto + h},{y_punto}) = {f_x_plus_h_y:.8f}\n"
                     resultado += f"f({x_punto - h},{y_punto}) = {f_x_minus_h_y:.8f}\n"
                     resultado += f"f({x_punto},{y_punto + h}) = {f_x_y_plus_h:.8f}\n"
@@ -367,13 +391,11 @@ class DiferenciasFinitasCalculator:
                 
                 # Calcular derivadas exactas si es posible
                 try:
-                    x, y = symbols('x y')
-                    expr = sp.sympify(funcion)
-                    derivada_x_exacta = sp.diff(expr, x)
-                    derivada_y_exacta = sp.diff(expr, y)
+                    (derivada_x_exacta, derivada_y_exacta), (dfx_exacta, dfy_exacta) = \
+                        compilar_derivadas(funcion, ('x', 'y'))
                     
-                    valor_exacto_x = float(derivada_x_exacta.subs([(x, x_punto), (y, y_punto)]))
-                    valor_exacto_y = float(derivada_y_exacta.subs([(x, x_punto), (y, y_punto)]))
+                    valor_exacto_x = float(dfx_exacta(x_punto, y_punto))
+                    valor_exacto_y = float(dfy_exacta(x_punto, y_punto))
                     
                     error_x = abs(derivada_x - valor_exacto_x)
                     error_y = abs(derivada_y - valor_exacto_y)
@@ -424,33 +446,25 @@ class DiferenciasFinitasCalculator:
         x_max = x_punto + 3*h
         x_vals = np.linspace(x_min, x_max, 1000)
         
-        # Evaluar función
-        y_vals = []
-        for x in x_vals:
-            try:
-                y_vals.append(self.evaluar_funcion(funcion, x))
-            except:
-                y_vals.append(np.nan)
+        # Evaluar función en toda la malla de una vez (puntos fuera del dominio quedan en NaN)
+        y_vals = self.evaluar_funcion(funcion, x_vals, finita=False)
         
         ax.plot(x_vals, y_vals, 'b-', linewidth=2, label=f'f(x) = {funcion}')
         
         # Marcar puntos según el método
-        f_x = self.evaluar_funcion(funcion, x_punto)
+        v = self.evaluar_stencil(funcion, metodo, h, x_punto, finita=False)
+        f_x, f_x_minus_h, f_x_plus_h = v[0], v.get(-1), v.get(1)
         ax.plot(x_punto, f_x, 'ro', markersize=8, label=f'f({x_punto})')
         
         if metodo == 'progresiva':
-            f_x_plus_h = self.evaluar_funcion(funcion, x_punto + h)
             ax.plot(x_punto + h, f_x_plus_h, 'go', markersize=8, label=f'f({x_punto + h})')
             ax.plot([x_punto, x_punto + h], [f_x, f_x_plus_h], 'r--', alpha=0.7)
             
         elif metodo == 'regresiva':
-            f_x_minus_h = self.evaluar_funcion(funcion, x_punto - h)
             ax.plot(x_punto - h, f_x_minus_h, 'go', markersize=8, label=f'f({x_punto - h})')
             ax.plot([x_punto - h, x_punto], [f_x_minus_h, f_x], 'r--', alpha=0.7)
             
         elif metodo == 'central':
-            f_x_plus_h = self.evaluar_funcion(funcion, x_punto + h)
-            f_x_minus_h = self.evaluar_funcion(funcion, x_punto - h)
             ax.plot(x_punto + h, f_x_plus_h, 'go', markersize=8, label=f'f({x_punto + h})')
             ax.plot(x_punto - h, f_x_minus_h, 'mo', markersize=8, label=f'f({x_punto - h})')
             ax.plot([x_punto - h, x_punto + h], [f_x_minus_h, f_x_plus_h], 'r--', alpha=0.7)
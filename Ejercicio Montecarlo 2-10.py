@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 from scipy import integrate
 from scipy.stats import norm
 import random
+from motor_montecarlo import ESTIMADORES, IMPORTANCIA, integrar_promedio
 
 print("=" * 60)
 print("EJERCICIOS DE INTEGRACIÓN NUMÉRICA")
@@ -400,6 +401,48 @@ def rejection_sampling_visualization():
 # Ejecutar visualización
 rejection_sampling_visualization()
 
+# Ejercicio 11: Reducción de varianza sobre las integrales anteriores
+print("\n11. REDUCCIÓN DE VARIANZA: ANTITÉTICAS, VARIABLE DE CONTROL E IMPORTANCIA")
+print("-" * 50)
+
+def integral_reduccion_varianza(expr, variables, limites, n_samples, estimador="Simple", densidad=None):
+    """
+    Integral por el método promedio con el estimador elegido (ESTIMADORES del motor).
+    Devuelve (integral, error estándar, factor de reducción de varianza contra MC simple,
+    evaluaciones de f). densidad: expresión de p(x) para 'Importancia' (una sola variable).
+    procesos=1: el script no tiene guardia __main__ y los procesos hijos lo volverían a ejecutar.
+    """
+    res = integrar_promedio(expr, variables, limites, n_samples, semilla=0, procesos=1,
+                            estimador=estimador, densidad=densidad)
+    return res.estimacion_promedio, res.error_promedio, res.factor_reduccion, res.evaluaciones
+
+def comparar_estimadores(titulo, expr, variables, limites, n_samples, exacta, densidad=None):
+    """Tabla con cada estimador: el VRF es cuántas veces menos evaluaciones pide para el mismo error"""
+    importancia = f", importancia con p(x) = {densidad}" if densidad is not None else ""
+    print(f"\n{titulo} (n={n_samples}, exacta = {exacta:.6f}{importancia})")
+    print(f"{'Estimador':<20} {'Integral':>10} {'Error est.':>11} {'|Error|':>10} {'Eval. f':>8} {'VRF':>9}")
+    for estimador in ESTIMADORES:
+        if estimador == IMPORTANCIA and densidad is None:
+            continue
+        integral, error, vrf, evaluaciones = integral_reduccion_varianza(expr, variables, limites, n_samples,
+                                                                        estimador, densidad)
+        print(f"{estimador:<20} {integral:10.6f} {error:11.2e} {abs(integral - exacta):10.2e} {evaluaciones:8d} {vrf:9.3g}")
+
+comparar_estimadores("3. ln(x) en [1, e]", "log(x)", ("x",), [(1, np.e)], 10000, integral_ln_exacta, "x - 0.5")
+comparar_estimadores("4. √x en [0, 4]", "sqrt(x)", ("x",), [(0, 4)], n_sqrt, integral_sqrt_exacta, "1 + x")
+comparar_estimadores("5. sin(x) en [0, π]", "sin(x)", ("x",), [(0, np.pi)], n_sin, integral_sin_exacta, "x*(pi - x)")
+comparar_estimadores("6. e^(x+y) en [0,1]x[0,1]", "exp(x + y)", ("x", "y"), [(0, 1), (0, 1)], n_double,
+                     integral_double_exacta)
+comparar_estimadores("7. x² + y² en [0,1]x[0,1]", "x**2 + y**2", ("x", "y"), [(0, 1), (0, 1)], n_x2y2,
+                     integral_x2y2_exacta)
+comparar_estimadores("8. 1/√x en [0, 1]", "1/sqrt(x)", ("x",), [(0, 1)], n_inv_sqrt, integral_inv_sqrt_exacta,
+                     "1/sqrt(x)")
+comparar_estimadores("9. sin²x en [0, π/2]", "sin(x)**2", ("x",), [(0, np.pi/2)], n_sin2, integral_sin2_exacta, "x")
+print("\nVRF > 1: el estimador necesita VRF veces menos evaluaciones de f que MC simple para el mismo error.")
+print("En 5 las antitéticas no ayudan: sin(x) es simétrica en [0, π] y f(x) = f(π - x) repite la evaluación.")
+print("En 7 la variable de control cuadrática reproduce f exactamente: varianza nula.")
+print("En 9 las antitéticas suman sin²x + cos²x = 1: también varianza nula (el VRF enorme es redondeo).")
+
 print("\n" + "="*60)
 print("RESUMEN DE RESULTADOS")
 print("="*60)
@@ -19,30 +19,17 @@ import numpy as np
 import sympy as sp
 from typing import List, Tuple, Optional
 
+from expresiones import compilar_segura
+
 # Matplotlib en Tkinter
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
 # ========================= Utilidades seguras ========================= #
 
-ALLOWED_NAMES = {
-    # builtins seguros
-    'abs': abs, 'min': min, 'max': max, 'pow': pow, 'round': round,
-    # math
-    'pi': math.pi, 'e': math.e, 'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
-    'asin': math.asin, 'acos': math.acos, 'atan': math.atan, 'atan2': math.atan2,
-    'sinh': math.sin, 'cosh': math.cosh, 'tanh': math.tanh,
-    'exp': math.exp, 'log': math.log, 'log10': math.log10, 'sqrt': math.sqrt,
-}
-
-
 def safe_eval(expr: str, xval: float) -> float:
-    """Evalúa f(x) de forma acotada: expr puede usar funciones en ALLOWED_NAMES y variable x."""
-    if expr.strip() == "":
-        raise ValueError("No hay expresión de función.")
-    scope = dict(ALLOWED_NAMES)
-    scope['x'] = xval
-    return float(eval(expr, {"__builtins__": {}}, scope))
+    """Evalúa f(x) de forma acotada: expr puede usar funciones de math y la variable x (ver expresiones.py)."""
+    return compilar_segura(expr)(xval)
 
 
 # ========================= Interpolación Lagrange ========================= #
@@ -355,7 +342,7 @@ class LagrangeApp(ttk.Frame):
             
             if fx_expr:
                 try:
-                    fx_vals = np.array([safe_eval(fx_expr, xv) for xv in xq])
+                    fx_vals = compilar_segura(fx_expr)(xq)
                     err_malla = fx_vals - yq
                     err_global_malla = np.max(np.abs(err_malla))
                     
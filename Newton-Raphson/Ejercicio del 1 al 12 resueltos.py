@@ -5,10 +5,16 @@ Created on Fri Aug 22 11:38:03 2025
 @author: fedeg
 """
 
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 import math
 
+# expresiones.py vive en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from expresiones import compilar_segura
+
 try:
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
     import matplotlib.pyplot as plt
@@ -18,41 +24,30 @@ except Exception:
     plt = None
     np = None
 
-def safe_eval(expr, x_val):
-    """Evaluación segura de expresiones matemáticas"""
-    # Crear un contexto seguro con funciones matemáticas
-    safe_dict = {
-        'x': x_val,
-        'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
-        'exp': math.exp, 'log': math.log, 'ln': math.log,
-        'sqrt': math.sqrt, 'abs': abs, 'pow': pow,
-        'pi': math.pi, 'e': math.e,
-        '__builtins__': {}
-    }
-    
-    try:
-        return eval(expr, safe_dict)
-    except:
-        raise ValueError(f"Error al evaluar la expresión: {expr}")
+def compile_functions(f_expr, df_expr=""):
+    """Compila f y f' una sola vez; si no hay derivada devuelve None para usar la numérica"""
+    f = compilar_segura(f_expr)
+    df = compilar_segura(df_expr) if df_expr.strip() else None
+    return f, df
 
-def numerical_derivative(f_expr, x, h=1e-8):
+def numerical_derivative(f, x, h=1e-8):
     """Calcula la derivada numérica usando diferencias centradas"""
-    return (safe_eval(f_expr, x + h) - safe_eval(f_expr, x - h)) / (2 * h)
+    return (f(x + h) - f(x - h)) / (2 * h)
 
-def newton_raphson_method(f_expr, df_expr, x0, tol=1e-10, max_iter=50):
-    """Implementa el método de Newton-Raphson"""
+def newton_raphson_method(f, df, x0, tol=1e-10, max_iter=50):
+    """Implementa el método de Newton-Raphson (f y df ya compilados, df=None -> derivada numérica)"""
     history = []
     x = x0
     
     for i in range(max_iter):
         try:
             # Evaluar f(x) y f'(x)
-            fx = safe_eval(f_expr, x)
+            fx = f(x)
             
-            if df_expr.strip():  # Si se proporciona derivada
-                dfx = safe_eval(df_expr, x)
+            if df is not None:  # Si se proporciona derivada
+                dfx = df(x)
             else:  # Derivada numérica
-                dfx = numerical_derivative(f_expr, x)
+                dfx = numerical_derivative(f, x)
             
             # Verificar si la derivada es muy pequeña
             if abs(dfx) < 1e-14:
@@ -309,7 +304,8 @@ class NewtonRaphsonGUI:
                 return
             
             # Resolver
-            result, history, message = newton_raphson_method(f_expr, df_expr, x0, tol)
+            f, df = compile_functions(f_expr, df_expr)
+            result, history, message = newton_raphson_method(f, df, x0, tol)
             
             # Mostrar resultado
             if result is not None:
@@ -326,7 +322,7 @@ class NewtonRaphsonGUI:
             
             # Graficar si es posible
             if self.canvas:
-                self.plot_function_and_convergence(f_expr, history, result)
+                self.plot_function_and_convergence(f, history, result)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error en el cálculo: {str(e)}")
@@ -353,9 +349,8 @@ class NewtonRaphsonGUI:
         for exercise_name, exercise_data in self.exercises.items():
             try:
                 x0 = float(exercise_data["x0"])
-                result, history, message = newton_raphson_method(
-                    exercise_data["f"], exercise_data["df"], x0, 1e-10
-                )
+                f, df = compile_functions(exercise_data["f"], exercise_data["df"])
+                result, history, message = newton_raphson_method(f, df, x0, 1e-10)
                 
                 results_text.insert(tk.END, f"{exercise_name}\n")
                 results_text.insert(tk.END, f"  f(x) = {exercise_data['f']}\n")
@@ -370,7 +365,7 @@ class NewtonRaphsonGUI:
                         results_text.insert(tk.END, f"  ✓ Error: {error:.2e}\n")
                     else:
                         # Verificación
-                        verification = safe_eval(exercise_data["f"], result)
+                        verification = f(result)
                         results_text.insert(tk.END, f"  ✓ Resultado: {result:.10f}\n")
                         results_text.insert(tk.END, f"  ✓ f({result:.6f}) = {verification:.2e}\n")
                     results_text.insert(tk.END, f"  ✓ Iteraciones: {len(history)}\n")
@@ -405,7 +400,7 @@ class NewtonRaphsonGUI:
             
             self.tree.insert('', 'end', values=formatted_record)
 
-    def plot_function_and_convergence(self, f_expr, history, result):
+    def plot_function_and_convergence(self, f, history, result):
         """Grafica la función y la convergencia"""
         try:
             # Limpiar gráficos
@@ -420,12 +415,12 @@ class NewtonRaphsonGUI:
             # Gráfico 1: Función y raíz
             x_min, x_max = min(x_values + [result]) - 1, max(x_values + [result]) + 1
             x_plot = np.linspace(x_min, x_max, 400)
-            y_plot = [safe_eval(f_expr, x) for x in x_plot]
+            y_plot = f(x_plot)
             
             self.ax1.plot(x_plot, y_plot, 'b-', label='f(x)')
             self.ax1.axhline(y=0, color='k', linestyle='--', alpha=0.5)
             self.ax1.axvline(x=result, color='r', linestyle='--', alpha=0.7, label=f'Raíz: {result:.6f}')
-            self.ax1.plot(x_values, [safe_eval(f_expr, x) for x in x_values], 'ro-', label='Iteraciones')
+            self.ax1.plot(x_values, f(x_values), 'ro-', label='Iteraciones')
             self.ax1.set_xlabel('x')
             self.ax1.set_ylabel('f(x)')
             self.ax1.set_title('Función y Convergencia')
@@ -1,8 +1,16 @@
+import os
+import sys
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.integrate import solve_ivp
 import math
 
+# motor_rk.py vive en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from motor_rk import Evento, integrar_adaptativo, integrar_con_eventos, integrar_en_malla, integrar_implicito
+from motor_sde import METODOS_SDE, integrar_sde
+
 # Configuración para gráficos
 plt.style.use('default')
 plt.rcParams['figure.figsize'] = (12, 8)
@@ -12,47 +20,63 @@ class RungeKuttaSolver:
     def __init__(self):
         pass
     
-    def euler_method(self, f, t_span, y0, h):
-        """Método de Euler"""
+    def _malla(self, t_span, h):
         t_start, t_end = t_span
-        t = np.arange(t_start, t_end + h, h)
-        y = np.zeros(len(t))
-        y[0] = y0
-        
-        for i in range(len(t) - 1):
-            y[i + 1] = y[i] + h * f(t[i], y[i])
-        
-        return t, y
+        return np.arange(t_start, t_end + h, h)
+    
+    def euler_method(self, f, t_span, y0, h):
+        """Método de Euler (y0 escalar o vector: y de forma (n_pasos,) o (n_pasos, dim))"""
+        res = integrar_en_malla(f, self._malla(t_span, h), y0, "Euler")
+        return res.t, res.y
     
     def heun_method(self, f, t_span, y0, h):
         """Método de Heun (RK2)"""
-        t_start, t_end = t_span
-        t = np.arange(t_start, t_end + h, h)
-        y = np.zeros(len(t))
-        y[0] = y0
-        
-        for i in range(len(t) - 1):
-            k1 = h * f(t[i], y[i])
-            k2 = h * f(t[i] + h, y[i] + k1)
-            y[i + 1] = y[i] + 0.5 * (k1 + k2)
-        
-        return t, y
+        res = integrar_en_malla(f, self._malla(t_span, h), y0, "Heun")
+        return res.t, res.y
     
     def rk4_method(self, f, t_span, y0, h):
         """Método de Runge-Kutta de 4to orden"""
+        res = integrar_en_malla(f, self._malla(t_span, h), y0, "RK4")
+        return res.t, res.y
+    
+    def adaptive_method(self, f, t_span, y0, h0=None, rtol=1e-6, atol=1e-9):
+        """Dormand-Prince 5(4) con paso adaptativo: devuelve t, y de los pasos aceptados y las estadísticas"""
         t_start, t_end = t_span
-        t = np.arange(t_start, t_end + h, h)
-        y = np.zeros(len(t))
-        y[0] = y0
-        
-        for i in range(len(t) - 1):
-            k1 = h * f(t[i], y[i])
-            k2 = h * f(t[i] + h/2, y[i] + k1/2)
-            k3 = h * f(t[i] + h/2, y[i] + k2/2)
-            k4 = h * f(t[i] + h, y[i] + k3)
-            y[i + 1] = y[i] + (k1 + 2*k2 + 2*k3 + k4) / 6
-        
+        res = integrar_adaptativo(f, t_start, y0, t_end, "DOPRI54", rtol=rtol, atol=atol, h0=h0)
+        return res.t, res.y, res
+    
+    def implicit_method(self, f, t_span, y0, h, metodo, jac="auto"):
+        """Método implícito (Newton en cada paso): devuelve t, y y el resultado con iteraciones y tiempo"""
+        res = integrar_implicito(f, self._malla(t_span, h), y0, metodo, jacobiano=jac)
+        return res.t, res.y, res
+    
+    def backward_euler_method(self, f, t_span, y0, h, jac="auto"):
+        """Euler implícito (orden 1, L-estable)"""
+        t, y, _ = self.implicit_method(f, t_span, y0, h, "Euler implícito", jac)
+        return t, y
+    
+    def trapezoidal_method(self, f, t_span, y0, h, jac="auto"):
+        """Regla del trapecio (orden 2, A-estable)"""
+        t, y, _ = self.implicit_method(f, t_span, y0, h, "Trapecio", jac)
         return t, y
+    
+    def bdf2_method(self, f, t_span, y0, h, jac="auto"):
+        """BDF2 (orden 2, L-estable; primer paso con Euler implícito)"""
+        t, y, _ = self.implicit_method(f, t_span, y0, h, "BDF2", jac)
+        return t, y
+    
+    def event_method(self, f, t_span, y0, h, events, metodo="RK4"):
+        """
+        Integra registrando los cruces g(t, y) = 0 de cada evento (Evento o función g),
+        ubicados dentro del paso con la salida densa. Un Evento terminal corta la
+        integración en el cruce. Devuelve t, y (hasta el corte) y la lista de cruces.
+        """
+        t_start, t_end = t_span
+        if metodo == "DOPRI54":
+            res = integrar_adaptativo(f, t_start, y0, t_end, metodo, h0=h, eventos=events)
+        else:
+            res = integrar_con_eventos(f, t_start, y0, t_end, h, events, metodo)
+        return res.t, res.y, res.eventos
 
 def define_equations():
     """Define todas las ecuaciones diferenciales del problema"""
@@ -126,6 +150,132 @@ def define_equations():
     
     return equations
 
+def comparar_costos(f, t_span, y0, h, exact_func, solver):
+    """Pasos, evaluaciones de f, tiempo y error máximo de cada método (explícitos e implícitos) con el mismo h"""
+    explicitos = [('Euler', solver.euler_method, 1), ('Heun', solver.heun_method, 2), ('RK4', solver.rk4_method, 4)]
+    filas = []
+    for nombre, metodo, etapas in explicitos:
+        inicio = time.perf_counter()
+        t, y = metodo(f, t_span, y0, h)
+        filas.append((nombre, t, y, (len(t) - 1) * etapas, time.perf_counter() - inicio))
+    for nombre in ('Euler implícito', 'Trapecio', 'BDF2'):
+        try:
+            t, y, res = solver.implicit_method(f, t_span, y0, h, nombre)
+        except RuntimeError as e:
+            print(f"{nombre}: {e}")
+            continue
+        filas.append((nombre, t, y, res.evaluaciones, res.segundos))
+    
+    print(f"\n{'Método':<16} {'h':>8} {'pasos':>6} {'eval. f':>8} {'tiempo [ms]':>12} {'error máx':>12}")
+    for nombre, t, y, evaluaciones, segundos in filas:
+        if exact_func is not None:
+            with np.errstate(all='ignore'):
+                error = np.max(np.abs(y - exact_func(t)))
+            error_str = f"{error:12.2e}" if np.isfinite(error) else f"{'inestable':>12}"
+        else:
+            error_str = f"{'-':>12}"
+        print(f"{nombre:<16} {h:8.4g} {len(t) - 1:6d} {evaluaciones:8d} {1000 * segundos:12.2f} {error_str}")
+    return filas
+
+def resolver_rigido(solver, lam=1000.0, h=0.1, mostrar=True):
+    """
+    Problema rígido de prueba: dy/dt = -lam*(y - cos t) - sin t, y(0) = 1, solución exacta cos t.
+    Con lam grande los explícitos necesitan h < ~2.8/lam para no explotar; los implícitos
+    usan el h pedido sin perder estabilidad.
+    """
+    f = lambda t, y: -lam * (y - np.cos(t)) - np.sin(t)
+    t_span, y0 = (0, 2), 1.0
+    print(f"\nPROBLEMA RÍGIDO: dy/dt = -{lam:g}(y - cos t) - sin t,  y(0) = 1")
+    print(f"\nCon h = {h} (todos los métodos):")
+    comparar_costos(f, t_span, y0, h, np.cos, solver)
+    h_estable = 2.5 / lam
+    print(f"\nRK4 necesita h ≈ {h_estable:.2g} para ser estable:")
+    inicio = time.perf_counter()
+    t_rk4, y_rk4 = solver.rk4_method(f, t_span, y0, h_estable)
+    print(f"RK4: {len(t_rk4) - 1} pasos, {4 * (len(t_rk4) - 1)} evaluaciones de f, "
+          f"{1000 * (time.perf_counter() - inicio):.2f} ms, error máx {np.max(np.abs(y_rk4 - np.cos(t_rk4))):.2e}")
+    
+    if mostrar:
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(t_rk4, y_rk4, 'b-', label=f'RK4 (h={h_estable:.2g}, {len(t_rk4) - 1} pasos)', linewidth=2)
+        for nombre, estilo in (('Euler implícito', 'ro--'), ('Trapecio', 'gs--'), ('BDF2', 'm^--')):
+            t, y, res = solver.implicit_method(f, t_span, y0, h, nombre)
+            ax.plot(t, y, estilo, markersize=5, label=f'{nombre} (h={h}, {res.pasos} pasos)')
+        ax.set_title(f'Problema rígido (λ = {lam:g}): pasos grandes con métodos implícitos')
+        ax.set_xlabel('t')
+        ax.set_ylabel('y(t)')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        plt.tight_layout()
+        plt.show()
+
+def tiempo_hasta_umbral(solver, eq_data, umbral):
+    """
+    Instante en que y(t) alcanza el umbral, con un evento terminal: la integración se
+    detiene ahí en vez de recorrer todo el intervalo y buscar el cruce en los arrays.
+    """
+    f, y0, t_span, h = eq_data['f'], eq_data['y0'], eq_data['t_span'], eq_data['h']
+    evento = Evento(lambda t, y: y - umbral, f"y = {umbral}", terminal=True)
+    print(f"\nEVENTO: primer t con y(t) = {umbral} para {eq_data['title']}")
+    print(f"{'Método':<10} {'t evento':>12} {'pasos':>6} {'error en t':>12}")
+    t_exacto = None
+    if eq_data['exact'] is not None:
+        # Referencia: cruce de la solución exacta por bisección
+        a, b = t_span
+        g = lambda t: eq_data['exact'](t) - umbral
+        if g(a) * g(b) < 0:
+            for _ in range(100):
+                m = (a + b) / 2
+                a, b = (m, b) if g(a) * g(m) > 0 else (a, m)
+            t_exacto = (a + b) / 2
+    for metodo in ('Euler', 'Heun', 'RK4', 'ABM4', 'DOPRI54'):
+        t, y, cruces = solver.event_method(f, t_span, y0, h, [evento], metodo)
+        if not cruces:
+            print(f"{metodo:<10} {'sin cruce':>12} {len(t) - 1:6d}")
+            continue
+        error = f"{abs(cruces[0].t - t_exacto):12.2e}" if t_exacto is not None else f"{'-':>12}"
+        print(f"{metodo:<10} {cruces[0].t:12.8f} {len(t) - 1:6d} {error}")
+
+def ecuacion_estocastica(mu=0.5, sigma=0.4, y0=1.0, T=1.0, h=0.01, n_trayectorias=100_000, mostrar=True):
+    """
+    Movimiento browniano geométrico dY = mu Y dt + sigma Y dW, Y(0) = y0, con Euler-Maruyama y
+    Milstein (motor_sde). Solución exacta: E[Y(t)] = y0 e^(mu t) y
+    Var[Y(t)] = y0^2 e^(2 mu t) (e^(sigma^2 t) - 1); los cuantiles son los de una lognormal.
+    """
+    media_exacta = lambda t: y0 * np.exp(mu * t)
+    varianza_exacta = lambda t: y0 ** 2 * np.exp(2 * mu * t) * (np.exp(sigma ** 2 * t) - 1)
+    print(f"\nECUACIÓN ESTOCÁSTICA: dY = {mu:g} Y dt + {sigma:g} Y dW,  Y(0) = {y0:g}  "
+          f"({n_trayectorias} trayectorias, h = {h})")
+    print(f"{'Método':<16} {'E[Y(T)]':>10} {'± 95 %':>9} {'exacta':>10} {'Var[Y(T)]':>10} {'exacta':>10} {'tiempo [ms]':>12}")
+    resultados = {}
+    for metodo in METODOS_SDE:
+        res = integrar_sde(f"{mu}*y", f"{sigma}*y", 0.0, y0, T, h, n_trayectorias, metodo, semilla=0,
+                           guardar=20 if metodo == "Milstein" else 0)
+        resultados[metodo] = res
+        print(f"{metodo:<16} {res.media[-1]:10.5f} {res.error_media()[-1]:9.2e} {media_exacta(res.t[-1]):10.5f} "
+              f"{res.varianza[-1]:10.5f} {varianza_exacta(res.t[-1]):10.5f} {1000 * res.segundos:12.1f}")
+
+    if mostrar:
+        res = resultados["Milstein"]
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(res.t, res.trayectorias.T, color='gray', alpha=0.4, linewidth=0.8)
+        ax.plot(res.t, res.media, 'b-', linewidth=2, label='Media (Milstein)')
+        ax.plot(res.t, media_exacta(res.t), 'r--', linewidth=2, label='Media exacta')
+        ax.fill_between(res.t, res.cuantiles[0.05], res.cuantiles[0.95], color='blue', alpha=0.15,
+                        label='Cuantiles 5 % - 95 %')
+        z = 1.6448536269514722  # cuantil 95 % de la normal: los de Y(t) salen de la lognormal
+        centro = np.log(y0) + (mu - sigma ** 2 / 2) * res.t
+        ax.plot(res.t, np.exp(centro - z * sigma * np.sqrt(res.t)), 'k:', label='Cuantiles exactos')
+        ax.plot(res.t, np.exp(centro + z * sigma * np.sqrt(res.t)), 'k:')
+        ax.set_title('Movimiento browniano geométrico: ensamble de trayectorias')
+        ax.set_xlabel('t')
+        ax.set_ylabel('Y(t)')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        plt.tight_layout()
+        plt.show()
+    return resultados
+
 def solve_and_plot_equation(eq_num, eq_data, solver):
     """Resuelve y grafica una ecuación específica"""
     
@@ -140,6 +290,7 @@ def solve_and_plot_equation(eq_num, eq_data, solver):
     t_euler, y_euler = solver.euler_method(f, t_span, y0, h)
     t_heun, y_heun = solver.heun_method(f, t_span, y0, h)
     t_rk4, y_rk4 = solver.rk4_method(f, t_span, y0, h)
+    t_dp, y_dp, stats_dp = solver.adaptive_method(f, t_span, y0, h0=h)
     
     # Crear figura
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
@@ -148,6 +299,7 @@ def solve_and_plot_equation(eq_num, eq_data, solver):
     ax1.plot(t_euler, y_euler, 'r--', marker='o', markersize=4, label='Euler', linewidth=2)
     ax1.plot(t_heun, y_heun, 'g--', marker='s', markersize=4, label='Heun (RK2)', linewidth=2)
     ax1.plot(t_rk4, y_rk4, 'b-', marker='^', markersize=4, label='RK4', linewidth=2)
+    ax1.plot(t_dp, y_dp, 'm:', marker='x', markersize=6, label=f'DOPRI54 ({stats_dp.aceptados} pasos)', linewidth=2)
     
     # Solución exacta si está disponible
     if exact_func is not None:
@@ -160,11 +312,13 @@ def solve_and_plot_equation(eq_num, eq_data, solver):
         error_euler = np.abs(y_euler - exact_func(t_euler))
         error_heun = np.abs(y_heun - exact_func(t_heun))
         error_rk4 = np.abs(y_rk4 - y_exact_points)
+        error_dp = np.abs(y_dp - exact_func(t_dp))
         
         # Gráfico de errores
         ax2.semilogy(t_euler, error_euler, 'r--', marker='o', markersize=4, label='Error Euler')
         ax2.semilogy(t_heun, error_heun, 'g--', marker='s', markersize=4, label='Error Heun')
         ax2.semilogy(t_rk4, error_rk4, 'b-', marker='^', markersize=4, label='Error RK4')
+        ax2.semilogy(t_dp, error_dp, 'm:', marker='x', markersize=6, label='Error DOPRI54')
         ax2.set_title('Errores Absolutos')
         ax2.set_xlabel('t')
         ax2.set_ylabel('|Error|')
@@ -176,6 +330,7 @@ def solve_and_plot_equation(eq_num, eq_data, solver):
         print(f"Error máximo Euler: {np.max(error_euler):.2e}")
         print(f"Error máximo Heun: {np.max(error_heun):.2e}")
         print(f"Error máximo RK4: {np.max(error_rk4):.2e}")
+        print(f"Error máximo DOPRI54: {np.max(error_dp):.2e}")
     else:
         ax2.text(0.5, 0.5, 'Solución exacta\nno disponible', 
                 ha='center', va='center', transform=ax2.transAxes, fontsize=12)
@@ -208,12 +363,21 @@ def solve_and_plot_equation(eq_num, eq_data, solver):
             print(f" {exact_val:12.6f} {error:12.2e}")
         else:
             print()
+    
+    # Pasos aceptados por el método adaptativo
+    print(f"\n{stats_dp.resumen()}")
+    print(f"{'n':>4} {'t':>10} {'h':>12} {'DOPRI54':>12}")
+    for i in range(1, len(t_dp)):
+        print(f"{i:4d} {t_dp[i]:10.5f} {stats_dp.h[i-1]:12.4e} {y_dp[i]:12.6f}")
+    
+    # Costo de cada método con el mismo h (explícitos e implícitos)
+    comparar_costos(f, t_span, y0, h, exact_func, solver)
 
 def main():
     """Función principal"""
     print("=" * 80)
     print("RESOLUCIÓN DE ECUACIONES DIFERENCIALES")
-    print("Métodos: Euler, Heun (RK2), y Runge-Kutta 4to orden")
+    print("Métodos: Euler, Heun (RK2), Runge-Kutta 4to orden y Dormand-Prince 5(4) adaptativo")
     print("=" * 80)
     
     solver = RungeKuttaSolver()
@@ -225,6 +389,18 @@ def main():
             solve_and_plot_equation(eq_num, equations[eq_num], solver)
             print("\n" + "="*80 + "\n")
     
+    # Versión rígida: los implícitos dan pasos grandes donde los explícitos explotan
+    resolver_rigido(solver)
+    print("\n" + "="*80 + "\n")
+    
+    # Tiempo hasta un umbral con eventos (ecuación 8: y sube de 0.5 a ~2.64 en [0, 1])
+    tiempo_hasta_umbral(solver, equations[8], 2.0)
+    print("\n" + "="*80 + "\n")
+    
+    # Ecuación estocástica: media y varianza del ensamble contra la solución exacta
+    ecuacion_estocastica()
+    print("\n" + "="*80 + "\n")
+    
     # Resumen de métodos
     print("\nRESUMEN DE MÉTODOS:")
     print("-" * 50)
@@ -240,6 +416,19 @@ def main():
     print("   k3 = h * f(t_n + h/2, y_n + k2/2)")
     print("   k4 = h * f(t_n + h, y_n + k3)")
     print("   y_{n+1} = y_n + (k1 + 2*k2 + 2*k3 + k4)/6")
+    print("\n4. Dormand-Prince 5(4) adaptativo:")
+    print("   7 etapas dan una solución de orden 5 y otra de orden 4;")
+    print("   su diferencia estima el error local. Si supera atol + rtol*|y|")
+    print("   el paso se rechaza y se repite con h menor; si no, h se agranda.")
+    print("\n5. Métodos implícitos (problemas rígidos):")
+    print("   Euler implícito: y_{n+1} = y_n + h * f(t_{n+1}, y_{n+1})")
+    print("   Trapecio:        y_{n+1} = y_n + h * (f_n + f_{n+1})/2")
+    print("   BDF2:            y_{n+1} = 4/3 y_n - 1/3 y_{n-1} + 2/3 h f_{n+1}")
+    print("   y_{n+1} aparece en los dos lados: se resuelve con Newton usando df/dy")
+    print("   (derivada simbólica o por diferencias finitas).")
+    print("\n6. Ecuaciones estocásticas dY = f dt + g dW:")
+    print("   Euler-Maruyama: Y_{n+1} = Y_n + f h + g dW,  dW ~ N(0, h)")
+    print("   Milstein:       agrega g g' (dW^2 - h)/2 (orden fuerte 1 en lugar de 1/2)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.integrate import odeint
+from motor_rk import integrar_ensamble
 from scipy.linalg import eig
 
 # Definir todos los sistemas
@@ -64,8 +64,13 @@ def clasificar_equilibrio(eigenvalues):
         return "Nodo estable (sumidero)"
 
 def sistema_dinamico(X, t, A):
-    """Función que define el sistema dinámico"""
-    return A @ X
+    """Función que define el sistema dinámico (X puede ser un estado (2,) o un ensamble (n, 2))"""
+    return X @ A.T
+
+def simular_ensamble(A, condiciones_iniciales, t):
+    """Todas las trayectorias en una sola integración; devuelve un array (n_ci, len(t), 2)"""
+    Y = integrar_ensamble(lambda t, X: sistema_dinamico(X, t, A), t, condiciones_iniciales, "RK4").y
+    return Y.transpose(1, 0, 2)
 
 def analizar_sistema(num_sistema, t_max=5, mostrar=True):
     """
@@ -130,9 +135,12 @@ def analizar_sistema(num_sistema, t_max=5, mostrar=True):
         # Tiempo de simulación
         t = np.linspace(0, t_max, 1000)
         
-        # Simular trayectorias
+        # Simular trayectorias: todas las condiciones iniciales (y la de la evolución
+        # temporal, la última) avanzan juntas en una sola integración
+        X0_temporal = [1, 0.5]  # Condición inicial para evolución temporal
+        trayectorias = simular_ensamble(A, condiciones_iniciales + [X0_temporal], t)
         for i, X0 in enumerate(condiciones_iniciales):
-            sol = odeint(sistema_dinamico, X0, t, args=(A,))
+            sol = trayectorias[i]
             ax1.plot(sol[:, 0], sol[:, 1], color=colores[i], linewidth=1.5, alpha=0.7)
             ax1.plot(X0[0], X0[1], 'o', color=colores[i], markersize=8)
         
@@ -177,8 +185,8 @@ def analizar_sistema(num_sistema, t_max=5, mostrar=True):
         ax1.legend()
         
         # ===== EVOLUCIÓN TEMPORAL =====
-        X0 = [1, 0.5]  # Condición inicial para evolución temporal
-        sol = odeint(sistema_dinamico, X0, t, args=(A,))
+        X0 = X0_temporal
+        sol = trayectorias[-1]
         
         ax2.plot(t, sol[:, 0], 'r-', linewidth=2, label='x(t)')
         ax2.plot(t, sol[:, 1], 'b-', linewidth=2, label='y(t)')
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Barrido de parámetros para y' = f(t, y, k, ...).
+
+- La expresión puede usar parámetros con nombre (cualquier símbolo que no
+  sea t ni y); cada uno, y también y0, recibe una lista o rango de valores
+  y se recorre el producto cartesiano de todos.
+- Si f hace broadcast sobre arrays (las de compilar_sympy casi siempre) se
+  integra un lote de casos a la vez: el estado es un vector con un caso por
+  componente y cada etapa es una sola llamada a f. Si no, los casos se
+  reparten en un ProcessPoolExecutor (los procesos compilan la expresión).
+- iterar_barrido es un generador que avanza de a lotes y reporta
+  (hechos, total, resultado parcial): la interfaz muestra el progreso con
+  root.after y cancelar es simplemente dejar de iterarlo (close() cancela
+  las tareas pendientes del pool).
+- ResultadoBarrido guarda las trayectorias (casos, n+1) y tabla() devuelve
+  un array ordenado: una fila por caso con sus parámetros, y final, mín y máx.
+
+Requisitos: numpy, sympy
+"""
+
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import sympy as sp
+
+from expresiones import compilar_sympy
+from motor_rk import es_adaptativo, es_multipaso, integrar_multipaso, integrar_rk, pasos_grilla
+
+LOTE = 1024  # casos por lote (llamada vectorizada o tarea de un proceso)
+
+
+def parametros_de(expr: str) -> List[str]:
+    """Nombres de los parámetros de la expresión: símbolos libres distintos de t e y, ordenados."""
+    return sorted(str(s) for s in sp.sympify(expr).free_symbols if str(s) not in ("t", "y"))
+
+
+def interpretar_rangos(texto: str) -> Dict[str, np.ndarray]:
+    """
+    'y0=0:2:5; k=0.5,1,2' -> {'y0': linspace(0, 2, 5), 'k': [0.5, 1, 2]}.
+    Cada término es nombre=valor, nombre=a:b:n (n valores equiespaciados) o nombre=v1,v2,...
+    """
+    barridos = {}
+    for termino in filter(None, (p.strip() for p in texto.split(";"))):
+        nombre, _, valores = termino.partition("=")
+        nombre, valores = nombre.strip(), valores.strip()
+        if not nombre.isidentifier() or not valores:
+            raise ValueError(f"Término inválido: '{termino}' (se espera nombre=valores).")
+        try:
+            if ":" in valores:
+                a, b, n = valores.split(":")
+                barridos[nombre] = np.linspace(float(a), float(b), int(n))
+            else:
+                barridos[nombre] = np.array([float(v) for v in valores.split(",")])
+        except ValueError:
+            raise ValueError(f"Valores inválidos para {nombre}: '{valores}'.") from None
+    return barridos
+
+
+class ResultadoBarrido:
+    """
+    - nombres: parámetros barridos (y0 incluido si se barrió), en el orden de las columnas
+    - valores: (casos, len(nombres)) valores de cada caso; forma: cantidad de valores por nombre
+    - t: (n+1,)   trayectorias: (casos, n+1), NaN en los casos que no se calcularon
+    - completos: (casos,) True en los casos ya integrados
+    """
+
+    def __init__(self, metodo: str, nombres: List[str], valores: np.ndarray, forma: tuple,
+                 t: np.ndarray, vectorizado: bool):
+        self.metodo = metodo
+        self.nombres = nombres
+        self.valores = valores
+        self.forma = forma
+        self.t = t
+        self.vectorizado = vectorizado
+        self.trayectorias = np.full((len(valores), len(t)), np.nan)
+        self.completos = np.zeros(len(valores), dtype=bool)
+
+    @property
+    def casos(self) -> int:
+        return len(self.valores)
+
+    @property
+    def final(self) -> np.ndarray:
+        return self.trayectorias[:, -1]
+
+    def columna(self, nombre: str) -> np.ndarray:
+        return self.valores[:, self.nombres.index(nombre)]
+
+    def tabla(self):
+        """(columnas, array (casos, k)): parámetros del caso, y final, y mín, y máx."""
+        minimo, maximo = np.full(self.casos, np.nan), np.full(self.casos, np.nan)
+        ok = self.completos
+        if ok.any():
+            minimo[ok], maximo[ok] = self.trayectorias[ok].min(axis=1), self.trayectorias[ok].max(axis=1)
+        return self.nombres + ["y_final", "y_min", "y_max"], np.column_stack([self.valores, self.final, minimo, maximo])
+
+
+def _integrar_lote(f, t0, t_end, h, metodo, y0s) -> np.ndarray:
+    """Trayectorias (len(y0s), n+1) integrando todos los casos juntos como un solo estado vectorial."""
+    if es_multipaso(metodo):
+        res = integrar_multipaso(f, t0, y0s, t_end, h, metodo)
+    else:
+        res = integrar_rk(f, t0, y0s, t_end, h, metodo)
+    return res.y.T
+
+
+def _integrar_casos(expr: str, variables: tuple, t0: float, t_end: float, h: float, metodo: str,
+                    y0s: np.ndarray, parametros: np.ndarray) -> np.ndarray:
+    """Tarea de un proceso: los casos de a uno (f no admite arrays). parametros: (casos, k)."""
+    f = compilar_sympy(expr, variables)
+    salida = []
+    for y0, p in zip(y0s, parametros):
+        salida.append(_integrar_lote(lambda t, y, p=p: f(t, y, *p), t0, t_end, h, metodo, np.array([y0]))[0])
+    return np.array(salida)
+
+
+def iterar_barrido(expr: str, t0: float, t_end: float, h: float, barridos: Dict[str, Sequence],
+                   y0: Optional[float] = None, metodo: str = "RK4", procesos: Optional[int] = None,
+                   lote: int = LOTE, vectorizar: bool = True):
+    """
+    Valida los datos y devuelve un generador de (hechos, total, ResultadoBarrido) que avanza
+    el barrido de a lotes; el último tiene hechos == total. barridos: {nombre: valores}, con 'y0' opcional (si no, se usa y0).
+    Todo parámetro de la expresión debe tener valores. procesos=None usa todos los núcleos;
+    vectorizar=False fuerza el pool aunque f admita arrays.
+    """
+    if es_adaptativo(metodo):
+        raise ValueError("El barrido usa métodos de paso fijo (el adaptativo elige pasos distintos por caso).")
+    barridos = {k: np.atleast_1d(np.asarray(v, dtype=float)) for k, v in barridos.items()}
+    parametros = parametros_de(expr)
+    faltan = [p for p in parametros if p not in barridos]
+    if faltan:
+        raise ValueError(f"Faltan valores para los parámetros: {', '.join(faltan)}.")
+    sobran = [k for k in barridos if k != "y0" and k not in parametros]
+    if sobran:
+        raise ValueError(f"La expresión no usa: {', '.join(sobran)}.")
+    if "y0" not in barridos:
+        if y0 is None:
+            raise ValueError("Falta y0 (valor fijo o barrido).")
+        barridos["y0"] = np.array([float(y0)])
+
+    nombres = parametros + ["y0"]
+    valores = np.array(list(itertools.product(*(barridos[n] for n in nombres))), dtype=float)
+    n_steps = pasos_grilla(t0, t_end, h)
+    t = t0 + h * np.arange(n_steps + 1)
+    variables = ("t", "y") + tuple(parametros)
+    f = compilar_sympy(expr, variables)
+    y0s, P = valores[:, -1], valores[:, :-1]
+    # Columnas del resultado: solo lo que se barrió con más de un valor, y y0 siempre
+    visibles = [i for i, n in enumerate(nombres) if len(barridos[n]) > 1 or n == "y0"]
+    forma = tuple(len(barridos[nombres[i]]) for i in visibles)
+
+    vectorizado = False
+    if vectorizar:
+        try:
+            prueba = np.asarray(f(t0, y0s[:2], *P[:2].T), dtype=float)
+            vectorizado = prueba.shape in ((), (min(2, len(y0s)),))
+        except (TypeError, ValueError):
+            pass
+    res = ResultadoBarrido(metodo, [nombres[i] for i in visibles], valores[:, visibles], forma, t, vectorizado)
+    return _avanzar(res, expr, variables, f, t0, t_end, h, metodo, y0s, P, procesos, lote)
+
+
+def _avanzar(res, expr, variables, f, t0, t_end, h, metodo, y0s, P, procesos, lote):
+    """Generador del barrido: lotes vectorizados en este proceso o tareas del pool."""
+    total = res.casos
+    if res.vectorizado:
+        for inicio in range(0, total, lote):
+            fin = min(inicio + lote, total)
+            Pl = P[inicio:fin].T
+            res.trayectorias[inicio:fin] = _integrar_lote(lambda tt, y: f(tt, y, *Pl), t0, t_end, h, metodo, y0s[inicio:fin])
+            res.completos[inicio:fin] = True
+            yield fin, total, res
+        return
+
+    # f no admite arrays: lotes chicos repartidos entre procesos
+    procesos = procesos or os.cpu_count() or 1
+    tam = max(1, min(lote, -(-total // (4 * procesos))))
+    pool = ProcessPoolExecutor(max_workers=min(procesos, -(-total // tam)))
+    try:
+        pendientes = {pool.submit(_integrar_casos, expr, variables, t0, t_end, h, metodo,
+                                  y0s[i:i + tam], P[i:i + tam]): i for i in range(0, total, tam)}
+        hechos = 0
+        while pendientes:
+            listos, _ = wait(pendientes, timeout=0.05, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                i = pendientes.pop(futuro)
+                y = futuro.result()
+                res.trayectorias[i:i + len(y)] = y
+                res.completos[i:i + len(y)] = True
+                hechos += len(y)
+            yield hechos, total, res
+    finally:
+        # También al cancelar (close() del generador): lo que no empezó no se ejecuta
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def barrido(expr: str, t0: float, t_end: float, h: float, barridos: Dict[str, Sequence],
+            y0: Optional[float] = None, metodo: str = "RK4", procesos: Optional[int] = None,
+            vectorizar: bool = True) -> ResultadoBarrido:
+    """Barrido completo sin reportes intermedios."""
+    res = None
+    for _, _, res in iterar_barrido(expr, t0, t_end, h, barridos, y0, metodo, procesos, vectorizar=vectorizar):
+        pass
+    return res
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Estudio empírico del orden de convergencia de los métodos de paso fijo.
+
+- La misma EDO se resuelve con una escalera geométrica de pasos h0, h0/r,
+  h0/r^2, ... para cada método. Cada par (método, h) es una tarea
+  independiente que corre en un proceso aparte (ProcessPoolExecutor).
+- Los procesos reciben la expresión de f como texto y la compilan con
+  compilar_sympy: una función lambdificada no se puede enviar entre procesos.
+- El error global se mide en los puntos de la malla más gruesa (comunes a
+  todos los h) contra la solución exacta o, si no la hay, contra una
+  referencia DOPRI54 con tolerancia muy fina.
+- Orden observado: pendiente del ajuste de log(error) contra log(h), y el
+  orden local entre niveles consecutivos.
+- Richardson: con el orden teórico p, y_R = y_{h/r} + (y_{h/r} - y_h)/(r^p - 1)
+  mejora la solución, y |y_{h/r} - y_h|/(r^p - 1) estima el error sin
+  conocer la exacta.
+- El costo se cuenta en evaluaciones de f, para comparar error contra trabajo.
+- iterar_convergencia entrega el avance de a poco (como iterar_barrido), para
+  que una interfaz lo consulte con root.after sin quedar congelada.
+
+Requisitos: numpy, sympy
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from expresiones import compilar_sympy
+from motor_rk import (METODOS_IMPLICITOS, SalidaDensa, es_multipaso, evaluaciones_metodo, integrar_adaptativo,
+                      integrar_implicito, integrar_multipaso, integrar_rk, nombres_metodos,
+                      obtener_metodo, obtener_metodo_multipaso)
+
+ORDEN_IMPLICITOS = {"Euler implícito": 1, "Trapecio": 2, "BDF2": 2}
+PISO_ERROR = 1e-13  # errores por debajo de esto son redondeo: no entran en el ajuste del orden
+
+
+def orden_teorico(metodo: str) -> int:
+    if metodo in ORDEN_IMPLICITOS:
+        return ORDEN_IMPLICITOS[metodo]
+    if es_multipaso(metodo):
+        return obtener_metodo_multipaso(metodo).orden
+    return obtener_metodo(metodo).orden
+
+
+def _resolver_nivel(expr: str, t0: float, y0, h: float, n_steps: int, metodo: str, salto: int):
+    """
+    Tarea de un proceso: n_steps pasos de tamaño h con metodo. Devuelve y en los puntos
+    de la malla gruesa (uno cada 'salto' pasos), las evaluaciones de f y el tiempo.
+    """
+    f = compilar_sympy(expr)
+    inicio = time.perf_counter()
+    if metodo in METODOS_IMPLICITOS:
+        res = integrar_implicito(f, t0 + h * np.arange(n_steps + 1), y0, metodo)
+        evaluaciones = res.evaluaciones
+    else:
+        # t_end medio paso más allá: int((t_end - t0)/h) da exactamente n_steps sin errores de redondeo
+        t_end = t0 + (n_steps + 0.5) * h
+        if es_multipaso(metodo):
+            res = integrar_multipaso(f, t0, y0, t_end, h, metodo)
+        else:
+            res = integrar_rk(f, t0, y0, t_end, h, metodo)
+        evaluaciones = evaluaciones_metodo(metodo, n_steps)
+    return res.y[::salto], evaluaciones, time.perf_counter() - inicio
+
+
+class ResultadoConvergencia:
+    """
+    Resultado del estudio, por método (arrays de largo niveles, o niveles - 1 entre niveles):
+    - errores, evaluaciones, segundos
+    - orden_observado (ajuste), ordenes_locales
+    - error_richardson: error de la solución extrapolada con los niveles k y k+1
+    - estimacion_richardson: error estimado del nivel k+1 sin usar la referencia
+    """
+
+    def __init__(self, h: np.ndarray, t_comunes: np.ndarray, referencia: str):
+        self.h = h
+        self.t_comunes = t_comunes
+        self.referencia = referencia
+        self.errores: Dict[str, np.ndarray] = {}
+        self.evaluaciones: Dict[str, np.ndarray] = {}
+        self.segundos: Dict[str, np.ndarray] = {}
+        self.orden_teorico: Dict[str, int] = {}
+        self.orden_observado: Dict[str, float] = {}
+        self.ordenes_locales: Dict[str, np.ndarray] = {}
+        self.error_richardson: Dict[str, np.ndarray] = {}
+        self.estimacion_richardson: Dict[str, np.ndarray] = {}
+
+    @property
+    def metodos(self) -> List[str]:
+        return list(self.errores)
+
+    def filas(self) -> List[tuple]:
+        """(método, p teórico, p observado, error con el h más fino, error Richardson, estimación, evaluaciones)"""
+        return [(m, self.orden_teorico[m], self.orden_observado[m], self.errores[m][-1],
+                 self.error_richardson[m][-1] if len(self.h) > 1 else np.nan,
+                 self.estimacion_richardson[m][-1] if len(self.h) > 1 else np.nan,
+                 int(self.evaluaciones[m][-1])) for m in self.metodos]
+
+    def resumen(self) -> str:
+        lineas = [f"Referencia: {self.referencia}; h de {self.h[0]:.4g} a {self.h[-1]:.4g}",
+                  f"{'Método':<16} {'p':>3} {'p obs.':>7} {'error':>10} {'err. Rich.':>10} {'est. Rich.':>10} {'eval. f':>9}"]
+        for m, p, p_obs, err, err_r, est, ev in self.filas():
+            lineas.append(f"{m:<16} {p:3d} {p_obs:7.2f} {err:10.2e} {err_r:10.2e} {est:10.2e} {ev:9d}")
+        return "\n".join(lineas)
+
+
+def _ajustar_orden(h: np.ndarray, errores: np.ndarray) -> float:
+    """Pendiente de log(error) vs log(h) con los niveles por encima del redondeo."""
+    usar = np.isfinite(errores) & (errores > PISO_ERROR)
+    if usar.sum() < 2:
+        return np.nan
+    return float(np.polyfit(np.log(h[usar]), np.log(errores[usar]), 1)[0])
+
+
+def iterar_convergencia(expr: str, t0: float, y0, t_end: float, h0: float,
+                        metodos: Optional[Sequence[str]] = None, niveles: int = 6, razon: int = 2,
+                        exacta: Optional[Callable] = None, procesos: Optional[int] = None):
+    """
+    Valida los datos y devuelve un generador de (hechas, total, estudio) que avanza el estudio
+    a medida que terminan las tareas; estudio es None hasta el último, que trae hechas == total
+    y el ResultadoConvergencia. Cada next() vuelve enseguida aunque no haya terminado ninguna
+    tarea, así una interfaz lo puede consultar con root.after; close() cancela lo pendiente.
+    Los argumentos son los de estudio_convergencia.
+    """
+    if h0 <= 0 or t_end <= t0:
+        raise ValueError("Se necesita h0 > 0 y t_end > t0.")
+    if int(razon) != razon or razon < 2:
+        raise ValueError("La razón entre pasos debe ser un entero >= 2 (las mallas finas contienen a la gruesa).")
+    metodos = list(nombres_metodos() if metodos is None else metodos)
+    razon = int(razon)
+    n0 = int((t_end - t0) / h0)
+    if n0 < 1:
+        raise ValueError("h0 es mayor que el intervalo de integración.")
+    y0 = np.asarray(y0, dtype=float)
+    h = h0 / razon ** np.arange(niveles)
+    t_comunes = t0 + h0 * np.arange(n0 + 1)
+    if exacta is not None:
+        referencia = "solución exacta"
+        y_ref = np.asarray(exacta(t_comunes), dtype=float).reshape((n0 + 1,) + y0.shape)
+    else:
+        referencia = "DOPRI54 (rtol = 1e-12)"
+        y_ref = None  # se calcula como una tarea más, junto a las de los métodos
+    return _avanzar(expr, t0, y0, h, t_comunes, referencia, y_ref, metodos, razon, procesos)
+
+
+def _referencia_dopri(expr: str, t0: float, y0: np.ndarray, t_comunes: np.ndarray) -> np.ndarray:
+    """Tarea de un proceso: DOPRI54 con rtol 1e-12 evaluado en la malla gruesa."""
+    f = compilar_sympy(expr)
+    ref = integrar_adaptativo(f, t0, y0, t_comunes[-1], rtol=1e-12, atol=1e-14, guardar_pendientes=True)
+    return SalidaDensa(f, ref)(t_comunes)
+
+
+def _avanzar(expr, t0, y0, h, t_comunes, referencia, y_ref, metodos, razon, procesos):
+    """Generador del estudio: tareas en este proceso (procesos=1) o repartidas en el pool."""
+    niveles, n0 = len(h), len(t_comunes) - 1
+    tareas = [(m, k) for k in reversed(range(niveles)) for m in metodos]  # los h finos primero: reparten mejor
+    salidas = {}
+    total = len(tareas)
+    argumentos = {(m, k): (expr, t0, y0, h[k], n0 * razon ** k, m, razon ** k) for m, k in tareas}
+    if procesos == 1:
+        if y_ref is None:
+            y_ref = _referencia_dopri(expr, t0, y0, t_comunes)
+        for hechas, tarea in enumerate(tareas, 1):
+            salidas[tarea] = _resolver_nivel(*argumentos[tarea])
+            if hechas < total:
+                yield hechas, total, None
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(procesos or os.cpu_count() or 1, total))
+        try:
+            pendientes = {pool.submit(_resolver_nivel, *argumentos[tarea]): tarea for tarea in tareas}
+            if y_ref is None:
+                pendientes[pool.submit(_referencia_dopri, expr, t0, y0, t_comunes)] = None
+            while pendientes:
+                listos, _ = wait(pendientes, timeout=0.05, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    tarea = pendientes.pop(futuro)
+                    if tarea is None:
+                        y_ref = futuro.result()
+                    else:
+                        salidas[tarea] = futuro.result()
+                if pendientes:
+                    yield len(salidas), total, None
+        finally:
+            # También al cancelar (close() del generador): lo que no empezó no se ejecuta
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    estudio = ResultadoConvergencia(h, t_comunes, referencia)
+    for m in metodos:
+        ys = [salidas[(m, k)][0] for k in range(niveles)]
+        with np.errstate(all="ignore"):
+            errores = np.array([np.max(np.abs(y - y_ref)) for y in ys])
+        p = orden_teorico(m)
+        estudio.orden_teorico[m] = p
+        estudio.errores[m] = errores
+        estudio.evaluaciones[m] = np.array([salidas[(m, k)][1] for k in range(niveles)])
+        estudio.segundos[m] = np.array([salidas[(m, k)][2] for k in range(niveles)])
+        estudio.orden_observado[m] = _ajustar_orden(h, errores)
+        with np.errstate(all="ignore"):
+            estudio.ordenes_locales[m] = np.log(errores[:-1] / errores[1:]) / np.log(razon)
+            diferencias = [ys[k + 1] - ys[k] for k in range(niveles - 1)]
+            factor = razon ** p - 1
+            estudio.error_richardson[m] = np.array([np.max(np.abs(ys[k + 1] + d / factor - y_ref))
+                                                    for k, d in enumerate(diferencias)])
+            estudio.estimacion_richardson[m] = np.array([np.max(np.abs(d)) / factor for d in diferencias])
+    yield total, total, estudio
+
+
+def estudio_convergencia(expr: str, t0: float, y0, t_end: float, h0: float,
+                         metodos: Optional[Sequence[str]] = None, niveles: int = 6, razon: int = 2,
+                         exacta: Optional[Callable] = None, procesos: Optional[int] = None,
+                         al_avanzar: Optional[Callable[[int, int], None]] = None) -> ResultadoConvergencia:
+    """
+    Resuelve y' = expr(t, y) con h = h0 / razon^k, k = 0..niveles-1, para cada método.
+    - exacta(t) -> y sobre un array de t; si es None la referencia es DOPRI54 con rtol 1e-12
+    - procesos: cantidad de procesos (None = todos los núcleos, 1 = en este mismo proceso)
+    - al_avanzar(hechas, total) se llama cada vez que termina una tarea
+    """
+    hechas_antes = 0
+    for hechas, total, estudio in iterar_convergencia(expr, t0, y0, t_end, h0, metodos, niveles, razon,
+                                                      exacta, procesos):
+        if al_avanzar and hechas > hechas_antes:
+            al_avanzar(hechas, total)
+        hechas_antes = hechas
+    return estudio
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Compilación de expresiones con caché compartida por todo el proceso.
+
+- compilar_segura: evaluación segura (AST validado, funciones de math) para
+  las calculadoras de raíces, derivadas, integrales e interpolación. La
+  expresión se parsea y valida una sola vez y produce dos callables:
+  escalar (math -> float) y vectorial (ufuncs de NumPy sobre arrays).
+- compilar_sympy: sympify + lambdify una sola vez por (expresión, variables),
+  usado por los simuladores de Runge-Kutta y diferencias finitas.
+- compilar_derivadas: derivadas exactas (simbólicas y lambdificadas) de la
+  misma expresión, cacheadas junto a la función compilada.
+- Todas las cachés son LRU acotadas (MAX_EXPRESIONES), así que ingresar muchas
+  expresiones distintas no hace crecer la memoria sin límite.
+- estadisticas_cache / estadisticas_cache_segura: aciertos y compilaciones,
+  para verificar que una corrida no recompila la expresión en el bucle.
+
+Requisitos: numpy, sympy
+"""
+
+import ast
+import math
+from functools import lru_cache, reduce
+from typing import Callable, Sequence
+
+import numpy as np
+import sympy as sp
+
+MAX_EXPRESIONES = 128
+
+
+# ==========================
+# Evaluación segura (AST)
+# ==========================
+PERMITIDOS = {k: getattr(math, k) for k in dir(math) if not k.startswith("__")}
+PERMITIDOS.update({"abs": abs, "pow": pow, "ln": math.log,
+                   "min": min, "max": max, "round": round})
+
+_NODOS_PERMITIDOS = (ast.Expression, ast.Call, ast.Name, ast.Load, ast.Constant,
+                     ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+                     ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+                     ast.USub, ast.UAdd, ast.Not, ast.And, ast.Or,
+                     ast.Eq, ast.NotEq, ast.Lt, ast.Gt, ast.LtE, ast.GtE)
+
+# Equivalentes NumPy (ufuncs) de las funciones permitidas: misma fórmula, un solo llamado por array
+_NP_EQUIV = {
+    "acos": np.arccos, "acosh": np.arccosh, "asin": np.arcsin, "asinh": np.arcsinh,
+    "atan": np.arctan, "atan2": np.arctan2, "atanh": np.arctanh, "cbrt": np.cbrt,
+    "ceil": np.ceil, "copysign": np.copysign, "cos": np.cos, "cosh": np.cosh,
+    "degrees": np.degrees, "exp": np.exp, "exp2": np.exp2, "expm1": np.expm1,
+    "fabs": np.fabs, "floor": np.floor, "fmod": np.fmod, "hypot": np.hypot,
+    "isfinite": np.isfinite, "isinf": np.isinf, "isnan": np.isnan, "log10": np.log10,
+    "log1p": np.log1p, "log2": np.log2, "radians": np.radians, "sin": np.sin,
+    "sinh": np.sinh, "sqrt": np.sqrt, "tan": np.tan, "tanh": np.tanh, "trunc": np.trunc,
+    "abs": np.abs, "pow": np.power, "ln": np.log,
+    "round": np.round,
+}
+
+
+def _np_variadica(ufunc, nombre: str) -> Callable:
+    """min/max con N argumentos: el 3er argumento posicional de una ufunc es 'out', así que se reduce de a pares."""
+    def f(*args):
+        if len(args) < 2:
+            # Igual que el min/max de Python con un solo número (no hay listas en la expresión)
+            raise TypeError(f"{nombre}() espera al menos 2 argumentos")
+        return reduce(ufunc, args)
+    return f
+
+
+_NP_EQUIV.update({"min": _np_variadica(np.minimum, "min"),
+                  "max": _np_variadica(np.maximum, "max")})
+
+
+def _np_log(x, base=None):
+    return np.log(x) if base is None else np.log(x) / np.log(base)
+
+
+def _espacio_numpy() -> dict:
+    """Traduce PERMITIDOS a NumPy; lo que no tiene ufunc (gamma, erf, ...) se vectoriza."""
+    ns = {"_np_and": np.logical_and, "_np_or": np.logical_or,
+          "_np_not": np.logical_not, "_np_where": np.where}
+    for k, v in PERMITIDOS.items():
+        if k in _NP_EQUIV:
+            ns[k] = _NP_EQUIV[k]
+        elif k == "log":
+            ns[k] = _np_log
+        elif callable(v):
+            ns[k] = np.vectorize(v, otypes=[float])
+        else:
+            ns[k] = v
+    return ns
+
+
+_PERMITIDOS_NP = _espacio_numpy()
+
+
+def _validar(expr: str, variables: Sequence[str]) -> ast.Expression:
+    """Parsea expr y rechaza nombres y nodos fuera de la lista blanca."""
+    if not expr.strip():
+        raise ValueError("No hay expresión de función.")
+    expr_ast = ast.parse(expr.strip(), mode='eval')
+    for node in ast.walk(expr_ast):
+        if isinstance(node, ast.Name):
+            if node.id not in variables and node.id not in PERMITIDOS:
+                raise ValueError(f"Nombre no permitido en expresión: {node.id}")
+        elif not isinstance(node, _NODOS_PERMITIDOS):
+            raise ValueError(f"Nodo AST no permitido: {type(node).__name__}")
+    return expr_ast
+
+
+class _VectorizarAST(ast.NodeTransformer):
+    """Reescribe and/or/not, comparaciones encadenadas y 'a if c else b' elemento a elemento."""
+
+    @staticmethod
+    def _call(fn, args):
+        return ast.Call(func=ast.Name(id=fn, ctx=ast.Load()), args=args, keywords=[])
+
+    def _encadenar(self, fn, values):
+        res = values[0]
+        for v in values[1:]:
+            res = self._call(fn, [res, v])
+        return res
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        return self._encadenar("_np_and" if isinstance(node.op, ast.And) else "_np_or", node.values)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self._call("_np_not", [node.operand])
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        partes, izq = [], node.left
+        for op, der in zip(node.ops, node.comparators):
+            partes.append(ast.Compare(left=izq, ops=[op], comparators=[der]))
+            izq = der
+        return self._encadenar("_np_and", partes)
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        return self._call("_np_where", [node.test, node.body, node.orelse])
+
+
+def _como_funcion(cuerpo: ast.AST, variables: Sequence[str], ns: dict, nombre: str) -> Callable:
+    """Envuelve el cuerpo validado en 'lambda <variables>: <cuerpo>' y lo compila una vez."""
+    args = ast.arguments(posonlyargs=[], args=[ast.arg(arg=v) for v in variables],
+                         kwonlyargs=[], kw_defaults=[], defaults=[])
+    lam = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=args, body=cuerpo)))
+    return eval(compile(lam, nombre, "eval"), {"__builtins__": {}, **ns})
+
+
+class FuncionCompilada:
+    """
+    Expresión segura compilada una sola vez.
+    - escalar(*args): evaluación con math, devuelve float
+    - vectorial(*args): evaluación NumPy con broadcast, devuelve np.ndarray
+    - f(*args): despacha según reciba escalares o arrays/listas/tuplas
+    """
+
+    def __init__(self, expr: str, variables: Sequence[str]):
+        expr_ast = _validar(expr, variables)
+        self.expr = expr
+        self.variables = tuple(variables)
+        self._f = _como_funcion(expr_ast.body, variables, PERMITIDOS, "<expr>")
+        vec_ast = _VectorizarAST().visit(_validar(expr, variables))
+        self._f_np = _como_funcion(vec_ast.body, variables, _PERMITIDOS_NP, "<expr-np>")
+
+    def escalar(self, *args) -> float:
+        return float(self._f(*args))
+
+    def vectorial(self, *args) -> np.ndarray:
+        arrays = [np.asarray(a, dtype=float) for a in args]
+        shape = np.broadcast_shapes(*(a.shape for a in arrays))
+        with np.errstate(all="ignore"):
+            res = self._f_np(*arrays)
+        # Expresiones constantes (p.ej. "2") devuelven un escalar: se expande a la forma de la entrada
+        return np.array(np.broadcast_to(np.asarray(res, dtype=float), shape))
+
+    def __call__(self, *args):
+        if any(isinstance(a, (np.ndarray, list, tuple)) for a in args):
+            return self.vectorial(*args)
+        return self.escalar(*args)
+
+    def __repr__(self):
+        return f"FuncionCompilada({self.expr!r}, variables={self.variables})"
+
+
+@lru_cache(maxsize=MAX_EXPRESIONES)
+def _compilar_segura_cacheado(expr: str, variables: tuple) -> FuncionCompilada:
+    return FuncionCompilada(expr, variables)
+
+
+def compilar_segura(expr: str, variables: Sequence[str] = ("x",)) -> FuncionCompilada:
+    """
+    Devuelve la FuncionCompilada de expr (ValueError si no pasa la validación).
+    La misma expresión pedida desde cualquier herramienta se compila una sola vez.
+    """
+    return _compilar_segura_cacheado(expr.strip(), tuple(variables))
+
+
+# ==========================
+# SymPy -> NumPy (lambdify)
+# ==========================
+@lru_cache(maxsize=MAX_EXPRESIONES)
+def _lambdify_cacheado(expr_str: str, variables: tuple) -> Callable:
+    simbolos = sp.symbols(variables)
+    expr = sp.sympify(expr_str)
+    return sp.lambdify(simbolos, expr, "numpy")
+
+
+def compilar_sympy(expr_str: str, variables: Sequence[str] = ("t", "y")) -> Callable:
+    """
+    Devuelve la función NumPy equivalente a expr_str.
+    - La primera llamada parsea y compila; las siguientes reutilizan el resultado.
+    - variables fija el orden de los argumentos, por defecto f(t, y).
+    """
+    return _lambdify_cacheado(expr_str.strip(), tuple(variables))
+
+
+@lru_cache(maxsize=MAX_EXPRESIONES)
+def _derivadas_cacheadas(expr_str: str, variables: tuple) -> tuple:
+    simbolos = sp.symbols(variables)
+    expr = sp.sympify(expr_str)
+    derivadas = tuple(sp.diff(expr, s) for s in simbolos)
+    return derivadas, tuple(sp.lambdify(simbolos, d, "numpy") for d in derivadas)
+
+
+def compilar_derivadas(expr_str: str, variables: Sequence[str] = ("x",)) -> tuple:
+    """
+    Derivadas exactas de expr_str respecto de cada variable, calculadas una sola vez.
+    Devuelve (derivadas simbólicas, derivadas lambdificadas) en el orden de variables.
+    """
+    return _derivadas_cacheadas(expr_str.strip(), tuple(variables))
+
+
+# ==========================
+# Estadísticas de las cachés
+# ==========================
+def _estadisticas(fn) -> dict:
+    info = fn.cache_info()
+    return {"aciertos": info.hits, "compilaciones": info.misses,
+            "en_cache": info.currsize, "capacidad": info.maxsize}
+
+
+def estadisticas_cache() -> dict:
+    """Contadores de la caché de compilar_sympy: aciertos, compilaciones y ocupación."""
+    return _estadisticas(_lambdify_cacheado)
+
+
+def estadisticas_cache_segura() -> dict:
+    """Contadores de la caché de compilar_segura."""
+    return _estadisticas(_compilar_segura_cacheado)
+
+
+def limpiar_cache():
+    """Vacía todas las cachés y reinicia los contadores."""
+    _lambdify_cacheado.cache_clear()
+    _derivadas_cacheadas.cache_clear()
+    _compilar_segura_cacheado.cache_clear()
@@ -0,0 +1,665 @@
+# -*- coding: utf-8 -*-
+"""
+Motor Monte Carlo por bloques con memoria constante y en varios procesos.
+
+- Las muestras se generan y evalúan en bloques de tamaño fijo (BLOQUE) y
+  cada bloque se pliega en acumuladores: media y varianza de f con
+  Welford/Chan y la cuenta de éxitos del hit-or-miss. Nada crece con N,
+  así que N queda limitado solo por el tiempo.
+- Para mostrar puntos (tabla y gráfico) se conserva un reservorio de tamaño
+  fijo: una muestra uniforme de todos los puntos generados.
+- La traza de convergencia (media y desvío acumulados) se registra de paso
+  en puntos espaciados logarítmicamente: dentro de cada bloque los prefijos
+  salen de sumas acumuladas de los valores desplazados, combinadas con el
+  acumulador de los bloques anteriores. Una sola pasada, O(N).
+- N se reparte en tareas de TAREA muestras. Cada tarea tiene su propio
+  stream, salido de SeedSequence(semilla).spawn, y corre en un proceso del
+  pool (recibe la expresión como texto y la compila con compilar_sympy).
+  Los resultados parciales se combinan siempre en el orden de las tareas:
+  con la misma semilla el resultado es idéntico bit a bit, sin importar la
+  cantidad de procesos ni el orden en que terminen.
+- Cuasi Monte Carlo: con muestreo "Sobol" o "Halton" los puntos salen de
+  secuencias de baja discrepancia aleatorizadas (scrambling de
+  scipy.stats.qmc). Se hacen R réplicas independientes (una por tarea, cada
+  una aleatorizada con su stream): la estimación es el promedio y el error
+  sale de la dispersión entre réplicas, porque los puntos de una misma
+  secuencia no son independientes. Sobol usa 2^k puntos por réplica.
+- Reducción de varianza (método promedio): cada estimador produce un valor
+  v por muestra con E[v] = integral / volumen, así que acumuladores, traza,
+  réplicas y pool no cambian:
+  - "Antitéticas": v = (f(x) + f(a + b - x)) / 2, dos evaluaciones por muestra.
+  - "Variable de control": v = f(x) - (h(x) - E[h]), con h un polinomio de
+    grado GRADO_CONTROL ajustado por mínimos cuadrados a f en una muestra
+    piloto independiente (el ajuste ya estima el coeficiente óptimo: con
+    término constante, Cov(f, h) / Var(h) = 1); E[h] es exacta. La
+    piloto no cuenta en N.
+  - "Importancia" (una variable): x ~ q, v = f(x) / (q(x) (b - a)), con q la
+    densidad elegida por el usuario normalizada en [a, b] y muestreada por
+    inversión de su FDA por tramos (q es exactamente la densidad de la que
+    salen los puntos: el estimador es insesgado).
+  factor_reduccion compara la varianza por evaluación de f con la de Monte
+  Carlo simple estimada con las mismas muestras: es el factor de ahorro en
+  evaluaciones para lograr el mismo error.
+- iterar_hit_or_miss / iterar_promedio son generadores que reportan
+  (hechos, total, resultado parcial) cada vez que se incorpora una tarea,
+  para usarlos con root.after; cerrarlos cancela las tareas pendientes.
+
+Requisitos: numpy, scipy, sympy
+"""
+
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.stats import qmc
+
+from expresiones import compilar_sympy
+
+BLOQUE = 1 << 18       # muestras por bloque (unos pocos MB por array)
+TAREA = 1 << 20        # muestras por tarea (un stream independiente cada una)
+MAX_RESERVORIO = 5000  # puntos que se conservan para tabla y gráfico
+PUNTOS_TRAZA = 200     # puntos de control de la traza de convergencia
+PSEUDOALEATORIO = "Pseudoaleatorio"
+MUESTREOS = (PSEUDOALEATORIO, "Sobol", "Halton")
+REPLICAS_QMC = 10      # réplicas aleatorizadas de cuasi Monte Carlo (para la barra de error)
+SIMPLE, ANTITETICAS, CONTROL, IMPORTANCIA = "Simple", "Antitéticas", "Variable de control", "Importancia"
+ESTIMADORES = (SIMPLE, ANTITETICAS, CONTROL, IMPORTANCIA)
+GRADO_CONTROL = 2      # grado total del polinomio de la variable de control
+PILOTO = 1024          # muestras de la piloto que ajusta la variable de control
+CELDAS_IMPORTANCIA = 4096  # tramos de la FDA tabulada de la densidad de importancia
+
+
+class Acumulador:
+    """Media y varianza en una sola pasada (Welford por bloques, combinación de Chan)."""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0  # suma de cuadrados de las desviaciones
+
+    def agregar(self, valores):
+        valores = np.asarray(valores, dtype=float).ravel()
+        if len(valores):
+            media = valores.mean()
+            self._combinar(len(valores), media, float(((valores - media) ** 2).sum()))
+
+    def combinar(self, otro: "Acumulador"):
+        self._combinar(otro.n, otro.media, otro.m2)
+
+    def _combinar(self, m: int, media: float, m2: float):
+        if m == 0:
+            return
+        n = self.n + m
+        delta = media - self.media
+        self.media += delta * m / n
+        self.m2 += m2 + delta * delta * self.n * m / n
+        self.n = n
+
+    @property
+    def varianza(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def desvio(self) -> float:
+        return float(np.sqrt(self.varianza))
+
+    @property
+    def error_estandar(self) -> float:
+        return self.desvio / np.sqrt(self.n) if self.n else 0.0
+
+
+class Reservorio:
+    """
+    Muestra uniforme de tamaño fijo de un flujo de bloques: cada punto recibe una
+    clave aleatoria y se conservan los de claves más chicas. Guarda columnas con nombre
+    y el índice global de cada punto (datos() los devuelve en el orden en que se generaron).
+    Dos reservorios de tramos distintos se combinan quedándose con las menores claves de ambos.
+    """
+
+    def __init__(self, capacidad: int, rng: Optional[np.random.Generator] = None):
+        self.capacidad = capacidad
+        self.rng = rng
+        self._claves = np.empty(0)
+        self._columnas: Dict[str, np.ndarray] = {}
+
+    def agregar(self, inicio: int, columnas: Dict[str, np.ndarray]):
+        m = len(next(iter(columnas.values())))
+        self._incorporar(self.rng.random(m), dict(columnas, indice=inicio + np.arange(m)))
+
+    def combinar(self, otro: "Reservorio"):
+        if len(otro):
+            self._incorporar(otro._claves, otro._columnas)
+
+    def _incorporar(self, claves: np.ndarray, columnas: Dict[str, np.ndarray]):
+        elegidos = np.arange(len(claves))
+        if len(self._claves) >= self.capacidad:  # lleno: solo compiten las claves menores que la peor guardada
+            elegidos = elegidos[claves < self._claves.max()]
+        if not len(elegidos):
+            return
+        claves = np.concatenate([self._claves, claves[elegidos]])
+        todas = {k: np.concatenate([self._columnas[k], v[elegidos]]) if self._columnas else v[elegidos]
+                 for k, v in columnas.items()}
+        if len(claves) > self.capacidad:
+            quedan = np.argpartition(claves, self.capacidad - 1)[:self.capacidad]
+            claves = claves[quedan]
+            todas = {k: v[quedan] for k, v in todas.items()}
+        self._claves, self._columnas = claves, todas
+
+    def __len__(self) -> int:
+        return len(self._claves)
+
+    def datos(self) -> Dict[str, np.ndarray]:
+        orden = np.argsort(self._columnas["indice"]) if self._columnas else []
+        return {k: v[orden] for k, v in self._columnas.items()}
+
+
+def puntos_logaritmicos(N: int, puntos: int = PUNTOS_TRAZA) -> np.ndarray:
+    """Cantidades de muestras 1..N espaciadas logarítmicamente (sin repetir)."""
+    if N < 1:
+        raise ValueError("N debe ser de al menos una muestra.")
+    return np.unique(np.round(np.logspace(0, np.log10(N), puntos)).astype(np.int64))
+
+
+class TrazaConvergencia:
+    """
+    Media y desvío (ddof=1) de las primeras n muestras, con n en los puntos de control dados.
+    Se llena a medida que avanzan los bloques: hechos indica cuántos puntos ya tienen valor.
+    """
+
+    def __init__(self, n: np.ndarray):
+        self.n = n
+        self.media = np.full(len(n), np.nan)
+        self.m2 = np.full(len(n), np.nan)
+        self.hechos = 0
+
+    @property
+    def desvio(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, np.sqrt(np.maximum(self.m2, 0) / (self.n - 1)), 0.0)
+
+    def _siguientes(self, fin: int) -> int:
+        return self.hechos + int(np.searchsorted(self.n[self.hechos:], fin, side="right"))
+
+    def registrar(self, previo: Acumulador, valores: np.ndarray):
+        """valores: bloque que sigue a las previo.n muestras ya acumuladas (antes de agregarlo a previo)."""
+        nuevos = self._siguientes(previo.n + len(valores))
+        if nuevos == self.hechos:
+            return
+        p = self.n[self.hechos:nuevos] - previo.n  # largo del prefijo del bloque en cada punto de control
+        d = valores[:p[-1]] - valores[0]           # desplazados: las sumas acumuladas no pierden precisión
+        s1, s2 = np.cumsum(d)[p - 1], np.cumsum(d * d)[p - 1]
+        self._combinar_prefijos(previo, nuevos, p, valores[0] + s1 / p, s2 - s1 * s1 / p)
+
+    def combinar(self, previo: Acumulador, otra: "TrazaConvergencia", m: int):
+        """otra: traza local de un tramo de m muestras que sigue a previo (sus n cuentan desde el tramo)."""
+        nuevos = self._siguientes(previo.n + m)
+        if nuevos > self.hechos:
+            local = slice(0, nuevos - self.hechos)
+            self._combinar_prefijos(previo, nuevos, otra.n[local], otra.media[local], otra.m2[local])
+
+    def _combinar_prefijos(self, previo: Acumulador, nuevos: int, p, media, m2):
+        """Chan: prefijos (p, media, m2) del tramo combinados con todo lo anterior."""
+        n = previo.n + p
+        delta = media - previo.media
+        self.media[self.hechos:nuevos] = previo.media + delta * p / n
+        self.m2[self.hechos:nuevos] = previo.m2 + m2 + delta * delta * previo.n * p / n
+        self.hechos = nuevos
+
+
+def _monomios(dimension: int, grado: int):
+    """Exponentes (e_1, ..., e_d) de los monomios de grado total <= grado."""
+    return [e for e in itertools.product(range(grado + 1), repeat=dimension) if sum(e) <= grado]
+
+
+class VariableControl:
+    """
+    Polinomio h(x) = sum_e c_e prod_i z_i^e_i en las coordenadas z_i = (2 x_i - a_i - b_i) / (b_i - a_i),
+    que van de -1 a 1 en la caja (el ajuste queda bien condicionado y E[h] es exacta).
+    """
+
+    def __init__(self, limites: Sequence[Tuple[float, float]], exponentes, coeficientes: np.ndarray):
+        self.limites = list(limites)
+        self.exponentes = np.array(exponentes, dtype=int)
+        self.coeficientes = coeficientes
+
+    def _terminos(self, coordenadas: Sequence[np.ndarray]) -> np.ndarray:
+        z = [(2 * x - a - b) / (b - a) for x, (a, b) in zip(coordenadas, self.limites)]
+        return np.array([np.prod([zi ** k for zi, k in zip(z, e)], axis=0) for e in self.exponentes])
+
+    def __call__(self, coordenadas: Sequence[np.ndarray]) -> np.ndarray:
+        return self.coeficientes @ self._terminos(coordenadas)
+
+    @property
+    def media(self) -> float:
+        """E[h] con x uniforme en la caja: E[z^k] = 1/(k+1) si k es par y 0 si es impar."""
+        momentos = np.where(self.exponentes % 2 == 0, 1.0 / (self.exponentes + 1), 0.0).prod(axis=1)
+        return float(momentos @ self.coeficientes)
+
+
+def ajustar_control(f: Callable, limites: Sequence[Tuple[float, float]], rng: np.random.Generator,
+                    grado: int = GRADO_CONTROL, piloto: int = PILOTO) -> VariableControl:
+    """Variable de control: polinomio de mínimos cuadrados para f en una muestra piloto uniforme."""
+    coordenadas = [a + (b - a) * u for u, (a, b) in zip(rng.random((len(limites), piloto)), limites)]
+    control = VariableControl(limites, _monomios(len(limites), grado), None)
+    control.coeficientes = np.linalg.lstsq(control._terminos(coordenadas).T, _evaluar(f, coordenadas), rcond=None)[0]
+    return control
+
+
+class DensidadImportancia:
+    """
+    Densidad q en [a, b] proporcional a p(x) = expr, constante en cada uno de los tramos (p evaluada
+    en el centro: una singularidad en un extremo no molesta) y normalizada. muestrear invierte su FDA,
+    lineal por tramos, así que q es exactamente la densidad de los puntos que genera.
+    """
+
+    def __init__(self, expr: str, a: float, b: float, variable: str = "x", tramos: int = CELDAS_IMPORTANCIA):
+        self.expr = expr
+        self.bordes = np.linspace(a, b, tramos + 1)
+        self.ancho = (b - a) / tramos
+        centros = self.bordes[:-1] + self.ancho / 2
+        with np.errstate(all="ignore"):
+            p = np.broadcast_to(np.real_if_close(compilar_sympy(expr, (variable,))(centros)), centros.shape)
+        if not np.isrealobj(p) or not np.all(np.isfinite(p) & (p > 0)):
+            raise ValueError(f"La densidad {expr} debe ser real, finita y positiva en todo [{a:g}, {b:g}].")
+        masa = p / p.sum()
+        self.fda = np.concatenate([[0.0], np.cumsum(masa)])
+        self.fda[-1] = 1.0
+        self.valores = masa / self.ancho
+
+    def muestrear(self, u: np.ndarray):
+        """u uniformes en [0, 1) -> (x, q(x))."""
+        i = np.minimum(np.searchsorted(self.fda, u, side="right") - 1, len(self.valores) - 1)
+        x = self.bordes[i] + (u - self.fda[i]) / (self.fda[i + 1] - self.fda[i]) * self.ancho
+        return x, self.valores[i]
+
+
+class _Parcial:
+    """
+    Resultado de una tarea: acumulador, éxitos, reservorio y traza local de su tramo
+    (y, en cuasi Monte Carlo, la traza propia de la réplica en sus puntos de control).
+    """
+
+    def __init__(self, m: int, reservorio: Reservorio, puntos: np.ndarray, puntos_replica: Optional[np.ndarray]):
+        self.m = m
+        self.exitos = self.exitos2 = 0  # en importancia, suma de los pesos de los éxitos y de sus cuadrados
+        self.valores = Acumulador()
+        self.simples = Acumulador()     # f en puntos uniformes (antitéticas y variable de control)
+        self.cuadrados = Acumulador()   # f^2 / (q (b - a)) (importancia): su media es E[f^2] uniforme
+        self.reservorio = reservorio
+        self.traza = TrazaConvergencia(puntos)
+        self.traza_replica = TrazaConvergencia(puntos_replica) if puntos_replica is not None else None
+
+
+class ResultadoMonteCarlo:
+    """
+    Estado de una simulación en la caja limites (un (a, b) por variable):
+    - alturas: (y_min, y_max) del rectángulo del hit-or-miss, o None (método promedio)
+    - n, exitos: muestras hechas y puntos bajo la curva (en importancia, suma de sus pesos)
+    - valores: Acumulador de v, el valor del estimador por muestra (f en el simple)
+    - reservorio: Reservorio con una columna por variable, fx, v y, en hit-or-miss, y y exito
+    - traza: TrazaConvergencia de v
+    - estimador: uno de ESTIMADORES; densidad: expresión de p(x) para importancia
+    - muestreo: PSEUDOALEATORIO, "Sobol" o "Halton"; en cuasi Monte Carlo medias_replicas,
+      exitos_replicas y trazas_replicas guardan lo de cada réplica ya incorporada
+    """
+
+    def __init__(self, expr: str, variables: Sequence[str], limites: Sequence[Tuple[float, float]], N: int,
+                 alturas: Optional[Tuple[float, float]] = None, semilla: Optional[int] = 0,
+                 reservorio: int = MAX_RESERVORIO, puntos_traza: int = PUNTOS_TRAZA,
+                 muestreo: str = PSEUDOALEATORIO, replicas: int = REPLICAS_QMC,
+                 estimador: str = SIMPLE, densidad: Optional[str] = None):
+        if muestreo not in MUESTREOS:
+            raise ValueError(f"Muestreo desconocido: {muestreo}. Disponibles: {', '.join(MUESTREOS)}")
+        if estimador not in ESTIMADORES:
+            raise ValueError(f"Estimador desconocido: {estimador}. Disponibles: {', '.join(ESTIMADORES)}")
+        if estimador == IMPORTANCIA and (len(limites) != 1 or not densidad):
+            raise ValueError("El muestreo por importancia es para una variable y necesita la densidad p(x).")
+        self.expr = expr
+        self.variables = tuple(variables)
+        self.limites = [(float(a), float(b)) for a, b in limites]
+        self.alturas = alturas
+        self.N = N
+        self.semilla = semilla
+        self.exitos = self.exitos2 = 0
+        self.valores = Acumulador()
+        self.simples = Acumulador()
+        self.cuadrados = Acumulador()
+        self.estimador = estimador
+        self.densidad = densidad if estimador == IMPORTANCIA else None
+        self.control: Optional[VariableControl] = None
+        self.importancia: Optional[DensidadImportancia] = None
+        self.reservorio = Reservorio(reservorio)
+        self.traza = TrazaConvergencia(puntos_logaritmicos(N, puntos_traza))
+        self.procesos = 1
+        self.muestreo = muestreo
+        self.replicas = replicas if muestreo != PSEUDOALEATORIO else 0
+        self.puntos_replica: Optional[np.ndarray] = None
+        self.medias_replicas, self.exitos_replicas, self.trazas_replicas = [], [], []
+
+    @property
+    def qmc(self) -> bool:
+        return self.muestreo != PSEUDOALEATORIO
+
+    @property
+    def por_replica(self) -> int:
+        return self.N // self.replicas if self.qmc else self.N
+
+    @property
+    def n(self) -> int:
+        return self.valores.n
+
+    @property
+    def a(self) -> float:
+        return self.limites[0][0]
+
+    @property
+    def b(self) -> float:
+        return self.limites[0][1]
+
+    @property
+    def y_min(self) -> float:
+        return self.alturas[0]
+
+    @property
+    def y_max(self) -> float:
+        return self.alturas[1]
+
+    @property
+    def longitud(self) -> float:
+        """Medida de la caja (largo, área o volumen)."""
+        return float(np.prod([b - a for a, b in self.limites]))
+
+    @property
+    def area_rectangulo(self) -> float:
+        return self.longitud * (self.y_max - self.y_min)
+
+    @property
+    def estimacion_hit_or_miss(self) -> float:
+        return self.exitos / self.n * self.area_rectangulo if self.n else np.nan
+
+    @staticmethod
+    def _error_replicas(estimaciones) -> float:
+        """Error estándar del promedio de las réplicas (hacen falta al menos dos)."""
+        return float(np.std(estimaciones, ddof=1) / np.sqrt(len(estimaciones))) if len(estimaciones) > 1 else np.nan
+
+    @property
+    def estimaciones_hit_or_miss(self) -> np.ndarray:
+        return np.array(self.exitos_replicas) / self.por_replica * self.area_rectangulo
+
+    @property
+    def estimaciones_promedio(self) -> np.ndarray:
+        """Estimación de cada réplica de cuasi Monte Carlo."""
+        return self.longitud * np.array(self.medias_replicas)
+
+    @property
+    def error_hit_or_miss(self) -> float:
+        if self.qmc:
+            return self._error_replicas(self.estimaciones_hit_or_miss)
+        if not self.n:
+            return np.nan
+        p = self.exitos / self.n
+        return self.area_rectangulo * np.sqrt(max(self.exitos2 / self.n - p * p, 0.0) / self.n)
+
+    @property
+    def estimacion_promedio(self) -> float:
+        return self.longitud * self.valores.media if self.n else np.nan
+
+    @property
+    def error_promedio(self) -> float:
+        if self.qmc:
+            return self._error_replicas(self.estimaciones_promedio)
+        return self.longitud * self.valores.error_estandar
+
+    @property
+    def evaluaciones(self) -> int:
+        """Evaluaciones de f (dos por muestra con antitéticas; la piloto de la variable de control no cuenta)."""
+        return self.n * (2 if self.estimador == ANTITETICAS else 1)
+
+    @property
+    def varianza_simple(self) -> float:
+        """Varianza de volumen * f(U), U uniforme en la caja: la de Monte Carlo simple por evaluación."""
+        if self.estimador == SIMPLE:
+            varianza = self.valores.varianza
+        elif self.estimador == IMPORTANCIA:
+            varianza = max(self.cuadrados.media - self.valores.media ** 2, 0.0)
+        else:
+            varianza = self.simples.varianza
+        return self.longitud ** 2 * varianza
+
+    @property
+    def error_promedio_simple(self) -> float:
+        """Error que tendría Monte Carlo simple con la misma cantidad de evaluaciones."""
+        return float(np.sqrt(self.varianza_simple / self.evaluaciones)) if self.n else np.nan
+
+    @property
+    def factor_reduccion(self) -> float:
+        """
+        Varianza de Monte Carlo simple sobre la del estimador, a igual cantidad de evaluaciones:
+        cuántas veces menos evaluaciones necesita para el mismo error (con QMC incluye su ganancia).
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float((self.error_promedio_simple / self.error_promedio) ** 2)
+
+    def traza_replicas(self):
+        """
+        Cuasi Monte Carlo: (evaluaciones, estimación, error) en los puntos de control de las
+        réplicas: promedio entre réplicas de sus medias parciales y su error estándar.
+        """
+        medias = self.longitud * np.array([t.media for t in self.trazas_replicas])
+        error = (np.std(medias, axis=0, ddof=1) / np.sqrt(len(medias)) if len(medias) > 1
+                 else np.full(len(self.puntos_replica), np.nan))
+        return self.puntos_replica * len(medias), medias.mean(axis=0), error
+
+    def _incorporar(self, parcial: _Parcial):
+        """Agrega el tramo que sigue a las n muestras ya incorporadas."""
+        self.traza.combinar(self.valores, parcial.traza, parcial.m)
+        self.valores.combinar(parcial.valores)
+        self.simples.combinar(parcial.simples)
+        self.cuadrados.combinar(parcial.cuadrados)
+        self.exitos += parcial.exitos
+        self.exitos2 += parcial.exitos2
+        self.reservorio.combinar(parcial.reservorio)
+        if self.qmc:
+            self.medias_replicas.append(parcial.valores.media)
+            self.exitos_replicas.append(parcial.exitos)
+            self.trazas_replicas.append(parcial.traza_replica)
+
+
+def _evaluar(f: Callable, coordenadas: Sequence[np.ndarray]) -> np.ndarray:
+    """f sobre el bloque; una f constante devuelve un escalar y se extiende a la forma del bloque."""
+    forma = coordenadas[0].shape
+    return np.nan_to_num(np.broadcast_to(np.asarray(f(*coordenadas), dtype=float), forma))
+
+
+def _puntos_unitarios(muestreo: str, dimension: int, rng: np.random.Generator) -> Callable[[int], np.ndarray]:
+    """k -> array (dimension, k) en [0, 1): pseudoaleatorios o la continuación de una secuencia aleatorizada."""
+    if muestreo == PSEUDOALEATORIO:
+        return lambda k: rng.random((dimension, k))
+    motor = (qmc.Sobol if muestreo == "Sobol" else qmc.Halton)(dimension, scramble=True, seed=rng)
+    return lambda k: motor.random(k).T
+
+
+def _simular_tarea(expr: str, variables: tuple, limites: list, alturas, inicio: int, m: int,
+                   stream: np.random.SeedSequence, bloque: int, capacidad: int, puntos: np.ndarray,
+                   muestreo: str = PSEUDOALEATORIO, puntos_replica: Optional[np.ndarray] = None,
+                   estimador: str = SIMPLE, control: Optional[VariableControl] = None,
+                   importancia: Optional[DensidadImportancia] = None) -> _Parcial:
+    """
+    Tarea de un proceso: m muestras a partir de la número inicio, en bloques, con su propio stream.
+    puntos: puntos de control de la traza que caen en el tramo, contados desde su comienzo.
+    En cuasi Monte Carlo la tarea es una réplica completa y puntos_replica los de su propia traza.
+    control / importancia: ya ajustada / tabulada por _iterar, según el estimador.
+    """
+    f = compilar_sympy(expr, variables)
+    muestras, claves = (np.random.default_rng(s) for s in stream.spawn(2))
+    unitarios = _puntos_unitarios(muestreo, len(limites) + (alturas is not None), muestras)
+    parcial = _Parcial(m, Reservorio(capacidad, claves), puntos, puntos_replica)
+    hechos = 0
+    while hechos < m:
+        k = min(bloque, m - hechos)
+        u = unitarios(k)
+        peso = None
+        if estimador == IMPORTANCIA:
+            x, q = importancia.muestrear(u[0])
+            coordenadas = [x]
+            peso = 1.0 / (q * (limites[0][1] - limites[0][0]))  # q uniforme / q
+        else:
+            coordenadas = [a + (b - a) * u[i] for i, (a, b) in enumerate(limites)]
+        fx = _evaluar(f, coordenadas)
+        if estimador == ANTITETICAS:
+            espejo = _evaluar(f, [a + b - c for c, (a, b) in zip(coordenadas, limites)])
+            v = (fx + espejo) / 2
+            parcial.simples.agregar(np.concatenate([fx, espejo]))
+        elif estimador == CONTROL:
+            v = fx - (control(coordenadas) - control.media)
+            parcial.simples.agregar(fx)
+        elif estimador == IMPORTANCIA:
+            v = fx * peso
+            parcial.cuadrados.agregar(fx * v)
+        else:
+            v = fx
+        columnas = dict(zip(variables, coordenadas), fx=fx, v=v)
+        if parcial.traza_replica is not None:
+            parcial.traza_replica.registrar(parcial.valores, v)
+        if alturas is not None:
+            ys = alturas[0] + (alturas[1] - alturas[0]) * u[-1]
+            exito = ((ys >= 0) & (ys <= fx)) | ((ys <= 0) & (ys >= fx))
+            if peso is None:
+                aciertos = int(np.count_nonzero(exito))
+                parcial.exitos += aciertos
+                parcial.exitos2 += aciertos
+            else:
+                # Con x ~ q cada éxito pesa q uniforme / q: la proporción ponderada sigue siendo insesgada
+                aciertos = np.where(exito, peso, 0.0)
+                parcial.exitos += float(aciertos.sum())
+                parcial.exitos2 += float((aciertos * aciertos).sum())
+            columnas.update(y=ys, exito=exito)
+        parcial.traza.registrar(parcial.valores, v)
+        parcial.valores.agregar(v)
+        parcial.reservorio.agregar(inicio + hechos, columnas)
+        hechos += k
+    parcial.reservorio.rng = None  # el generador ya no hace falta y no viaja de vuelta
+    return parcial
+
+
+def _iterar(res: ResultadoMonteCarlo, procesos: Optional[int], bloque: int, tarea: int):
+    if res.N < 1 or bloque < 1 or tarea < 1:
+        raise ValueError("N, el bloque y la tarea deben ser de al menos una muestra.")
+    if any(not b > a for a, b in res.limites):
+        raise ValueError("Cada intervalo de integración necesita b > a.")
+    f = compilar_sympy(res.expr, res.variables)  # errores de la expresión ahora y no dentro del pool
+    if res.qmc:
+        # Una tarea por réplica; Sobol solo conserva su equilibrio con 2^k puntos
+        if res.replicas < 2:
+            raise ValueError("Cuasi Monte Carlo necesita al menos 2 réplicas para estimar el error.")
+        tarea = res.N // res.replicas
+        if res.muestreo == "Sobol" and tarea:
+            tarea = 1 << (tarea.bit_length() - 1)
+        if tarea < 1:
+            raise ValueError(f"N debe ser al menos {res.replicas} (una muestra por réplica).")
+        res.N = tarea * res.replicas
+        res.traza = TrazaConvergencia(puntos_logaritmicos(res.N, len(res.traza.n)))
+        res.puntos_replica = puntos_logaritmicos(tarea, len(res.traza.n))
+    inicios = list(range(0, res.N, tarea))
+    raiz = np.random.SeedSequence(res.semilla)
+    streams = raiz.spawn(len(inicios))
+    if res.estimador == CONTROL:
+        # La piloto usa un stream propio: la variable de control es independiente de la muestra
+        res.control = ajustar_control(f, res.limites, np.random.default_rng(raiz.spawn(1)[0]))
+    elif res.estimador == IMPORTANCIA:
+        res.importancia = DensidadImportancia(res.densidad, res.a, res.b, res.variables[0])
+    puntos = res.traza.n
+
+    def argumentos(i):
+        inicio = inicios[i]
+        m = min(tarea, res.N - inicio)
+        locales = puntos[(puntos > inicio) & (puntos <= inicio + m)] - inicio
+        return (res.expr, res.variables, res.limites, res.alturas, inicio, m, streams[i],
+                min(bloque, tarea), res.reservorio.capacidad, locales, res.muestreo, res.puntos_replica,
+                res.estimador, res.control, res.importancia)
+
+    procesos = min(procesos or os.cpu_count() or 1, len(inicios))
+    res.procesos = procesos
+    return _avanzar(res, procesos, len(inicios), argumentos)
+
+
+def _avanzar(res, procesos, total_tareas, argumentos):
+    """Generador: tareas en este proceso o en el pool, incorporadas siempre en orden."""
+    if procesos == 1:
+        for i in range(total_tareas):
+            res._incorporar(_simular_tarea(*argumentos(i)))
+            yield res.n, res.N, res
+        return
+
+    pool = ProcessPoolExecutor(max_workers=procesos)
+    try:
+        pendientes, listas = {}, {}
+        siguiente = enviadas = 0
+        while siguiente < total_tareas:
+            # Pocas tareas en vuelo: la memoria no crece con N y cancelar es inmediato
+            while enviadas < total_tareas and len(pendientes) + len(listas) < 2 * procesos:
+                pendientes[pool.submit(_simular_tarea, *argumentos(enviadas))] = enviadas
+                enviadas += 1
+            terminadas, _ = wait(pendientes, timeout=0.05, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                listas[pendientes.pop(futuro)] = futuro.result()
+            avanzo = False
+            while siguiente in listas:
+                res._incorporar(listas.pop(siguiente))
+                siguiente += 1
+                avanzo = True
+            if avanzo or not terminadas:
+                yield res.n, res.N, res
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iterar_hit_or_miss(expr: str, a: float, b: float, N: int, y_min: float, y_max: float,
+                       semilla: Optional[int] = 0, procesos: Optional[int] = None, bloque: int = BLOQUE,
+                       tarea: int = TAREA, reservorio: int = MAX_RESERVORIO, puntos_traza: int = PUNTOS_TRAZA,
+                       muestreo: str = PSEUDOALEATORIO, replicas: int = REPLICAS_QMC,
+                       estimador: str = SIMPLE, densidad: Optional[str] = None):
+    """
+    Hit-or-miss de f(x) = expr en [a, b] x [y_min, y_max]. Valida los datos y devuelve un
+    generador de (hechos, N, ResultadoMonteCarlo); el último tiene hechos == N.
+    procesos=None usa todos los núcleos, 1 trabaja en este proceso (mismo resultado).
+    En cuasi Monte Carlo N se reparte en replicas (Sobol lo redondea a 2^k por réplica).
+    estimador (y densidad, para importancia) elige la reducción de varianza del método promedio
+    que se calcula sobre los mismos puntos.
+    """
+    res = ResultadoMonteCarlo(expr, ("x",), [(a, b)], int(N), (y_min, y_max), semilla, reservorio, puntos_traza,
+                              muestreo, replicas, estimador, densidad)
+    return _iterar(res, procesos, bloque, tarea)
+
+
+def iterar_promedio(expr: str, variables: Sequence[str], limites: Sequence[Tuple[float, float]], N: int,
+                    semilla: Optional[int] = 0, procesos: Optional[int] = None, bloque: int = BLOQUE,
+                    tarea: int = TAREA, reservorio: int = MAX_RESERVORIO, puntos_traza: int = PUNTOS_TRAZA,
+                    muestreo: str = PSEUDOALEATORIO, replicas: int = REPLICAS_QMC,
+                    estimador: str = SIMPLE, densidad: Optional[str] = None):
+    """Método promedio de expr(variables) en la caja limites: volumen * media de v (f en el estimador simple)."""
+    if len(variables) != len(limites):
+        raise ValueError("Se necesita un intervalo por variable.")
+    res = ResultadoMonteCarlo(expr, variables, limites, int(N), None, semilla, reservorio, puntos_traza,
+                              muestreo, replicas, estimador, densidad)
+    return _iterar(res, procesos, bloque, tarea)
+
+
+def _completo(gen) -> ResultadoMonteCarlo:
+    for _, _, res in gen:
+        pass
+    return res
+
+
+def hit_or_miss(expr: str, a: float, b: float, N: int, y_min: float, y_max: float,
+                semilla: Optional[int] = 0, procesos: Optional[int] = None, **opciones) -> ResultadoMonteCarlo:
+    """Simulación completa sin reportes intermedios."""
+    return _completo(iterar_hit_or_miss(expr, a, b, N, y_min, y_max, semilla, procesos, **opciones))
+
+
+def integrar_promedio(expr: str, variables: Sequence[str], limites: Sequence[Tuple[float, float]], N: int,
+                      semilla: Optional[int] = 0, procesos: Optional[int] = None, **opciones) -> ResultadoMonteCarlo:
+    """Integral por el método promedio, sin reportes intermedios."""
+    return _completo(iterar_promedio(expr, variables, limites, N, semilla, procesos, **opciones))
@@ -0,0 +1,1126 @@
+# -*- coding: utf-8 -*-
+"""
+Motor Runge-Kutta explícito definido por tablas de Butcher.
+
+- Cada método es un dato (TablaButcher con los coeficientes a, b, c), no
+  una rama if/elif: Euler, Heun, Midpoint, RK2, Ralston y RK4 vienen
+  registrados y registrar_metodo agrega tablas propias.
+- integrar_rk / integrar_en_malla: un único bucle de pasos para todos los
+  métodos, con arrays de salida preasignados (t, y y opcionalmente las
+  pendientes k de cada paso). El estado y0 puede ser escalar o un vector
+  (sistemas y ecuaciones de orden superior): y queda de forma (n+1, dim).
+- comparar_metodos: todos los métodos de paso fijo en una sola pasada,
+  con una llamada vectorizada a f por etapa para todos juntos.
+- iterar_metodos: la misma pasada como generador de bloques NumPy, para
+  corridas largas que se muestran mientras avanzan; pendientes_en
+  recalcula las k de un rango de pasos a partir de la solución guardada.
+- integrar_multipaso: Adams-Bashforth (AB2-AB4) y el predictor-corrector
+  Adams-Bashforth-Moulton (ABM4), arrancados con RK4. Reutilizan los f de
+  pasos anteriores: 1 o 2 evaluaciones por paso contra 4 de RK4.
+- integrar_implicito: Euler implícito, trapecio y BDF2 para problemas
+  rígidos. Cada paso resuelve la ecuación implícita con Newton usando el
+  jacobiano df/dy (simbólico si se puede, si no por diferencias finitas).
+- integrar_ensamble: muchas condiciones iniciales (n_ci, dim) avanzadas
+  juntas, una llamada a f por etapa para todo el ensamble.
+- integrar_adaptativo: paso variable con un par embebido (Dormand-Prince
+  5(4)); el error local estimado se controla con rtol/atol, los pasos que
+  no cumplen se rechazan y se reportan aceptados, rechazados y evaluaciones.
+- SalidaDensa: y(t) en cualquier t a partir de una solución de paso grueso
+  (extensión continua de RK4, interpolante de Dormand-Prince o cúbica de
+  Hermite para el resto), para graficar fino sin volver a integrar.
+- Eventos: funciones g(t, y) cuyos cruces por cero se ubican dentro del
+  paso con la salida densa (buscar_eventos); integrar_con_eventos y
+  integrar_adaptativo pueden detenerse en un evento terminal.
+- El motor no conoce Tk: la interfaz lee sus variables una vez y le pasa
+  números y una f(t, y) ya compilada.
+
+Requisitos: numpy (sympy, opcional, para el jacobiano simbólico)
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def a_forma(valor, forma) -> np.ndarray:
+    """Resultado de f con la forma del estado (f constante devuelve un escalar)."""
+    valor = np.asarray(valor, dtype=float)
+    return valor if valor.shape == forma else np.broadcast_to(valor, forma)
+
+
+class TablaButcher:
+    """
+    Coeficientes de un método RK explícito de s etapas:
+        k_i = f(t + c_i h, y + h * sum_j a_ij k_j)   (j < i)
+        y_{n+1} = y_n + h * sum_i b_i k_i
+    """
+
+    def __init__(self, nombre: str, a: Sequence[Sequence[float]], b: Sequence[float],
+                 c: Sequence[float], orden: int, descripcion: str = ""):
+        self.nombre = nombre
+        self.a = np.array(a, dtype=float)
+        self.b = np.array(b, dtype=float)
+        self.c = np.array(c, dtype=float)
+        self.orden = orden
+        self.descripcion = descripcion
+        s = len(self.b)
+        if self.a.shape != (s, s) or self.c.shape != (s,):
+            raise ValueError(f"Tabla '{nombre}': a debe ser {s}x{s} y c de largo {s}.")
+        if np.any(np.triu(self.a) != 0):
+            raise ValueError(f"Tabla '{nombre}': a debe ser estrictamente triangular inferior (método explícito).")
+        if not np.isclose(self.b.sum(), 1.0):
+            raise ValueError(f"Tabla '{nombre}': los pesos b deben sumar 1 (consistencia).")
+
+    @property
+    def etapas(self) -> int:
+        return len(self.b)
+
+    def __repr__(self):
+        return f"TablaButcher({self.nombre!r}, etapas={self.etapas}, orden={self.orden})"
+
+
+class TablaEmbebida(TablaButcher):
+    """
+    Par embebido: b da la solución de orden 'orden' y b_gorro una de orden
+    'orden_embebido' con las mismas etapas; su diferencia estima el error local.
+    fsal: la última etapa se evalúa en (t+h, y_{n+1}) y sirve de k1 del paso siguiente.
+    """
+
+    def __init__(self, nombre: str, a, b, b_gorro, c, orden: int, orden_embebido: int,
+                 fsal: bool = False, descripcion: str = ""):
+        super().__init__(nombre, a, b, c, orden, descripcion)
+        self.b_gorro = np.array(b_gorro, dtype=float)
+        self.orden_embebido = orden_embebido
+        self.fsal = fsal
+        if self.b_gorro.shape != self.b.shape or not np.isclose(self.b_gorro.sum(), 1.0):
+            raise ValueError(f"Tabla '{nombre}': b_gorro debe tener {self.etapas} pesos que sumen 1.")
+        if fsal and not (np.allclose(self.a[-1], self.b) and self.c[-1] == 1):
+            raise ValueError(f"Tabla '{nombre}': FSAL requiere que la última fila de a sea b y c = 1.")
+
+
+class MetodoMultipaso:
+    """
+    Método lineal multipaso de Adams con paso fijo:
+        predictor (AB):  y_{n+1} = y_n + h * sum_j beta_j f_{n-j}
+        corrector (AM, opcional, PECE):
+                         y_{n+1} = y_n + h * (beta*_0 f(t_{n+1}, y_pred) + sum_j beta*_{j+1} f_{n-j})
+    Los primeros pasos (los que no tienen suficiente historia) se dan con RK4.
+    """
+
+    def __init__(self, nombre: str, beta: Sequence[float], orden: int,
+                 beta_corrector: Optional[Sequence[float]] = None, descripcion: str = ""):
+        self.nombre = nombre
+        self.beta = np.array(beta, dtype=float)
+        self.beta_corrector = None if beta_corrector is None else np.array(beta_corrector, dtype=float)
+        self.orden = orden
+        self.descripcion = descripcion
+        if not np.isclose(self.beta.sum(), 1.0):
+            raise ValueError(f"Método '{nombre}': los coeficientes beta deben sumar 1 (consistencia).")
+        if self.beta_corrector is not None:
+            if not np.isclose(self.beta_corrector.sum(), 1.0):
+                raise ValueError(f"Método '{nombre}': los coeficientes del corrector deben sumar 1.")
+            if len(self.beta_corrector) - 1 > len(self.beta):
+                raise ValueError(f"Método '{nombre}': el corrector no puede usar más historia que el predictor.")
+
+    @property
+    def pasos_previos(self) -> int:
+        """Cantidad de valores f_n, f_{n-1}, ... que necesita cada paso."""
+        return len(self.beta)
+
+    @property
+    def evaluaciones_por_paso(self) -> int:
+        return 1 if self.beta_corrector is None else 2
+
+    def __repr__(self):
+        return f"MetodoMultipaso({self.nombre!r}, pasos={self.pasos_previos}, orden={self.orden})"
+
+
+METODOS: Dict[str, TablaButcher] = {}
+METODOS_ADAPTATIVOS: Dict[str, TablaEmbebida] = {}
+METODOS_MULTIPASO: Dict[str, MetodoMultipaso] = {}
+
+
+def registrar_metodo(tabla) -> object:
+    """Agrega (o reemplaza) un método; queda disponible para el integrador que le corresponde y las interfaces."""
+    if isinstance(tabla, TablaEmbebida):
+        registro = METODOS_ADAPTATIVOS
+    elif isinstance(tabla, MetodoMultipaso):
+        registro = METODOS_MULTIPASO
+    else:
+        registro = METODOS
+    registro[tabla.nombre] = tabla
+    return tabla
+
+
+def obtener_metodo(metodo) -> TablaButcher:
+    if isinstance(metodo, TablaButcher):
+        return metodo
+    try:
+        return METODOS[metodo]
+    except KeyError:
+        raise ValueError(f"Método desconocido: {metodo}. Disponibles: {', '.join(METODOS)}") from None
+
+
+def obtener_metodo_adaptativo(metodo) -> TablaEmbebida:
+    if isinstance(metodo, TablaEmbebida):
+        return metodo
+    try:
+        return METODOS_ADAPTATIVOS[metodo]
+    except KeyError:
+        raise ValueError(f"Método adaptativo desconocido: {metodo}. "
+                         f"Disponibles: {', '.join(METODOS_ADAPTATIVOS)}") from None
+
+
+def obtener_metodo_multipaso(metodo) -> MetodoMultipaso:
+    if isinstance(metodo, MetodoMultipaso):
+        return metodo
+    try:
+        return METODOS_MULTIPASO[metodo]
+    except KeyError:
+        raise ValueError(f"Método multipaso desconocido: {metodo}. "
+                         f"Disponibles: {', '.join(METODOS_MULTIPASO)}") from None
+
+
+def nombres_metodos() -> List[str]:
+    """Métodos de paso fijo, Runge-Kutta y multipaso (todos comparten la grilla t0 + n*h)."""
+    return list(METODOS) + list(METODOS_MULTIPASO)
+
+
+def es_multipaso(metodo) -> bool:
+    return isinstance(metodo, MetodoMultipaso) or metodo in METODOS_MULTIPASO
+
+
+def nombres_adaptativos() -> List[str]:
+    return list(METODOS_ADAPTATIVOS)
+
+
+def es_adaptativo(metodo) -> bool:
+    return isinstance(metodo, TablaEmbebida) or metodo in METODOS_ADAPTATIVOS
+
+
+registrar_metodo(TablaButcher("Euler", [[0]], [1], [0], 1,
+                              "y_{n+1} = y_n + h*f(t_n,y_n)"))
+registrar_metodo(TablaButcher("Heun", [[0, 0], [1, 0]], [1/2, 1/2], [0, 1], 2,
+                              "Predictor-Corrector: y_{n+1} = y_n + h*(k1+k2)/2"))
+registrar_metodo(TablaButcher("Midpoint", [[0, 0], [1/2, 0]], [0, 1], [0, 1/2], 2,
+                              "y_{n+1} = y_n + h*f(t_n + h/2, y_n + h*k1/2)"))
+registrar_metodo(TablaButcher("RK2", [[0, 0], [1/2, 0]], [0, 1], [0, 1/2], 2,
+                              "y_{n+1} = y_n + h*k2"))
+registrar_metodo(TablaButcher("Ralston", [[0, 0], [3/4, 0]], [1/3, 2/3], [0, 3/4], 2,
+                              "y_{n+1} = y_n + h*(k1/3 + 2*k2/3), k2 en t_n + 3h/4"))
+registrar_metodo(TablaButcher("RK4",
+                              [[0, 0, 0, 0], [1/2, 0, 0, 0], [0, 1/2, 0, 0], [0, 0, 1, 0]],
+                              [1/6, 1/3, 1/3, 1/6], [0, 1/2, 1/2, 1], 4,
+                              "y_{n+1} = y_n + h*(k1+2k2+2k3+k4)/6"))
+registrar_metodo(TablaEmbebida(
+    "DOPRI54",
+    [[0, 0, 0, 0, 0, 0, 0],
+     [1/5, 0, 0, 0, 0, 0, 0],
+     [3/40, 9/40, 0, 0, 0, 0, 0],
+     [44/45, -56/15, 32/9, 0, 0, 0, 0],
+     [19372/6561, -25360/2187, 64448/6561, -212/729, 0, 0, 0],
+     [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656, 0, 0],
+     [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0]],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0],
+    [5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40],
+    [0, 1/5, 3/10, 4/5, 8/9, 1, 1], 5, 4, fsal=True,
+    descripcion="Dormand-Prince 5(4) adaptativo: avanza con orden 5, estima el error con el de orden 4"))
+registrar_metodo(MetodoMultipaso("AB2", [3/2, -1/2], 2,
+                                 descripcion="y_{n+1} = y_n + h*(3f_n - f_{n-1})/2"))
+registrar_metodo(MetodoMultipaso("AB3", [23/12, -16/12, 5/12], 3,
+                                 descripcion="y_{n+1} = y_n + h*(23f_n - 16f_{n-1} + 5f_{n-2})/12"))
+registrar_metodo(MetodoMultipaso("AB4", [55/24, -59/24, 37/24, -9/24], 4,
+                                 descripcion="y_{n+1} = y_n + h*(55f_n - 59f_{n-1} + 37f_{n-2} - 9f_{n-3})/24"))
+registrar_metodo(MetodoMultipaso("ABM4", [55/24, -59/24, 37/24, -9/24], 4,
+                                 beta_corrector=[9/24, 19/24, -5/24, 1/24],
+                                 descripcion="Predictor AB4 + corrector Adams-Moulton: "
+                                             "y_{n+1} = y_n + h*(9f*_{n+1} + 19f_n - 5f_{n-1} + f_{n-2})/24"))
+
+
+class ResultadoRK:
+    """
+    Salida de una integración.
+    - t: (n+1,)   y: (n+1,) + forma del estado
+    - pendientes: (n, etapas) + forma del estado, o None si no se pidieron
+    - evaluaciones: cantidad de llamadas a f
+    - eventos / evento_terminal: cruces de g(t, y) = 0 si se pidieron eventos
+    """
+
+    def __init__(self, metodo: str, t: np.ndarray, y: np.ndarray,
+                 pendientes: Optional[np.ndarray], evaluaciones: int):
+        self.metodo = metodo
+        self.t = t
+        self.y = y
+        self.pendientes = pendientes
+        self.evaluaciones = evaluaciones
+        self.eventos: List = []  # Cruce encontrados (integrar_con_eventos, integrar_adaptativo)
+        self.evento_terminal = None
+
+    @property
+    def pasos(self) -> int:
+        return len(self.t) - 1
+
+    @property
+    def evaluaciones_por_paso(self) -> float:
+        return self.evaluaciones / self.pasos if self.pasos else 0.0
+
+
+def integrar_rk(f: Callable, t0: float, y0, t_end: float, h: float, metodo="RK4",
+                guardar_pendientes: bool = False) -> ResultadoRK:
+    """
+    Integra y' = f(t, y) con paso fijo h desde t0 hasta t_end usando la tabla de Butcher de metodo.
+    La cantidad de pasos es int((t_end - t0)/h), igual que en las tablas de la interfaz.
+    """
+    if h <= 0:
+        raise ValueError("El paso h debe ser positivo.")
+    n_steps = int((t_end - t0) / h)
+    return integrar_en_malla(f, t0 + h * np.arange(n_steps + 1), y0, metodo, guardar_pendientes)
+
+
+def integrar_en_malla(f: Callable, t, y0, metodo="RK4",
+                      guardar_pendientes: bool = False) -> ResultadoRK:
+    """
+    Integra y' = f(t, y) sobre una malla de tiempos dada (t[0] es el instante inicial);
+    cada paso usa h = t[n+1] - t[n].
+    - y0 escalar -> y de forma (n+1,); y0 de dimensión dim -> y de forma (n+1, dim)
+    - f recibe el estado con la forma de y0 y devuelve la derivada con esa misma forma
+    """
+    tabla = obtener_metodo(metodo)
+    t = np.asarray(t, dtype=float)
+    n_steps = len(t) - 1
+    y0 = np.asarray(y0, dtype=float)
+    forma, m, s = y0.shape, y0.size, tabla.etapas
+    b = tabla.b
+
+    # Arrays de salida preasignados; internamente el estado se maneja aplanado (m componentes)
+    # y cada paso escribe su fila en el lugar, sin bucles por componente
+    y = np.empty((n_steps + 1, m))
+    y[0] = y0.reshape(-1)
+    K = np.empty((s, m))
+    pend = np.empty((n_steps, s, m)) if guardar_pendientes else None
+
+    for n in range(n_steps):
+        tn, yn, h = t[n], y[n], t[n + 1] - t[n]
+        _etapas_rk(f, tn, yn, h, tabla, K, forma)
+        np.matmul(b, K, out=y[n + 1])
+        y[n + 1] *= h
+        y[n + 1] += yn
+        if pend is not None:
+            pend[n] = K
+
+    y = y.reshape((n_steps + 1,) + forma)
+    if pend is not None:
+        pend = pend.reshape((n_steps, s) + forma)
+    return ResultadoRK(tabla.nombre, t, y, pend, n_steps * s)
+
+
+def _etapas_rk(f, tn, yn, h, tabla, K, forma):
+    """Llena K (etapas, m) con las pendientes de un paso RK desde (tn, yn) aplanado."""
+    a, c = tabla.a, tabla.c
+    for i in range(tabla.etapas):
+        yi = yn + h * (a[i, :i] @ K[:i]) if i else yn
+        K[i] = a_forma(f(tn + c[i] * h, yi.reshape(forma)), forma).reshape(-1)
+
+
+def _filas_rk(f, t, y0, metodo):
+    """Genera y_0, y_1, ... (aplanadas) de un método RK sobre la malla t, de a un paso."""
+    tabla = obtener_metodo(metodo)
+    forma = y0.shape
+    K = np.empty((tabla.etapas, y0.size))
+    yn = y0.reshape(-1).copy()
+    yield yn
+    for n in range(len(t) - 1):
+        h = t[n + 1] - t[n]
+        _etapas_rk(f, t[n], yn, h, tabla, K, forma)
+        yn = yn + h * (tabla.b @ K)
+        yield yn
+
+
+BLOQUE = 2048  # filas por bloque en las versiones iterables
+
+
+def pasos_grilla(t0: float, t_end: float, h: float) -> int:
+    """Cantidad de pasos de tamaño h de t0 a t_end, int((t_end - t0)/h) como en las tablas de la interfaz."""
+    if h <= 0:
+        raise ValueError("El paso h debe ser positivo.")
+    return int((t_end - t0) / h)
+
+
+def _bloques(n_filas: int, bloque: int):
+    for inicio in range(0, n_filas, bloque):
+        yield inicio, min(inicio + bloque, n_filas)
+
+
+def _iterar_tablas(f, t0, y0, h, n_steps, tablas, bloque):
+    """
+    Genera (inicio, {nombre: y[inicio:fin]}) para varias tablas RK a la vez.
+    - Tablas iguales (p.ej. Midpoint y RK2) se calculan una sola vez.
+    - La etapa i de todos los métodos que la tienen es una única llamada
+      vectorizada a f (los estados de cada método se apilan en un eje extra).
+    """
+    forma, m = y0.shape, y0.size
+    unicas, indice = [], {}
+    for tabla in tablas:
+        clave = (tabla.a.tobytes(), tabla.b.tobytes(), tabla.c.tobytes())
+        if clave not in indice:
+            indice[clave] = len(unicas)
+            unicas.append(tabla)
+        indice[tabla.nombre] = indice[clave]
+    u, S = len(unicas), max(tabla.etapas for tabla in unicas)
+    A, B, C = np.zeros((u, S, S)), np.zeros((u, S)), np.zeros((u, S))
+    etapas = np.array([tabla.etapas for tabla in unicas])
+    for j, tabla in enumerate(unicas):
+        s = tabla.etapas
+        A[j, :s, :s], B[j, :s], C[j, :s] = tabla.a, tabla.b, tabla.c
+    forma_t = (-1,) + (1,) * len(forma)
+    # Por etapa: métodos que la tienen, sus coeficientes a_ij (ya multiplicados por h) y c_i h
+    etapa = []
+    for i in range(S):
+        act = np.flatnonzero(etapas > i)
+        todos = len(act) == u
+        etapa.append((slice(None) if todos else act, len(act), (h * A[act, i, :i])[:, :, None],
+                      (C[act, i] * h).reshape(forma_t), (len(act),) + forma))
+    hB = (h * B)[:, :, None]
+
+    K = np.zeros((u, S, m))
+    yn = np.broadcast_to(y0.reshape(-1), (u, m)).copy()
+    for inicio, fin in _bloques(n_steps + 1, bloque):
+        y = np.empty((fin - inicio, u, m))
+        for fila in range(inicio, fin):
+            if fila:
+                tn = t0 + h * (fila - 1)
+                for i, (act, n_act, hA, cH, forma_act) in enumerate(etapa):
+                    yi = yn[act] + (hA * K[act, :i]).sum(axis=1) if i else yn[act]
+                    K[act, i] = a_forma(f(tn + cH, yi.reshape(forma_act)), forma_act).reshape(n_act, m)
+                yn = yn + (hB * K).sum(axis=1)
+            y[fila - inicio] = yn
+        yield inicio, {tabla.nombre: y[:, indice[tabla.nombre]].reshape((fin - inicio,) + forma)
+                       for tabla in tablas}
+
+
+def _filas_adams(f, t0, y0, h, n_steps, metodo):
+    """Genera y_0, ..., y_{n_steps} (aplanadas) de un método de Adams; guarda solo los últimos f de la historia."""
+    forma, m = y0.shape, y0.size
+    beta, corrector, k = metodo.beta, metodo.beta_corrector, metodo.pasos_previos
+
+    def evaluar(tn, yn):
+        return a_forma(f(tn, yn.reshape(forma)), forma).reshape(-1)
+
+    # Arranque con RK4: sus k1 son f_0, ..., f_{k-2}
+    arranque = min(k - 1, n_steps)
+    inicio_rk4 = integrar_en_malla(f, t0 + h * np.arange(arranque + 1), y0, "RK4", guardar_pendientes=True)
+    y_arranque = inicio_rk4.y.reshape(arranque + 1, m)
+    historia = np.empty((k, m))  # historia[0] = f_n, historia[1] = f_{n-1}, ...
+    historia[1:arranque + 1] = inicio_rk4.pendientes[::-1, 0].reshape(arranque, m)
+    yield from y_arranque
+    yn = y_arranque[-1].copy()
+
+    for fila in range(arranque + 1, n_steps + 1):
+        n = fila - 1
+        historia[0] = evaluar(t0 + h * n, yn)
+        y_nuevo = yn + h * (beta @ historia)
+        if corrector is not None:
+            f_pred = evaluar(t0 + h * fila, y_nuevo)
+            y_nuevo = yn + h * (corrector[0] * f_pred + corrector[1:] @ historia[:len(corrector) - 1])
+        historia[1:] = historia[:-1].copy()
+        yn = y_nuevo
+        yield yn
+
+
+def _iterar_adams(f, t0, y0, h, n_steps, metodo, bloque):
+    """Genera (inicio, y[inicio:fin]) de un método de Adams, de a bloques de filas."""
+    forma, m = y0.shape, y0.size
+    filas = _filas_adams(f, t0, y0, h, n_steps, metodo)
+    for inicio, fin in _bloques(n_steps + 1, bloque):
+        y = np.empty((fin - inicio, m))
+        for i in range(fin - inicio):
+            y[i] = next(filas)
+        yield inicio, y.reshape((fin - inicio,) + forma)
+
+
+def evaluaciones_metodo(metodo, n_steps: int) -> int:
+    """Llamadas a f que hace un método de paso fijo en n_steps pasos (incluido el arranque de los multipaso)."""
+    if es_multipaso(metodo):
+        metodo = obtener_metodo_multipaso(metodo)
+        arranque = min(metodo.pasos_previos - 1, n_steps)
+        return 4 * arranque + (n_steps - arranque) * metodo.evaluaciones_por_paso
+    return n_steps * obtener_metodo(metodo).etapas
+
+
+def iterar_metodos(f: Callable, t0: float, y0, t_end: float, h: float,
+                   metodos: Optional[Sequence] = None, bloque: int = BLOQUE):
+    """
+    Versión iterable de comparar_metodos: genera (inicio, t_bloque, {nombre: y_bloque})
+    con las filas [inicio, inicio + len(t_bloque)) de la grilla t0 + n*h, de a 'bloque'
+    filas. Solo guarda el estado actual, así que sirve para corridas muy largas que
+    se van mostrando (o escribiendo) a medida que avanzan.
+    f debe aceptar arrays y hacer broadcast (las funciones de compilar_sympy lo hacen).
+    """
+    metodos = [getattr(m, "nombre", m) for m in (nombres_metodos() if metodos is None else metodos)]
+    n_steps = pasos_grilla(t0, t_end, h)
+    y0 = np.asarray(y0, dtype=float)
+    tablas = [obtener_metodo(m) for m in metodos if not es_multipaso(m)]
+    fuentes = [_iterar_adams(f, t0, y0, h, n_steps, obtener_metodo_multipaso(m), bloque)
+               for m in metodos if es_multipaso(m)]
+    if tablas:
+        fuentes.append(_iterar_tablas(f, t0, y0, h, n_steps, tablas, bloque))
+    nombres_adams = [m for m in metodos if es_multipaso(m)]
+
+    for partes in zip(*fuentes):
+        inicio = partes[0][0]
+        ys = dict(zip(nombres_adams, (y for _, y in partes[:len(nombres_adams)])))
+        if tablas:
+            ys.update(partes[-1][1])
+        n_filas = len(next(iter(ys.values())))
+        yield inicio, t0 + h * np.arange(inicio, inicio + n_filas), {m: ys[m] for m in metodos}
+
+
+def _f_en_puntos(f: Callable, t: np.ndarray, y: np.ndarray, forma: Optional[tuple] = None) -> np.ndarray:
+    """
+    f en los puntos (t_i, y_i); cada valor tiene la forma dada (por defecto la del estado,
+    () para una función de evento g). Con estado escalar se prueba
+    una sola llamada vectorizada; con estado vectorial (una f escrita como np.array([Y[1], -Y[0]])
+    no admite un lote de estados) o si f no acepta arrays (p.ej. usa 'if y != 0'), punto por punto.
+    """
+    forma = y.shape[1:] if forma is None else forma
+    if y.ndim == 1:
+        try:
+            valor = np.asarray(f(t, y), dtype=float)
+            if valor.shape in ((), t.shape):
+                return np.broadcast_to(valor, t.shape)
+        except (TypeError, ValueError):
+            pass
+    return np.array([a_forma(f(ti, yi), forma) for ti, yi in zip(t, y)]).reshape((len(t),) + forma)
+
+
+def _pendientes_pasos(f: Callable, t: np.ndarray, y: np.ndarray, tabla: TablaButcher,
+                      idx: np.ndarray) -> np.ndarray:
+    """Pendientes k de los pasos idx (array de índices) recalculadas desde (t_n, y_n), etapa por etapa."""
+    forma = y.shape[1:]
+    tn, yn = t[idx], y[idx]
+    h = t[idx + 1] - tn
+    hh = h.reshape((-1,) + (1,) * len(forma))
+    K = np.empty((len(idx), tabla.etapas) + forma)
+    for i in range(tabla.etapas):
+        yi = yn + hh * np.einsum("j,nj...->n...", tabla.a[i, :i], K[:, :i]) if i else yn
+        K[:, i] = _f_en_puntos(f, tn + tabla.c[i] * h, yi)
+    return K
+
+
+def pendientes_en(f: Callable, t, y, metodo="RK4", inicio: int = 0, fin: Optional[int] = None) -> np.ndarray:
+    """
+    Recalcula las pendientes k de los pasos [inicio, fin) a partir de la solución ya guardada
+    (t, y): k solo depende de (t_n, y_n), así que las tablas detalladas pueden pedir solo
+    las filas visibles en vez de guardar (pasos x etapas) valores. Vectorizado sobre los pasos.
+    Devuelve un array (fin - inicio, etapas) + forma del estado.
+    """
+    tabla = obtener_metodo(metodo)
+    t, y = np.asarray(t, dtype=float), np.asarray(y, dtype=float)
+    fin = len(t) - 1 if fin is None else min(fin, len(t) - 1)
+    return _pendientes_pasos(f, t, y, tabla, np.arange(inicio, max(fin, inicio)))
+
+
+def comparar_metodos(f: Callable, t0: float, y0, t_end: float, h: float,
+                     metodos: Optional[Sequence] = None,
+                     guardar_pendientes: bool = False) -> Dict[str, ResultadoRK]:
+    """
+    Integra varios métodos de paso fijo en una sola pasada sobre la misma malla
+    (ver iterar_metodos): tablas repetidas se calculan una vez y cada etapa es una
+    única llamada vectorizada a f para todos los métodos.
+    Devuelve {nombre: ResultadoRK} en el orden pedido; evaluaciones es lo que costaría
+    el método solo. Las pendientes (si se piden) se recalculan al final con pendientes_en.
+    """
+    metodos = [getattr(m, "nombre", m) for m in (nombres_metodos() if metodos is None else metodos)]
+    n_steps = pasos_grilla(t0, t_end, h)
+    forma = np.shape(y0)
+    t = t0 + h * np.arange(n_steps + 1)
+    ys = {m: np.empty((n_steps + 1,) + forma) for m in metodos}
+    for inicio, t_bloque, bloque in iterar_metodos(f, t0, y0, t_end, h, metodos):
+        for m in metodos:
+            ys[m][inicio:inicio + len(t_bloque)] = bloque[m]
+    resultados = {}
+    for m in metodos:
+        pend = pendientes_en(f, t, ys[m], m) if guardar_pendientes and not es_multipaso(m) else None
+        resultados[m] = ResultadoRK(m, t, ys[m], pend, evaluaciones_metodo(m, n_steps))
+    return resultados
+
+
+def integrar_multipaso(f: Callable, t0: float, y0, t_end: float, h: float,
+                       metodo="ABM4") -> ResultadoRK:
+    """
+    Integra con un método de Adams de paso fijo sobre la misma grilla que integrar_rk.
+    Los primeros pasos_previos-1 pasos se dan con RK4 (sus k1 ya son los f_n de la
+    historia); después cada paso cuesta 1 evaluación (AB) o 2 (ABM, PECE).
+    evaluaciones cuenta todas las llamadas a f, incluido el arranque.
+    """
+    metodo = obtener_metodo_multipaso(metodo)
+    n_steps = pasos_grilla(t0, t_end, h)
+    y0 = np.asarray(y0, dtype=float)
+    y = np.empty((n_steps + 1,) + y0.shape)
+    for inicio, bloque in _iterar_adams(f, t0, y0, h, n_steps, metodo, BLOQUE):
+        y[inicio:inicio + len(bloque)] = bloque
+    return ResultadoRK(metodo.nombre, t0 + h * np.arange(n_steps + 1), y, None,
+                       evaluaciones_metodo(metodo, n_steps))
+
+
+def integrar_ensamble(f: Callable, t, Y0, metodo="RK4") -> ResultadoRK:
+    """
+    Integra muchas condiciones iniciales a la vez: Y0 es una matriz (n_ci, dim) y f(t, Y)
+    debe operar por filas (p.ej. Y @ A.T para X' = A X). Cada etapa es una sola llamada
+    a f para todo el ensamble. y queda de forma (n+1, n_ci, dim): y[:, i] es la trayectoria i.
+    """
+    Y0 = np.asarray(Y0, dtype=float)
+    if Y0.ndim != 2:
+        raise ValueError("Y0 debe ser una matriz (condiciones iniciales, dimensión).")
+    return integrar_en_malla(f, t, Y0, metodo)
+
+
+class ResultadoAdaptativo(ResultadoRK):
+    """
+    ResultadoRK de paso variable; t e y contienen solo los pasos aceptados.
+    - h: (n,) tamaño de cada paso aceptado (si un evento terminal cortó el último paso,
+      t[-1] es el instante del evento y h[-1] sigue siendo el paso completo)
+    - aceptados / rechazados: estadísticas del control de paso
+    """
+
+    def __init__(self, metodo: str, t, y, pendientes, evaluaciones: int,
+                 h: np.ndarray, rechazados: int):
+        super().__init__(metodo, t, y, pendientes, evaluaciones)
+        self.h = h
+        self.rechazados = rechazados
+
+    @property
+    def aceptados(self) -> int:
+        return self.pasos
+
+    def resumen(self) -> str:
+        if not len(self.h):
+            return f"{self.metodo}: sin pasos"
+        return (f"{self.metodo}: {self.aceptados} pasos aceptados, {self.rechazados} rechazados, "
+                f"{self.evaluaciones} evaluaciones de f, h en [{self.h.min():.3g}, {self.h.max():.3g}]")
+
+
+def _norma_error(err: np.ndarray, escala: np.ndarray) -> float:
+    """Norma RMS del error escalado por atol + rtol*|y| (1 = justo en la tolerancia)."""
+    return float(np.sqrt(np.mean((err / escala) ** 2))) if err.size else 0.0
+
+
+def _paso_inicial(f, t0, y0, forma, k1, orden, rtol, atol, t_end):
+    """Estimación de h0 de Hairer-Wanner: una evaluación extra de f."""
+    escala = atol + rtol * np.abs(y0)
+    d0, d1 = _norma_error(y0, escala), _norma_error(k1, escala)
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    h0 = min(h0, abs(t_end - t0))
+    k2 = a_forma(f(t0 + h0, (y0 + h0 * k1).reshape(forma)), forma).reshape(-1)
+    d2 = _norma_error(k2 - k1, escala) / h0
+    if max(d1, d2) <= 1e-15:
+        h1 = max(1e-6, h0 * 1e-3)
+    else:
+        h1 = (0.01 / max(d1, d2)) ** (1.0 / (orden + 1))
+    return min(100 * h0, h1, abs(t_end - t0))
+
+
+def integrar_adaptativo(f: Callable, t0: float, y0, t_end: float, metodo="DOPRI54",
+                        rtol: float = 1e-6, atol: float = 1e-9, h0: Optional[float] = None,
+                        h_max: float = np.inf, max_pasos: int = 100000,
+                        guardar_pendientes: bool = False, eventos=None) -> ResultadoAdaptativo:
+    """
+    Integra y' = f(t, y) desde t0 hasta t_end con paso variable.
+    Un paso se acepta si ||y5 - y4|| <= atol + rtol*|y| (norma RMS); si no, se repite
+    con un h menor. El siguiente h sale de 0.9*(1/err)^(1/(q+1)), acotado a [0.2, 5]
+    veces el anterior (q = orden embebido). Termina exactamente en t_end.
+    eventos: Evento o funciones g(t, y); cada paso aceptado se revisa con la salida densa
+    de ese paso y un evento terminal detiene la integración en el cruce.
+    """
+    tabla = obtener_metodo_adaptativo(metodo)
+    if rtol <= 0 or atol < 0:
+        raise ValueError("rtol debe ser positivo y atol no negativo.")
+    if t_end <= t0:
+        raise ValueError("t_end debe ser mayor que t0.")
+    y0 = np.asarray(y0, dtype=float)
+    forma, m, s = y0.shape, y0.size, tabla.etapas
+    a, b, c = tabla.a, tabla.b, tabla.c
+    e = tabla.b - tabla.b_gorro
+    q = min(tabla.orden, tabla.orden_embebido)
+    SEGURIDAD, FAC_MIN, FAC_MAX = 0.9, 0.2, 5.0
+
+    def evaluar(t, y):
+        return a_forma(f(t, y.reshape(forma)), forma).reshape(-1)
+
+    yn = y0.reshape(-1).copy()
+    tn = float(t0)
+    K = np.empty((s, m))
+    K[0] = evaluar(tn, yn)
+    evaluaciones = 1
+    if h0 is None:
+        h = _paso_inicial(f, tn, yn, forma, K[0], q, rtol, atol, t_end)
+        evaluaciones += 1
+    else:
+        h = float(h0)
+    h = min(h, h_max)
+
+    ts, ys, hs, pend = [tn], [yn.copy()], [], []
+    rechazados = 0
+    eventos = _como_eventos(eventos)
+    cruces, terminal = [], None
+    h_min = 16 * np.finfo(float).eps * max(abs(t0), abs(t_end), 1.0)
+
+    while tn < t_end:
+        if len(hs) >= max_pasos:
+            raise RuntimeError(f"Se alcanzó el máximo de {max_pasos} pasos en t = {tn:.6g}.")
+        ultimo = tn + h >= t_end
+        if ultimo:
+            h = t_end - tn
+        for i in range(1, s):
+            K[i] = evaluar(tn + c[i] * h, yn + h * (a[i, :i] @ K[:i]))
+        evaluaciones += s - 1
+        y_nuevo = yn + h * (b @ K)
+        escala = atol + rtol * np.maximum(np.abs(yn), np.abs(y_nuevo))
+        err = _norma_error(h * (e @ K), escala)
+        if not np.isfinite(err):
+            err = np.inf
+
+        if err <= 1.0:
+            t_previo, y_previo = tn, yn
+            tn = t_end if ultimo else tn + h
+            yn = y_nuevo
+            ts.append(tn); ys.append(yn.copy()); hs.append(h)
+            if guardar_pendientes:
+                pend.append(K.copy())
+            if eventos:
+                paso = ResultadoAdaptativo(tabla.nombre, np.array([t_previo, tn]),
+                                           np.array([y_previo, yn]).reshape((2,) + forma),
+                                           K.reshape((1, s) + forma).copy(), 0, np.array([h]), 0)
+                for cruce in buscar_eventos(f, paso, eventos):
+                    cruce.paso = len(hs) - 1
+                    cruces.append(cruce)
+                    if cruce.evento.terminal:
+                        terminal = cruce
+                        break
+                if terminal is not None:
+                    break
+            if tabla.fsal:
+                K[0] = K[-1]
+            else:
+                K[0] = evaluar(tn, yn)
+                evaluaciones += 1
+            fac = FAC_MAX if err == 0 else min(FAC_MAX, max(FAC_MIN, SEGURIDAD * err ** (-1.0 / (q + 1))))
+            h = min(h * fac, h_max)
+        else:
+            rechazados += 1
+            fac = FAC_MIN if not np.isfinite(err) else max(FAC_MIN, SEGURIDAD * err ** (-1.0 / (q + 1)))
+            h *= fac
+            if h < h_min:
+                raise RuntimeError(f"El paso se volvió demasiado chico en t = {tn:.6g} (tolerancia inalcanzable).")
+
+    n = len(hs)
+    t = np.array(ts)
+    y = np.array(ys).reshape((n + 1,) + forma)
+    pendientes = np.array(pend).reshape((n, s) + forma) if guardar_pendientes else None
+    res = ResultadoAdaptativo(tabla.nombre, t, y, pendientes, evaluaciones, np.array(hs), rechazados)
+    res.eventos = cruces
+    if terminal is not None:
+        # El último punto pasa a ser el evento; h y las k siguen siendo las del paso completo,
+        # así la salida densa de ese tramo no cambia
+        _cortar_en_evento(res, terminal)
+    return res
+
+
+# ==========================
+# Métodos implícitos (rígidos)
+# ==========================
+METODOS_IMPLICITOS = ("Euler implícito", "Trapecio", "BDF2")
+
+
+def jacobiano_diferencias(f: Callable, t: float, y: np.ndarray, fy: np.ndarray, forma) -> np.ndarray:
+    """df/dy (m x m) por diferencias hacia adelante: m evaluaciones extra de f."""
+    m = y.size
+    J = np.empty((m, m))
+    for j in range(m):
+        dy = np.sqrt(np.finfo(float).eps) * max(1.0, abs(y[j]))
+        yp = y.copy()
+        yp[j] += dy
+        J[:, j] = (a_forma(f(t, yp.reshape(forma)), forma).reshape(-1) - fy) / dy
+    return J
+
+
+def jacobiano_simbolico(f: Callable, forma=()) -> Optional[Callable]:
+    """
+    Intenta derivar f simbólicamente evaluándola con símbolos de SymPy.
+    Funciona con expresiones polinómicas/racionales escritas con operadores; si f usa
+    funciones de NumPy, ramas if o no hay SymPy, devuelve None (usar diferencias finitas).
+    """
+    try:
+        import sympy as sp
+        m = int(np.prod(forma))
+        t = sp.Symbol("t")
+        ys = sp.symbols(f"y0:{m}") if forma else (sp.Symbol("y"),)
+        estado = np.array(ys, dtype=object).reshape(forma) if forma else ys[0]
+        salida = np.array(f(t, estado), dtype=object).reshape(-1)
+        if salida.size != m:
+            return None
+        J = sp.Matrix(m, m, lambda i, j: sp.diff(sp.sympify(salida[i]), ys[j]))
+        J_num = sp.lambdify((t,) + tuple(ys), J, "numpy")
+    except Exception:
+        return None
+
+    def jac(tn, y):
+        return np.array(J_num(tn, *np.asarray(y, dtype=float).reshape(-1)), dtype=float).reshape(m, m)
+    return jac
+
+
+class ResultadoImplicito(ResultadoRK):
+    """ResultadoRK de un método implícito; agrega iteraciones de Newton, jacobianos y tiempo."""
+
+    def __init__(self, metodo: str, t, y, evaluaciones: int, iteraciones: int,
+                 jacobianos: int, origen_jacobiano: str, segundos: float):
+        super().__init__(metodo, t, y, None, evaluaciones)
+        self.iteraciones = iteraciones
+        self.jacobianos = jacobianos
+        self.origen_jacobiano = origen_jacobiano
+        self.segundos = segundos
+
+    def resumen(self) -> str:
+        return (f"{self.metodo}: {self.pasos} pasos, {self.iteraciones} iteraciones de Newton, "
+                f"{self.evaluaciones} evaluaciones de f, jacobiano {self.origen_jacobiano}, "
+                f"{1000 * self.segundos:.1f} ms")
+
+
+def integrar_implicito(f: Callable, t, y0, metodo="BDF2", jacobiano="auto",
+                       tol: float = 1e-10, max_iter: int = 20) -> ResultadoImplicito:
+    """
+    Integra y' = f(t, y) sobre la malla t con un método implícito:
+        Euler implícito: y_{n+1} = y_n + h f_{n+1}                       (orden 1, L-estable)
+        Trapecio:        y_{n+1} = y_n + h (f_n + f_{n+1}) / 2           (orden 2, A-estable)
+        BDF2:            y_{n+1} = a1 y_n - a2 y_{n-1} + g h f_{n+1}     (orden 2, L-estable;
+                         coeficientes de paso variable, primer paso con Euler implícito)
+    Todos tienen la forma z = c + g h f(t_{n+1}, z), que se resuelve con Newton
+    (I - g h J) dz = -(z - c - g h f(t_{n+1}, z)), con J evaluado una vez por paso.
+    jacobiano: callable J(t, y) -> (m, m), "auto" (simbólico si se puede, si no
+    diferencias finitas) o None (diferencias finitas).
+    """
+    if metodo not in METODOS_IMPLICITOS:
+        raise ValueError(f"Método implícito desconocido: {metodo}. Disponibles: {', '.join(METODOS_IMPLICITOS)}")
+    t = np.asarray(t, dtype=float)
+    n_steps = len(t) - 1
+    y0 = np.asarray(y0, dtype=float)
+    forma, m = y0.shape, y0.size
+    if jacobiano == "auto":
+        jacobiano = jacobiano_simbolico(f, forma)
+    origen = "por diferencias finitas" if jacobiano is None else "analítico"
+    inicio_reloj = time.perf_counter()  # sin contar la derivación simbólica (se hace una vez)
+
+    def evaluar(tn, yn):
+        return a_forma(f(tn, yn.reshape(forma)), forma).reshape(-1)
+
+    y = np.empty((n_steps + 1, m))
+    y[0] = y0.reshape(-1)
+    identidad = np.eye(m)
+    trapecio = metodo == "Trapecio"
+    fn = evaluar(t[0], y[0]) if trapecio else None  # f_n solo entra en el trapecio
+    evaluaciones, iteraciones, jacobianos = int(trapecio), 0, 0
+
+    for n in range(n_steps):
+        h = t[n + 1] - t[n]
+        yn = y[n]
+        if metodo == "Euler implícito" or (metodo == "BDF2" and n == 0):
+            c, g = yn, 1.0
+        elif trapecio:
+            c, g = yn + 0.5 * h * fn, 0.5
+        else:
+            w = h / (t[n] - t[n - 1])
+            c = ((1 + w) ** 2 * yn - w ** 2 * y[n - 1]) / (1 + 2 * w)
+            g = (1 + w) / (1 + 2 * w)
+
+        # f en el iterado inicial sirve a la vez para el jacobiano y para la primera iteración
+        z = yn.copy()
+        fz = evaluar(t[n + 1], z)
+        evaluaciones += 1
+        if jacobiano is None:
+            J = jacobiano_diferencias(f, t[n + 1], z, fz, forma)
+            evaluaciones += m
+        else:
+            J = np.asarray(jacobiano(t[n + 1], z.reshape(forma)), dtype=float).reshape(m, m)
+        jacobianos += 1
+        M = identidad - g * h * J
+        for _ in range(max_iter):
+            dz = np.linalg.solve(M, -(z - c - g * h * fz))
+            z = z + dz
+            iteraciones += 1
+            if np.linalg.norm(dz) <= tol * (1 + np.linalg.norm(z)):
+                break
+            fz = evaluar(t[n + 1], z)
+            evaluaciones += 1
+        else:
+            raise RuntimeError(f"{metodo}: Newton no convergió en t = {t[n + 1]:.6g} (probar un h menor).")
+        y[n + 1] = z
+        if trapecio:
+            fn = evaluar(t[n + 1], z)
+            evaluaciones += 1
+
+    return ResultadoImplicito(metodo, t, y.reshape((n_steps + 1,) + forma), evaluaciones,
+                              iteraciones, jacobianos, origen, time.perf_counter() - inicio_reloj)
+
+
+# ==========================
+# Salida densa
+# ==========================
+TIPOS_DENSOS = ("rk4", "dopri54", "hermite")
+
+# Interpolante de Dormand-Prince 5(4) (Shampine, orden 4): b_i(θ) = sum_k P[i, k] θ^(k+1)
+_P_DOPRI54 = np.array([
+    [1, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423]])
+
+
+def _pesos_rk4(theta: np.ndarray) -> np.ndarray:
+    """Extensión continua de RK4 (orden 3): en θ = 1 da los pesos 1/6, 1/3, 1/3, 1/6."""
+    t2, t3 = theta ** 2, theta ** 3
+    medio = t2 - 2 * t3 / 3
+    return np.array([theta - 3 * t2 / 2 + 2 * t3 / 3, medio, medio, -t2 / 2 + 2 * t3 / 3])
+
+
+def _pesos_dopri54(theta: np.ndarray) -> np.ndarray:
+    return _P_DOPRI54 @ np.array([theta, theta ** 2, theta ** 3, theta ** 4])
+
+
+class SalidaDensa:
+    """
+    Solución continua y(t) a partir de un ResultadoRK ya calculado, sin volver a integrar.
+    - "rk4": extensión continua de RK4 (orden 3) con las 4 k del paso
+    - "dopri54": interpolante de Dormand-Prince (orden 4) con las 7 k que guarda
+      integrar_adaptativo(..., guardar_pendientes=True); no evalúa f
+    - "hermite": cúbica de Hermite con y_n, y_{n+1}, f_n y f_{n+1}; sirve para
+      cualquier método (Euler, Heun, Adams, implícitos, ...)
+    Las pendientes se calculan solo en los pasos que contienen los t pedidos y se
+    guardan, así que evaluar muchas veces el mismo tramo no repite llamadas a f.
+    """
+
+    def __init__(self, f: Callable, res: ResultadoRK, tipo: Optional[str] = None):
+        self.f = f
+        self.res = res
+        self.t = np.asarray(res.t, dtype=float)
+        self.y = np.asarray(res.y, dtype=float)
+        self.forma = self.y.shape[1:]
+        if tipo is None:
+            if res.metodo == "DOPRI54" and res.pendientes is not None:
+                tipo = "dopri54"
+            elif res.metodo == "RK4":
+                tipo = "rk4"
+            else:
+                tipo = "hermite"
+        if tipo not in TIPOS_DENSOS:
+            raise ValueError(f"Tipo de salida densa desconocido: {tipo}. Disponibles: {', '.join(TIPOS_DENSOS)}")
+        if tipo == "dopri54" and res.pendientes is None:
+            raise ValueError("La salida densa de DOPRI54 necesita integrar_adaptativo(..., guardar_pendientes=True).")
+        self.tipo = tipo
+        self.evaluaciones = 0  # llamadas a f hechas por la interpolación
+        self._guardadas: Dict[int, np.ndarray] = {}
+
+    def _pendientes(self, pasos: np.ndarray) -> np.ndarray:
+        """k de los pasos pedidos ("rk4") o f en los nodos pedidos ("hermite"), con caché."""
+        faltan = np.array([p for p in pasos if p not in self._guardadas], dtype=int)
+        if len(faltan):
+            if self.tipo == "rk4":
+                nuevas = _pendientes_pasos(self.f, self.t, self.y, obtener_metodo("RK4"), faltan)
+                self.evaluaciones += 4 * len(faltan)
+            else:
+                nuevas = _f_en_puntos(self.f, self.t[faltan], self.y[faltan])
+                self.evaluaciones += len(faltan)
+            self._guardadas.update(zip(faltan.tolist(), nuevas))
+        return np.array([self._guardadas[p] for p in pasos.tolist()])
+
+    def __call__(self, t):
+        tq = np.asarray(t, dtype=float)
+        escalar = tq.ndim == 0
+        tq = tq.reshape(-1)
+        t0, tN = self.t[0], self.t[-1]
+        margen = 1e-12 * max(1.0, abs(t0), abs(tN))
+        if len(tq) and (tq.min() < t0 - margen or tq.max() > tN + margen):
+            raise ValueError(f"t fuera del intervalo integrado [{t0:.6g}, {tN:.6g}].")
+        if len(self.t) < 2:
+            salida = np.broadcast_to(self.y[0], (len(tq),) + self.forma).copy()
+            return salida[0] if escalar else salida
+
+        idx = np.clip(np.searchsorted(self.t, tq, side="right") - 1, 0, len(self.t) - 2)
+        h = self.t[idx + 1] - self.t[idx]
+        theta = (tq - self.t[idx]) / h
+        ejes = (1,) * len(self.forma)
+        hh = h.reshape((-1,) + ejes)
+        if self.tipo == "hermite":
+            nodos, pos = np.unique(np.concatenate([idx, idx + 1]), return_inverse=True)
+            F = self._pendientes(nodos)
+            f0, f1 = F[pos[:len(idx)]], F[pos[len(idx):]]
+            th = theta.reshape((-1,) + ejes)
+            t2, t3 = th ** 2, th ** 3
+            salida = ((2 * t3 - 3 * t2 + 1) * self.y[idx] + (-2 * t3 + 3 * t2) * self.y[idx + 1]
+                      + hh * ((t3 - 2 * t2 + th) * f0 + (t3 - t2) * f1))
+        else:
+            if self.tipo == "rk4":
+                pasos, pos = np.unique(idx, return_inverse=True)
+                K, pesos = self._pendientes(pasos)[pos], _pesos_rk4(theta)
+            else:
+                # Paso completo del integrador: con evento terminal el último tramo queda más corto
+                h_paso = self.res.h[idx].reshape(hh.shape)
+                theta = (tq - self.t[idx]) / h_paso.reshape(-1)
+                K, pesos, hh = self.res.pendientes[idx], _pesos_dopri54(theta), h_paso
+            salida = self.y[idx] + hh * np.einsum("in,ni...->n...", pesos, K)
+        return salida[0] if escalar else salida
+
+
+# ==========================
+# Eventos (cruces por cero)
+# ==========================
+class Evento:
+    """
+    Condición g(t, y) = 0 a detectar durante la integración.
+    - direccion: +1 solo cruces de g de negativo a positivo, -1 de positivo a negativo, 0 ambos
+    - terminal: la integración se detiene en el primer cruce
+    """
+
+    def __init__(self, g: Callable, nombre: str = "", direccion: int = 0, terminal: bool = False):
+        if direccion not in (-1, 0, 1):
+            raise ValueError("direccion debe ser -1, 0 o +1.")
+        self.g = g
+        self.nombre = nombre or getattr(g, "__name__", "evento")
+        self.direccion = direccion
+        self.terminal = terminal
+
+
+class Cruce:
+    """Un evento encontrado: instante, estado, sentido del cruce (+1/-1) y paso n que lo contiene."""
+
+    def __init__(self, evento: Evento, t: float, y: np.ndarray, direccion: int, paso: int):
+        self.evento = evento
+        self.t = t
+        self.y = y
+        self.direccion = direccion
+        self.paso = paso
+
+    @property
+    def nombre(self) -> str:
+        return self.evento.nombre
+
+    def __repr__(self):
+        return f"Cruce({self.nombre!r}, t={self.t:.10g}, y={self.y}, direccion={self.direccion:+d})"
+
+
+def _como_eventos(eventos) -> List[Evento]:
+    return [e if isinstance(e, Evento) else Evento(e) for e in (eventos or [])]
+
+
+def _raiz(g: Callable, a: float, b: float, ga: float, gb: float, tol: float, max_iter: int = 100) -> float:
+    """Regula falsi con la modificación de Illinois; g(a) y g(b) tienen signos opuestos."""
+    for _ in range(max_iter):
+        c = (a * gb - b * ga) / (gb - ga)
+        gc = g(c)
+        if gc == 0:
+            return c
+        if gc * gb < 0:
+            a, ga = b, gb
+        else:
+            ga /= 2
+        b, gb = c, gc
+        if abs(b - a) <= tol:
+            break
+    return b
+
+
+def _cruces(evento: Evento, g0, g1):
+    """(subida, bajada, candidatos): pasos donde g cruza cero, y los que cuentan según evento.direccion."""
+    subida, bajada = (g0 < 0) & (g1 >= 0), (g0 > 0) & (g1 <= 0)
+    return subida, bajada, subida if evento.direccion > 0 else bajada if evento.direccion < 0 else subida | bajada
+
+
+def buscar_eventos(f: Callable, res: ResultadoRK, eventos, inicio: int = 0, fin: Optional[int] = None,
+                   densa: Optional[SalidaDensa] = None) -> List[Cruce]:
+    """
+    Cruces de cada g(t, y) = 0 en los pasos [inicio, fin) de una solución ya calculada.
+    g se evalúa una vez en los puntos de la malla (vectorizado si se puede); en los pasos
+    con cambio de signo el instante se ubica con la salida densa y _raiz, sin volver a
+    integrar. Devuelve los cruces ordenados por t.
+    """
+    eventos = _como_eventos(eventos)
+    t = np.asarray(res.t, dtype=float)
+    fin = len(t) - 1 if fin is None else min(fin, len(t) - 1)
+    if fin <= inicio or not eventos:
+        return []
+    densa = SalidaDensa(f, res) if densa is None else densa
+    y = densa.y
+    cruces = []
+    for evento in eventos:
+        G = _f_en_puntos(evento.g, t[inicio:fin + 1], y[inicio:fin + 1], ())
+        g0, g1 = G[:-1], G[1:]
+        subida, bajada, candidatos = _cruces(evento, g0, g1)
+        for j in np.flatnonzero(candidatos):
+            n = inicio + j
+
+            def g_densa(tc, evento=evento):
+                return float(evento.g(tc, densa(tc)))
+
+            if g1[j] == 0:
+                tc = t[n + 1]
+            else:
+                tol = 4 * np.finfo(float).eps * max(1.0, abs(t[n + 1])) + 1e-12 * (t[n + 1] - t[n])
+                tc = _raiz(g_densa, t[n], t[n + 1], float(g0[j]), float(g1[j]), tol)
+            cruces.append(Cruce(evento, float(tc), densa(tc), 1 if subida[j] else -1, n))
+    return sorted(cruces, key=lambda c: c.t)
+
+
+def _cortar_en_evento(res: ResultadoRK, cruce: Cruce):
+    """Deja la solución hasta el cruce terminal: el último punto es (t_evento, y_evento)."""
+    n = cruce.paso
+    res.t = np.append(res.t[:n + 1], cruce.t)
+    res.y = np.concatenate([res.y[:n + 1], np.asarray(cruce.y)[None]])
+    res.evento_terminal = cruce
+
+
+def integrar_con_eventos(f: Callable, t0: float, y0, t_end: float, h: float, eventos,
+                         metodo="RK4", bloque: int = BLOQUE) -> ResultadoRK:
+    """
+    Paso fijo (RK o Adams) con detección de eventos. Avanza de a un paso y busca los cruces
+    con buscar_eventos cada 'bloque' pasos (g vectorizada sobre el tramo). Los eventos
+    terminales se revisan además en cada paso: en cuanto uno cambia de signo se busca en
+    ese tramo y la integración termina en el paso que lo contiene (ni los pasos ni las
+    evaluaciones de después se hacen). En res.eventos quedan los cruces (hasta el terminal
+    inclusive) y en res.evento_terminal el que detuvo la integración, o None.
+    """
+    eventos = _como_eventos(eventos)
+    nombre = getattr(metodo, "nombre", metodo)
+    n_steps = pasos_grilla(t0, t_end, h)
+    y0 = np.asarray(y0, dtype=float)
+    t = t0 + h * np.arange(n_steps + 1)
+    y = np.empty((n_steps + 1,) + y0.shape)
+    res = ResultadoRK(nombre, t, y, None, 0)
+    densa = SalidaDensa(f, res)
+
+    if es_multipaso(nombre):
+        filas = _filas_adams(f, t0, y0, h, n_steps, obtener_metodo_multipaso(nombre))
+    else:
+        filas = _filas_rk(f, t, y0, nombre)
+    terminales = [e for e in eventos if e.terminal]
+    g_previos = None
+    buscados = 0  # pasos [0, buscados) ya revisados con buscar_eventos
+    for n, yn in enumerate(filas):
+        y[n] = yn.reshape(y0.shape)
+        g_actuales = [float(e.g(t[n], y[n])) for e in terminales]
+        cruza = g_previos is not None and any(_cruces(e, g0, g1)[2]
+                                              for e, g0, g1 in zip(terminales, g_previos, g_actuales))
+        g_previos = g_actuales
+        if not (cruza or n - buscados >= bloque or n == n_steps):
+            continue
+        for cruce in buscar_eventos(f, res, eventos, buscados, n, densa):
+            res.eventos.append(cruce)
+            if cruce.evento.terminal:
+                res.evaluaciones = evaluaciones_metodo(nombre, n) + densa.evaluaciones
+                _cortar_en_evento(res, cruce)
+                return res
+        buscados = n
+    res.evaluaciones = evaluaciones_metodo(nombre, n_steps) + densa.evaluaciones
+    return res
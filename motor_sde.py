@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Ecuaciones diferenciales estocásticas dY = f(t, Y) dt + g(t, Y) dW (Itô).
+
+- Euler-Maruyama: Y_{n+1} = Y_n + f h + g dW                    (orden fuerte 1/2)
+- Milstein:       Y_{n+1} = Y_n + f h + g dW + g g' (dW^2 - h)/2  (orden fuerte 1)
+  con g' = dg/dy exacta si g es texto (compilar_derivadas), dada o por
+  diferencias centradas.
+- Todas las trayectorias de un bloque avanzan juntas: un paso es una sola
+  operación sobre un array de n_trayectorias valores (f y g deben hacer
+  broadcast, como las funciones de compilar_sympy).
+- Las trayectorias se procesan en bloques de tamaño fijo (memoria acotada
+  aunque se pidan millones) y cada bloque usa su propio generador, salido de
+  SeedSequence(semilla).spawn: streams independientes y reproducibles.
+- No se guardan las trayectorias: por cada instante de salida se acumulan
+  media y varianza (Welford/Chan entre bloques) y los cuantiles pedidos.
+  guardar > 0 conserva además esa cantidad de trayectorias para graficar.
+
+Requisitos: numpy, sympy
+"""
+
+import time
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from expresiones import compilar_derivadas, compilar_sympy
+from motor_rk import a_forma, pasos_grilla
+
+METODOS_SDE = ("Euler-Maruyama", "Milstein")
+TRAYECTORIAS_POR_BLOQUE = 100_000
+MAX_SALIDAS = 501  # instantes en los que se calculan las estadísticas
+
+
+class ResultadoSDE:
+    """
+    Estadísticas del ensamble en los instantes t (n_salida,):
+    - media, varianza: (n_salida,)
+    - cuantiles: {q: (n_salida,)}; con varios bloques, promedio de los cuantiles de cada bloque
+    - trayectorias: (guardar, n_salida) o None
+    """
+
+    def __init__(self, metodo: str, t: np.ndarray, n_trayectorias: int, semilla):
+        self.metodo = metodo
+        self.t = t
+        self.n_trayectorias = n_trayectorias
+        self.semilla = semilla
+        self.media = np.zeros(len(t))
+        self.varianza = np.zeros(len(t))
+        self.cuantiles: Dict[float, np.ndarray] = {}
+        self.trayectorias: Optional[np.ndarray] = None
+        self.pasos = 0
+        self.segundos = 0.0
+
+    @property
+    def desvio(self) -> np.ndarray:
+        return np.sqrt(self.varianza)
+
+    def error_media(self, z: float = 1.96) -> np.ndarray:
+        """Semiancho del intervalo de confianza de la media (z = 1.96 -> 95 %)."""
+        return z * self.desvio / np.sqrt(self.n_trayectorias)
+
+    def resumen(self) -> str:
+        return (f"{self.metodo}: {self.n_trayectorias} trayectorias, {self.pasos} pasos, "
+                f"{1000 * self.segundos:.0f} ms; E[Y(T)] = {self.media[-1]:.6g} ± {self.error_media()[-1]:.2g}, "
+                f"Var[Y(T)] = {self.varianza[-1]:.6g}")
+
+
+def _derivada_centrada(g: Callable) -> Callable:
+    def dg(t, y):
+        e = 1e-6 * np.maximum(1.0, np.abs(y))
+        return (g(t, y + e) - g(t, y - e)) / (2 * e)
+    return dg
+
+
+def integrar_sde(f: Union[str, Callable], g: Union[str, Callable], t0: float, y0: float, t_end: float, h: float,
+                 n_trayectorias: int = TRAYECTORIAS_POR_BLOQUE, metodo: str = "Euler-Maruyama",
+                 semilla: Optional[int] = None, derivada_g: Optional[Callable] = None,
+                 cuantiles: Sequence[float] = (0.05, 0.5, 0.95), guardar: int = 0,
+                 bloque: int = TRAYECTORIAS_POR_BLOQUE, n_salida: Optional[int] = None) -> ResultadoSDE:
+    """
+    Simula n_trayectorias de dY = f dt + g dW desde Y(t0) = y0 con paso h.
+    f y g son funciones (t, y) o expresiones de texto en t e y.
+    - semilla: misma semilla y mismo bloque -> mismas trayectorias
+    - derivada_g: dg/dy para Milstein (si falta, diferencias centradas)
+    - guardar: cantidad de trayectorias completas que se devuelven (0 = ninguna)
+    - n_salida: instantes con estadísticas (por defecto todos, hasta MAX_SALIDAS)
+    """
+    if metodo not in METODOS_SDE:
+        raise ValueError(f"Método desconocido: {metodo}. Disponibles: {', '.join(METODOS_SDE)}")
+    if n_trayectorias < 1 or bloque < 1:
+        raise ValueError("Se necesita al menos una trayectoria y bloques de al menos una.")
+    n_steps = pasos_grilla(t0, t_end, h)
+    n_salida = min(n_steps + 1, n_salida or MAX_SALIDAS)
+    salidas = np.unique(np.round(np.linspace(0, n_steps, n_salida)).astype(int))
+    es_salida = np.zeros(n_steps + 1, dtype=bool)
+    es_salida[salidas] = True
+    milstein = metodo == "Milstein"
+    dg = derivada_g
+    if milstein and dg is None:
+        dg = compilar_derivadas(g, ("t", "y"))[1][1] if isinstance(g, str) else _derivada_centrada(g)
+    f = compilar_sympy(f) if isinstance(f, str) else f
+    g = compilar_sympy(g) if isinstance(g, str) else g
+
+    res = ResultadoSDE(metodo, t0 + h * salidas, n_trayectorias, semilla)
+    res.pasos = n_steps
+    cuantiles = tuple(cuantiles)
+    suma_cuantiles = np.zeros((len(cuantiles), len(salidas)))
+    if guardar:
+        res.trayectorias = np.empty((min(guardar, n_trayectorias), len(salidas)))
+    raiz_h = np.sqrt(h)
+    inicio_reloj = time.perf_counter()
+
+    tamanos = [min(bloque, n_trayectorias - i) for i in range(0, n_trayectorias, bloque)]
+    streams = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    vistos = 0
+    for m, stream in zip(tamanos, streams):
+        rng = np.random.Generator(np.random.PCG64(stream))
+        Y = np.full(m, float(y0))
+        media, m2 = np.empty(len(salidas)), np.empty(len(salidas))
+        guardadas = min(m, len(res.trayectorias) - vistos) if guardar else 0
+        j = 0
+        for n in range(n_steps + 1):
+            if es_salida[n]:
+                media[j] = Y.mean()
+                m2[j] = ((Y - media[j]) ** 2).sum()
+                if cuantiles:
+                    suma_cuantiles[:, j] += m * np.quantile(Y, cuantiles)
+                if guardadas > 0:
+                    res.trayectorias[vistos:vistos + guardadas, j] = Y[:guardadas]
+                j += 1
+            if n == n_steps:
+                break
+            tn = t0 + h * n
+            dW = raiz_h * rng.standard_normal(m)
+            gY = a_forma(g(tn, Y), (m,))
+            Y_nuevo = Y + a_forma(f(tn, Y), (m,)) * h + gY * dW
+            if milstein:
+                Y_nuevo += 0.5 * gY * a_forma(dg(tn, Y), (m,)) * (dW * dW - h)
+            Y = Y_nuevo
+        # Chan: combinación exacta de media y M2 del bloque con las de los anteriores
+        if vistos == 0:
+            res.media, acumulado = media, m2
+        else:
+            delta = media - res.media
+            total = vistos + m
+            res.media = res.media + delta * m / total
+            acumulado = acumulado + m2 + delta ** 2 * vistos * m / total
+        vistos += m
+
+    res.varianza = acumulado / (vistos - 1) if vistos > 1 else np.zeros(len(salidas))
+    res.cuantiles = {q: suma_cuantiles[i] / vistos for i, q in enumerate(cuantiles)}
+    res.segundos = time.perf_counter() - inicio_reloj
+    return res
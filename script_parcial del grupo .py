@@ -2,12 +2,11 @@
 """
 Simulador Unificado: Raíces, Integración, Interpolación de Lagrange y Dif. Finitas
 - Módulos: Raíces | Integración | Interpolación (Lagrange) | Dif. Finitas (1D/2D)
-- Evaluación segura de expresiones (math.*) con soporte para arrays (np.vectorize)
+- Evaluación segura de expresiones (math.*) con soporte para arrays (ufuncs de NumPy)
 - Tablas y resultados con 8 decimales, gráficas opcionales
 Requisitos: tkinter, numpy, sympy, matplotlib
 """
 
-import ast
 import math
 from typing import Callable, Optional, List
 import tkinter as tk
@@ -120,6 +119,21 @@ class MonteCarloSimulator:
         self.entry_gauss.insert(0, "5")
         self.entry_gauss.grid(row=0, column=10)
 
+        ttk.Label(frame_inputs, text="Muestreo:").grid(row=2, column=0)
+        self.combo_muestreo = ttk.Combobox(frame_inputs, values=MUESTREOS, state="readonly", width=15)
+        self.combo_muestreo.current(0)
+        self.combo_muestreo.grid(row=2, column=1, columnspan=2, sticky="w")
+
+        ttk.Label(frame_inputs, text="Estimador:").grid(row=2, column=3)
+        self.combo_estimador = ttk.Combobox(frame_inputs, values=ESTIMADORES, state="readonly", width=18)
+        self.combo_estimador.current(0)
+        self.combo_estimador.grid(row=2, column=4, columnspan=3, sticky="w")
+
+        ttk.Label(frame_inputs, text="p(x) =").grid(row=2, column=7)
+        self.entry_densidad = ttk.Entry(frame_inputs, width=20)
+        self.entry_densidad.insert(0, "1 + x*(pi - x)/2")  # densidad del muestreo por importancia
+        self.entry_densidad.grid(row=2, column=8, columnspan=3, sticky="w")
+
         
 # Botones principales (re-layout en múltiples filas)
         frame_actions = ttk.Frame(frame_inputs)
@@ -173,6 +187,8 @@ class MonteCarloSimulator:
         self.fxs_samples = None
         self.volume = None
         self.convergencia_data = None
+        self.mc_result = None  # acumuladores de la última simulación (media, varianza, éxitos)
+        self.mc_id = 0  # simulación que se está transmitiendo; una nueva cancela la anterior
 
     # -------------------- Simulación MC hit-or-miss --------------------
     def simular(self):
@@ -190,29 +206,68 @@ class MonteCarloSimulator:
             ys_dense = np.nan_to_num(f(xs_dense))
             y_min, y_max = min(0, np.min(ys_dense)), max(0, np.max(ys_dense))
 
-            np.random.seed(0)
-            xs = np.random.uniform(a, b, N)
-            ys = np.random.uniform(y_min, y_max, N)
-            fx_vals_samples = np.nan_to_num(f(xs))
-            success_mask = ((ys >= 0) & (ys <= fx_vals_samples)) | ((ys <= 0) & (ys >= fx_vals_samples))
-            count = np.sum(success_mask)
-
-            rect_area = (b - a) * (y_max - y_min)
-            mc_estimate = count / N * rect_area
-            mc_prom = (b - a) * np.mean(fx_vals_samples)
-
             nodes, weights = leggauss(n_gauss)
             trans_nodes = 0.5*(nodes+1)*(b-a)+a
             gauss_val = 0.5*(b-a)*np.sum(weights * f(trans_nodes))
 
-            self.fxs_samples = fx_vals_samples
+            # Las muestras se procesan por bloques (memoria constante) repartidas en procesos:
+            # solo quedan los acumuladores y un reservorio de puntos para la tabla y el gráfico
+            gen = iterar_hit_or_miss(func_str, a, b, N, y_min, y_max, semilla=0, muestreo=self.combo_muestreo.get(),
+                                     **self.opciones_estimador())
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.mc_id += 1
+        self.root.after(1, self.avanzar_simulacion, self.mc_id, gen, func_str, xs_dense, ys_dense, gauss_val)
+
+    def opciones_estimador(self):
+        """Estimador de reducción de varianza elegido (y la densidad p(x), que solo usa importancia)"""
+        return {"estimador": self.combo_estimador.get(), "densidad": self.entry_densidad.get()}
+
+    def texto_reduccion(self, res):
+        """Factor de reducción de varianza contra MC simple con las mismas evaluaciones de f"""
+        if res.estimador == SIMPLE and not res.qmc:
+            return ""
+        return f" (VRF: {res.factor_reduccion:.3g}, MC simple ± {res.error_promedio_simple:.2g})"
+
+    def avanzar_simulacion(self, mc_id, gen, func_str, xs_dense, ys_dense, gauss_val):
+        """Procesa un bloque de muestras, muestra el avance y se reprograma con root.after"""
+        if mc_id != self.mc_id:
+            gen.close()
+            return
+        try:
+            hechos, total, res = next(gen)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        modo = f"{res.muestreo}, {len(res.medias_replicas)} de {res.replicas} réplicas" if res.qmc else f"{res.procesos} procesos"
+        self.label_result.config(text=f"Resultados: {hechos:,} de {total:,} muestras ({modo}) | "
+                                      f"MC: {res.estimacion_hit_or_miss:.6f} ± {res.error_hit_or_miss:.2g} | "
+                                      f"MC promedio ({res.estimador}): {res.estimacion_promedio:.6f} ± "
+                                      f"{res.error_promedio:.2g}{self.texto_reduccion(res)} | "
+                                      f"Gauss: {gauss_val:.6f}")
+        if hechos < total:
+            self.root.after(1, self.avanzar_simulacion, mc_id, gen, func_str, xs_dense, ys_dense, gauss_val)
+        else:
+            self.mostrar_simulacion(res, func_str, xs_dense, ys_dense, gauss_val)
+
+    def mostrar_simulacion(self, res, func_str, xs_dense, ys_dense, gauss_val):
+        """Tabla y gráfico con los puntos del reservorio; las estimaciones usan todas las muestras"""
+        try:
+            a, b, y_min, y_max = res.a, res.b, res.y_min, res.y_max
+            mc_estimate, mc_prom = res.estimacion_hit_or_miss, res.estimacion_promedio
+            puntos = res.reservorio.datos()
+            xs, ys, fx_vals_samples, success_mask = puntos["x"], puntos["y"], puntos["fx"], puntos["exito"]
+
+            self.mc_result = res
+            self.fxs_samples = puntos["v"]  # valor del estimador por muestra (f(x) en el simple)
             self.volume = b - a  # Guardar volumen para análisis estadístico
-            self.convergencia_data = (xs, self.fxs_samples, b - a, gauss_val)
+            self.convergencia_data = (res, gauss_val)
 
             # Tabla
             for i in self.tree.get_children():
                 self.tree.delete(i)
-            for i in range(min(N, 5000)):
+            for i in range(len(xs)):
                 self.tree.insert("", "end",
                                  values=(f"{xs[i]:.6f}", f"{ys[i]:.6f}", f"{fx_vals_samples[i]:.6f}",
                                          "✔" if success_mask[i] else "✘"))
@@ -222,7 +277,8 @@ class MonteCarloSimulator:
             self.ax.fill_between(xs_dense, 0, ys_dense, color='lightblue', alpha=0.3, label='Área bajo la curva')
             self.ax.plot(xs_dense, ys_dense, label=f"f(x)={func_str}", color="blue", linewidth=2)
             self.ax.scatter(xs[~success_mask], ys[~success_mask], s=20, alpha=0.6, color="red", label="Fallidos")
-            self.ax.scatter(xs[success_mask], ys[success_mask], s=20, alpha=0.6, color="green", label="Éxitos")
+            self.ax.scatter(xs[success_mask], ys[success_mask], s=20, alpha=0.6, color="green",
+                            label=f"Éxitos ({len(xs)} de {res.n} puntos)" if len(xs) < res.n else "Éxitos")
             self.ax.axhline(0, color="black", linewidth=0.8)
             self.ax.set_xlabel("x")
             self.ax.set_ylabel("y=f(x)")
@@ -243,9 +299,11 @@ class MonteCarloSimulator:
         for i in self.tree.get_children():
             self.tree.delete(i)
         self.label_result.config(text="Resultados: ")
+        self.mc_id += 1  # detiene una simulación en curso
         self.fxs_samples = None
         self.volume = None
         self.convergencia_data = None
+        self.mc_result = None
 
     # -------------------- Ventana Convergencia --------------------
     def ventana_convergencia(self):
@@ -253,22 +311,30 @@ class MonteCarloSimulator:
             messagebox.showwarning("Atención", "Primero ejecute una simulación.")
             return
 
-        xs, fxs, L, gauss_val = self.convergencia_data
-        cum_avg = np.cumsum(fxs)/np.arange(1, len(fxs)+1)
-        std_accum = np.array([np.std(fxs[:i+1], ddof=1) if i>0 else 0 for i in range(len(fxs))])
+        # Media y desvío acumulados: los registró la simulación en puntos espaciados logarítmicamente
+        res, gauss_val = self.convergencia_data
+        if res.qmc:
+            # Cuasi Monte Carlo: promedio de las réplicas y su error estándar (los puntos no son independientes)
+            n_muestras, cum_avg_vol, std_accum_vol = res.traza_replicas()
+            etiqueta, banda = f"{res.muestreo}: promedio de {len(res.trazas_replicas)} réplicas", "±1 error estándar"
+        else:
+            traza, L = res.traza, res.longitud
+            n_muestras = traza.n[:traza.hechos]
 
-        # Ajustar por volumen
-        cum_avg_vol = cum_avg * L
-        std_accum_vol = std_accum * L
+            # Ajustar por volumen
+            cum_avg_vol = traza.media[:traza.hechos] * L
+            std_accum_vol = traza.desvio[:traza.hechos] * L
+            etiqueta, banda = f"MC promedio acumulado ({res.estimador})", "±1 std"
 
         win = tk.Toplevel(self.root)
         win.title("Convergencia Monte Carlo")
 
         fig, ax = plt.subplots(figsize=(7,4))
-        ax.plot(cum_avg_vol, label="MC promedio acumulado")
-        ax.fill_between(range(len(cum_avg)), cum_avg_vol - std_accum_vol, cum_avg_vol + std_accum_vol,
-                        color='gray', alpha=0.3, label='±1 std')
+        ax.plot(n_muestras, cum_avg_vol, label=etiqueta)
+        ax.fill_between(n_muestras, cum_avg_vol - std_accum_vol, cum_avg_vol + std_accum_vol,
+                        color='gray', alpha=0.3, label=banda)
         ax.axhline(gauss_val, color="red", linestyle="--", label="Gauss-Legendre")
+        ax.set_xscale("log")
         ax.set_xlabel("Número de muestras")
         ax.set_ylabel("Estimación")
         ax.legend()
@@ -280,17 +346,42 @@ class MonteCarloSimulator:
 
     # -------------------- Análisis Estadístico --------------------
     def ventana_estadistica(self):
-        if self.fxs_samples is None:
+        if self.mc_result is None:
             messagebox.showwarning("Atención", "Primero ejecute una simulación.")
             return
 
-        data = self.fxs_samples
-        n = len(data)
+        res = self.mc_result
         volumen = getattr(self, "volume", 1)
-
-        # Ajustar por volumen
-        media = np.mean(data) * volumen
-        std = np.std(data, ddof=1) * volumen
+        if res.qmc:
+            # Cuasi Monte Carlo: cada réplica es una observación independiente de la integral
+            data = res.estimaciones_promedio / volumen
+            n = len(data)
+            media = res.estimacion_promedio
+            std = np.std(res.estimaciones_promedio, ddof=1)
+            titulo = f"Estimaciones de las réplicas {res.muestreo}"
+            detalle = (f"Réplicas {res.muestreo}: {n} de {res.por_replica} puntos ({res.estimador})\n"
+                       f"Error de MC simple con las mismas evaluaciones: {res.error_promedio_simple:.6g}\n"
+                       f"Factor de reducción de varianza: {res.factor_reduccion:.4g}\n")
+            etiqueta_x = "Estimación de cada réplica"
+        else:
+            # Media y desvío de todas las muestras (acumuladores); el histograma usa el reservorio
+            data = self.fxs_samples
+            n = res.n
+
+            # Ajustar por volumen
+            media = res.valores.media * volumen
+            std = res.valores.desvio * volumen
+            if res.estimador == SIMPLE:
+                titulo = "Distribución muestral f(x) ajustada por volumen"
+                detalle = f"Muestras: {n}\n"
+                etiqueta_x = "f(x) * (b-a)"
+            else:
+                # El histograma es del valor del estimador por muestra: su varianza es la que se redujo
+                titulo = f"Distribución muestral del estimador ({res.estimador}) ajustada por volumen"
+                detalle = (f"Muestras: {n} ({res.evaluaciones} evaluaciones de f)\n"
+                           f"Error de MC simple con las mismas evaluaciones: {res.error_promedio_simple:.6g}\n"
+                           f"Factor de reducción de varianza: {res.factor_reduccion:.4g}\n")
+                etiqueta_x = "v * (b-a)"
         stderr = std / np.sqrt(n)
 
         win = tk.Toplevel(self.root)
@@ -313,18 +404,18 @@ class MonteCarloSimulator:
             t_val = stats.t.ppf(0.5+conf/2, n-1)
             ic_lower = media - t_val*stderr
             ic_upper = media + t_val*stderr
-            lbl.config(text=f"Muestras: {n}\nMedia: {media:.6f}\nDesviación estándar: {std:.6f}\n"
-                            f"Error estándar: {stderr:.6f}\nIntervalo de confianza {int(conf*100)}%: [{ic_lower:.6f}, {ic_upper:.6f}]")
+            lbl.config(text=f"{detalle}Media: {media:.6f}\nDesviación estándar: {std:.6g}\n"
+                            f"Error estándar: {stderr:.6g}\nIntervalo de confianza {int(conf*100)}%: [{ic_lower:.8g}, {ic_upper:.8g}]")
             ax.clear()
-            ax.hist(data*volumen, bins=min(30,max(5,n//5)), edgecolor='black', alpha=0.7, density=True)
+            ax.hist(data*volumen, bins=min(30,max(5,len(data)//5)), edgecolor='black', alpha=0.7, density=True)
             x_vals = np.linspace(min(data)*volumen, max(data)*volumen, 200)
             y_norm = stats.norm.pdf(x_vals, media, std)
             ax.plot(x_vals, y_norm, color='orange', linewidth=2, label='Distribución Normal')
             ax.axvline(media, color='blue', linestyle='-', linewidth=2, label='Media')
             ax.axvline(ic_lower, color='red', linestyle='--', linewidth=2, label=f'IC {int(conf*100)}%')
             ax.axvline(ic_upper, color='red', linestyle='--', linewidth=2)
-            ax.set_title("Distribución muestral f(x) ajustada por volumen")
-            ax.set_xlabel("f(x) * (b-a)")
+            ax.set_title(titulo)
+            ax.set_xlabel(etiqueta_x)
             ax.set_ylabel("Densidad")
             ax.grid(True)
             ax.legend()
@@ -340,6 +431,10 @@ class MonteCarloSimulator:
             "1. Método de 'puntos de éxito' (hit-or-miss): se genera un rectángulo que contiene a la curva. Se cuentan los puntos dentro de la región bajo la curva y se estima el área.\n\n"
             "2. Método Monte Carlo promedio: se toma el promedio de f(x) evaluada en puntos aleatorios de [a,b] y se multiplica por la longitud del intervalo.\n\n"
             "3. Gauss-Legendre: método de cuadratura determinista de alta precisión que se toma como valor de referencia.\n\n"
+            "Las muestras se generan por bloques y solo se acumulan media, varianza y cantidad de éxitos, así que N puede ser muy grande (el límite es el tiempo, no la memoria). La tabla y el gráfico muestran una selección al azar de hasta 5000 puntos.\n\n"
+            "El trabajo se reparte entre todos los núcleos: cada tramo de muestras tiene su propio generador derivado de la semilla 0 y los resultados parciales se combinan en orden, así que el resultado es el mismo con cualquier cantidad de procesos.\n\n"
+            "Muestreo Sobol o Halton (cuasi Monte Carlo): los puntos cubren el dominio de forma mucho más pareja y el error baja casi como 1/N en lugar de 1/√N. Se hacen 10 réplicas aleatorizadas y la barra de error sale de su dispersión; Sobol usa una potencia de 2 de puntos por réplica. Vale para la simulación, el método promedio y las integrales dobles y triples.\n\n"
+            "Reducción de varianza (selector 'Estimador', método promedio): 'Antitéticas' promedia f(x) y f(a+b-x), que se compensan si f es monótona; 'Variable de control' resta un polinomio de grado 2 ajustado a f en una muestra piloto, cuya integral se conoce exacta; 'Importancia' toma x con densidad proporcional a p(x) y promedia f(x)/p(x) normalizada (conviene que p se parezca a |f|). El VRF es cuántas veces menos evaluaciones de f necesita el estimador que MC simple para el mismo error.\n\n"
             "Usa los botones 'Integrales Dobles' o 'Integrales Triples' para abrir ventanas con teclado matemático avanzado y vista previa."
         )
         win = tk.Toplevel(self.root)
@@ -354,13 +449,11 @@ class MonteCarloSimulator:
             a, b = float(self.entry_a.get()), float(self.entry_b.get())
             N = int(self.entry_N.get())
 
-            x = sp.Symbol('x')
-            f_expr = sp.sympify(func_str)
-            f = sp.lambdify(x, f_expr, "numpy")
-
-            xs = np.random.uniform(a, b, N)
-            fx_vals = np.nan_to_num(f(xs))
-            integral_prom = (b-a)*np.mean(fx_vals)
+            res = integrar_promedio(func_str, ("x",), [(a, b)], N, semilla=0, muestreo=self.combo_muestreo.get(),
+                                    **self.opciones_estimador())
+            integral_prom = res.estimacion_promedio
+            puntos = res.reservorio.datos()  # hasta 5000 muestras al azar para la tabla y el histograma
+            xs, fx_vals, v_vals = puntos["x"], puntos["fx"], puntos["v"]
 
             win = tk.Toplevel(self.root)
             win.title("Método Promedio 1D")
@@ -374,7 +467,7 @@ class MonteCarloSimulator:
             tree.configure(yscrollcommand=scroll.set)
             scroll.pack(side="left", fill="y")
 
-            for i in range(min(N,5000)):
+            for i in range(len(xs)):
                 tree.insert("", "end", values=(f"{xs[i]:.6f}", f"{fx_vals[i]:.6f}"))
 
             # Gráfico
@@ -382,10 +475,11 @@ class MonteCarloSimulator:
             canvas = FigureCanvasTkAgg(fig, master=win)
             canvas.get_tk_widget().pack(fill="both", expand=True)
 
-            ax.hist(fx_vals*(b-a), bins=min(30,max(5,N//5)), edgecolor='black', alpha=0.7)
-            ax.axhline(np.mean(fx_vals)*(b-a), color='red', linestyle='--', label='Media f(x)*(b-a)')
-            ax.set_title(f"Integral aproximada: {integral_prom:.6f}")
-            ax.set_xlabel("f(x) * (b-a)")
+            ax.hist(v_vals*(b-a), bins=min(30,max(5,len(xs)//5)), edgecolor='black', alpha=0.7)
+            ax.axhline(integral_prom, color='red', linestyle='--', label='Media f(x)*(b-a)')
+            ax.set_title(f"Integral aproximada ({res.muestreo}, {res.estimador}): {integral_prom:.6f} ± "
+                         f"{res.error_promedio:.2g}\n{self.texto_reduccion(res).strip(' ()')}")
+            ax.set_xlabel("f(x) * (b-a)" if res.estimador == SIMPLE else "v * (b-a)")
             ax.set_ylabel("Frecuencia")
             ax.grid(True)
             ax.legend()
@@ -448,22 +542,18 @@ class MonteCarloSimulator:
                     c,d = float(entry_c.get()), float(entry_d.get())
                     N = int(entry_N.get())
 
-                    x,y = sp.symbols('x y')
-                    f_expr = sp.sympify(f_str)
-                    f = sp.lambdify((x,y), f_expr, "numpy")
-
-                    xs = np.random.uniform(a,b,N)
-                    ys = np.random.uniform(c,d,N)
-                    fx_vals = np.nan_to_num(f(xs,ys))
-                    area = (b-a)*(d-c)
-                    integral = area*np.mean(fx_vals)
+                    res = integrar_promedio(f_str, ("x", "y"), [(a, b), (c, d)], N, semilla=0,
+                                            muestreo=self.combo_muestreo.get())
+                    integral = res.estimacion_promedio
+                    puntos = res.reservorio.datos()
+                    xs, ys, fx_vals = puntos["x"], puntos["y"], puntos["fx"]
 
                     fig, ax = plt.subplots(figsize=(6,4))
                     canvas = FigureCanvasTkAgg(fig, master=win)
                     canvas.get_tk_widget().grid(row=7,column=0,columnspan=8)
                     sc = ax.scatter(xs, ys, c=fx_vals, cmap='viridis', s=12)
                     fig.colorbar(sc, ax=ax, label='f(x,y)')
-                    ax.set_title(f"Integral Doble ≈ {integral:.6f}")
+                    ax.set_title(f"Integral Doble ≈ {integral:.6f} ± {res.error_promedio:.2g} ({res.muestreo})")
                     ax.set_xlabel("x")
                     ax.set_ylabel("y")
                     canvas.draw()
@@ -536,16 +626,11 @@ class MonteCarloSimulator:
                     e,fz = float(entry_e.get()), float(entry_fz.get())
                     N = int(entry_N.get())
 
-                    x,y,z = sp.symbols('x y z')
-                    f_expr = sp.sympify(f_str)
-                    f = sp.lambdify((x,y,z), f_expr, "numpy")
-
-                    xs = np.random.uniform(a,b,N)
-                    ys = np.random.uniform(c,d,N)
-                    zs = np.random.uniform(e,fz,N)
-                    fx_vals = np.nan_to_num(f(xs,ys,zs))
-                    volume = (b-a)*(d-c)*(fz-e)
-                    integral = volume * np.mean(fx_vals)
+                    res = integrar_promedio(f_str, ("x", "y", "z"), [(a, b), (c, d), (e, fz)], N, semilla=0,
+                                            muestreo=self.combo_muestreo.get())
+                    integral = res.estimacion_promedio
+                    puntos = res.reservorio.datos()
+                    xs, ys, zs, fx_vals = puntos["x"], puntos["y"], puntos["z"], puntos["fx"]
 
                     fig = plt.figure(figsize=(5,4))
                     ax = fig.add_subplot(111, projection='3d')
@@ -553,7 +638,7 @@ class MonteCarloSimulator:
                     canvas.get_tk_widget().grid(row=7,column=0,columnspan=9)
                     sc = ax.scatter(xs, ys, zs, c=fx_vals, cmap='viridis', s=10)
                     fig.colorbar(sc, ax=ax, label='f(x,y,z)')
-                    ax.set_title(f"Integral Triple ≈ {integral:.6f}")
+                    ax.set_title(f"Integral Triple ≈ {integral:.6f} ± {res.error_promedio:.2g} ({res.muestreo})")
                     ax.set_xlabel("x"); ax.set_ylabel("y"); ax.set_zlabel("z")
                     canvas.draw()
                 except Exception as e:
@@ -593,6 +678,11 @@ class MonteCarloSimulator:
 
 import numpy as np
 import sympy as sp
+from numpy.polynomial.legendre import leggauss
+from scipy import stats
+
+from expresiones import compilar_segura
+from motor_montecarlo import ESTIMADORES, MUESTREOS, SIMPLE, integrar_promedio, iterar_hit_or_miss
 
 try:
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
@@ -605,50 +695,22 @@ except Exception:
 # ==========================
 # Utilidades seguras y parsing
 # ==========================
-def _compile_safe(expr: str, allowed_names: dict, varnames: List[str]):
-    expr_ast = ast.parse(expr, mode='eval')
-    for node in ast.walk(expr_ast):
-        if isinstance(node, ast.Name):
-            if node.id not in allowed_names and node.id not in varnames:
-                raise ValueError(f"Nombre no permitido en expresión: {node.id}")
-        elif isinstance(node, (ast.Import, ast.ImportFrom)):
-            raise ValueError("Importaciones no permitidas.")
-    return compile(expr_ast, "<expr>", "eval")
-
-
 def make_safe_func_1v(expr: str) -> Callable[[float], float]:
     """
-    Compila f(x) segura.
+    Compila f(x) segura (caché compartida en expresiones.py).
     - Escalar -> float
-    - Array/lista/tupla -> np.array aplicando elemento a elemento
+    - Array/lista/tupla -> np.array evaluado en un único llamado NumPy
     """
-    allowed = {k: getattr(math, k) for k in dir(math) if not k.startswith("__")}
-    allowed.update({"abs": abs, "pow": pow})
-    code = _compile_safe(expr, allowed, ["x"])
-
-    def f_eval(x):
-        if isinstance(x, (np.ndarray, list, tuple)):
-            def scalar(t):
-                return float(eval(code, {"__builtins__": {}}, {**allowed, "x": float(t)}))
-            return np.vectorize(scalar, otypes=[float])(x)
-        return float(eval(code, {"__builtins__": {}}, {**allowed, "x": float(x)}))
-    return f_eval
+    return compilar_segura(expr, ("x",))
 
 
 def make_safe_func_2v(expr: str) -> Callable[[float, float], float]:
     """
-    Compila f(x,y) segura.
-    - Soporta evaluación escalar y vectorizada (broadcast con numpy)
+    Compila f(x,y) segura (caché compartida en expresiones.py).
+    - Escalares -> float
+    - Arrays -> evaluación vectorizada con broadcast de numpy
     """
-    allowed = {k: getattr(math, k) for k in dir(math) if not k.startswith("__")}
-    allowed.update({"abs": abs, "pow": pow})
-    code = _compile_safe(expr, allowed, ["x", "y"])
-
-    def f_eval(x, y):
-        def scalar(a, b):
-            return float(eval(code, {"__builtins__": {}}, {**allowed, "x": float(a), "y": float(b)}))
-        return np.vectorize(scalar, otypes=[float])(x, y)
-    return f_eval
+    return compilar_segura(expr, ("x", "y"))
 
 
 def parse_num(s: str) -> float:
@@ -1069,7 +1131,7 @@ class RootFrame(ttk.Frame):
             messagebox.showerror("Error en función", str(e)); return
 
         xs = np.linspace(-5, 5, 400)
-        ys = np.array([func(x) for x in xs])
+        ys = func(xs)
 
         if self.fig is None:
             self.fig = plt.Figure(figsize=(5, 3), dpi=100)
@@ -1198,7 +1260,7 @@ class IntegrationFrame(ttk.Frame):
             messagebox.showerror("Error", str(e)); return
 
         xs = np.linspace(a, b, 400)
-        ys = np.array([f(x) for x in xs])
+        ys = f(xs)
 
         if self.fig is None:
             self.fig = plt.Figure(figsize=(5, 3), dpi=100)
@@ -1211,7 +1273,7 @@ class IntegrationFrame(ttk.Frame):
         self.ax.grid(True, ls=":")
         if hasattr(self, "_last_nodes"):
             xn = self._last_nodes
-            yn = np.array([f(x) for x in np.atleast_1d(xn)])
+            yn = f(np.atleast_1d(xn))
             self.ax.scatter(np.atleast_1d(xn), yn, marker='o')
         self.canvas.draw_idle()
 
@@ -1618,7 +1680,7 @@ class FiniteDiffFrame(ttk.Frame):
             except Exception as e:
                 messagebox.showerror("Error", str(e)); return
             xs = np.linspace(x0 - 5, x0 + 5, 400)
-            ys = np.array([f(x) for x in xs])
+            ys = f(xs)
             if self.fig is None:
                 self.fig = plt.Figure(figsize=(5, 3), dpi=100)
                 self.ax = self.fig.add_subplot(111)
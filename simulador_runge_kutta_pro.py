@@ -5,13 +5,38 @@ import numpy as np
 import sympy as sp
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from expresiones import compilar_sympy, estadisticas_cache
+from motor_rk import (ResultadoRK, comparar_metodos, iterar_metodos, pendientes_en, evaluaciones_metodo,
+                      integrar_adaptativo, SalidaDensa, Evento, integrar_con_eventos,
+                      nombres_metodos, nombres_adaptativos, es_adaptativo)
+from tabla_virtual import TablaVirtual
+from convergencia import iterar_convergencia
+from solucion_analitica import TareaDsolve, OK, TIEMPO_AGOTADO
+from barrido import iterar_barrido, interpretar_rangos
 
 class RungeKuttaPro:
+    MAX_RESULTADOS = 16  # corridas guardadas en results_cache
+    MAX_PUNTOS_GRAFICO = 5000  # puntos por curva; corridas más largas se submuestrean al graficar
+    PUNTOS_DENSOS = 400  # con menos pasos que esto, la curva entre pasos sale de la salida densa
+    NIVELES_CONVERGENCIA = 6  # estudio de convergencia: h, h/2, ..., h/32
+    TIEMPO_DSOLVE = 20.0  # segundos antes de abandonar dsolve
+    MAX_TRAYECTORIAS = 60  # curvas dibujadas en la ventana del barrido
+
     def __init__(self, root):
         self.root = root
         self.root.title("Simulador Runge-Kutta Profesional")
         self.root.geometry("1500x900")
         self.solution_expr = None
+        self.solution_func = None  # solución exacta lambdificada (se evalúa sobre arrays de t)
+        self.recompilaciones = 0  # compilaciones de f(t,y) en la última corrida
+        self.results_cache = {}  # (expr, t0, y0, t_end, h) -> resultados de todos los métodos
+        self.run_id = 0  # corrida que se está transmitiendo; una nueva cancela la anterior
+        self.dsolve_task = None  # dsolve en curso (otro proceso)
+        self.sweep_id = 0  # barrido en curso; cancelar o lanzar otro lo invalida
+        self.convergence_id = 0  # estudio de convergencia en curso; pedir otro lo invalida
+        self.convergence_gen = None
+        self.sweep_gen = None
+        self.sweep_result = None
         self.show_rk4_table = tk.BooleanVar(value=False)
 
         # Variables
@@ -21,6 +46,13 @@ class RungeKuttaPro:
         self.t_end = tk.DoubleVar(value=5.0)
         self.h = tk.DoubleVar(value=0.1)
         self.method = tk.StringVar(value="RK4")
+        self.rtol = tk.DoubleVar(value=1e-6)  # tolerancias del método adaptativo (DOPRI54)
+        self.atol = tk.DoubleVar(value=1e-9)
+        self.step_stats = tk.StringVar(value="")
+        self.t_query = tk.DoubleVar(value=2.5)  # t donde se evalúa la salida densa
+        self.event_str = tk.StringVar(value="")  # g(t,y): se registran los cruces g = 0
+        self.event_terminal = tk.BooleanVar(value=False)
+        self.sweep_str = tk.StringVar(value="y0=0:2:9")  # p.ej. y0=0:2:9; k=0.5,1,2
 
         self.create_widgets()
 
@@ -40,7 +72,7 @@ class RungeKuttaPro:
         tk.Label(frame_in, text="h").grid(row=0,column=8)
         tk.Entry(frame_in,textvariable=self.h,width=6).grid(row=0,column=9)
         tk.Label(frame_in, text="Método").grid(row=0,column=10)
-        ttk.Combobox(frame_in,textvariable=self.method, values=["Euler","Heun","Midpoint","RK2","Ralston","RK4"],width=10).grid(row=0,column=11)
+        ttk.Combobox(frame_in,textvariable=self.method, values=nombres_metodos()+nombres_adaptativos(),width=10).grid(row=0,column=11)
         tk.Checkbutton(frame_in,text="Mostrar Pendientes RK4",variable=self.show_rk4_table).grid(row=0,column=12)
 
         tk.Button(frame_in,text="Calcular",bg="#4CAF50",fg="white",command=self.solve).grid(row=0,column=13,padx=3)
@@ -49,6 +81,24 @@ class RungeKuttaPro:
         tk.Button(frame_in,text="Calcular Solución Analítica",bg="#9C27B0",fg="white",command=self.calc_analytical).grid(row=0,column=16,padx=3)
         tk.Button(frame_in,text="Graficar Todos los Métodos",bg="#FF5722",fg="white",command=self.compare_methods).grid(row=0,column=17,padx=3)
         tk.Button(frame_in,text="Tabla Comparativa",bg="#9E9E9E",fg="white",command=self.generate_comparative_table).grid(row=0,column=18,padx=3)
+        tk.Button(frame_in,text="Estudio de Convergencia",bg="#607D8B",fg="white",command=self.convergence_study).grid(row=0,column=19,padx=3)
+
+        tk.Label(frame_in, text="Evento g(t,y)=").grid(row=1,column=0)
+        tk.Entry(frame_in,textvariable=self.event_str,width=15).grid(row=1,column=1)
+        tk.Checkbutton(frame_in,text="Detener",variable=self.event_terminal).grid(row=1,column=2,columnspan=2)
+        tk.Label(frame_in, text="t*").grid(row=1,column=4)
+        tk.Entry(frame_in,textvariable=self.t_query,width=6).grid(row=1,column=5)
+        tk.Button(frame_in,text="Evaluar y(t*)",command=self.evaluate_at).grid(row=1,column=6,columnspan=2,padx=3)
+        tk.Label(frame_in, text="rtol").grid(row=1,column=8)
+        tk.Entry(frame_in,textvariable=self.rtol,width=6).grid(row=1,column=9)
+        tk.Label(frame_in, text="atol").grid(row=1,column=10)
+        tk.Entry(frame_in,textvariable=self.atol,width=10).grid(row=1,column=11)
+        tk.Label(frame_in,textvariable=self.step_stats,fg="#555555").grid(row=1,column=12,columnspan=7,sticky="w")
+
+        tk.Label(frame_in, text="Barrido").grid(row=2,column=0)
+        tk.Entry(frame_in,textvariable=self.sweep_str,width=30).grid(row=2,column=1,columnspan=3,sticky="w")
+        tk.Button(frame_in,text="Barrido de Parámetros",bg="#009688",fg="white",command=self.run_sweep).grid(row=2,column=4,columnspan=3,padx=3)
+        tk.Button(frame_in,text="Cancelar",command=self.cancel_sweep).grid(row=2,column=7,padx=3)
 
         # --- PanedWindow principal ---
         self.paned = tk.PanedWindow(self.root, orient="horizontal", sashrelief="sunken")
@@ -61,34 +111,21 @@ class RungeKuttaPro:
         # Tabla normal
         self.table_frame = tk.Frame(self.tab_frame)
         self.tab_frame.add(self.table_frame,text="Tabla Normal")
-        self.table_scroll = ttk.Scrollbar(self.table_frame, orient="horizontal")
-        self.table_scroll.pack(side="bottom",fill="x")
-        self.table = ttk.Treeview(self.table_frame, columns=("n","t","y_num","y_exact","Error"),
-                                  show="headings", height=12, xscrollcommand=self.table_scroll.set)
+        self.table = TablaVirtual(self.table_frame, height=12)
         self.table.pack(fill="both", expand=True)
-        self.table_scroll.config(command=self.table.xview)
-        headers = ["n","t","y_num","y_exact","Error"]
-        for h in headers: self.table.heading(h,text=h); self.table.column(h,width=100,anchor="center")
+        self.table.configurar(["n","t","y_num","y_exact","Error"], lambda inicio, fin: [])
 
         # Tabla comparativa
         self.comp_frame = tk.Frame(self.tab_frame)
         self.tab_frame.add(self.comp_frame,text="Tabla Comparativa")
-        self.comp_scroll = ttk.Scrollbar(self.comp_frame, orient="horizontal")
-        self.comp_scroll.pack(side="bottom",fill="x")
-        self.comp_table = ttk.Treeview(self.comp_frame, show="headings", height=12, xscrollcommand=self.comp_scroll.set)
+        self.comp_table = TablaVirtual(self.comp_frame, height=12, ancho_columna=100)
         self.comp_table.pack(fill="both", expand=True)
-        self.comp_table.configure(xscrollcommand=self.comp_scroll.set)
-        self.comp_scroll.config(command=self.comp_table.xview)
 
         # Tabla RK4 pendientes
         self.rk4_frame = tk.Frame(self.tab_frame)
         self.tab_frame.add(self.rk4_frame,text="Pendientes RK4")
-        self.rk4_scroll = ttk.Scrollbar(self.rk4_frame, orient="horizontal")
-        self.rk4_scroll.pack(side="bottom",fill="x")
-        self.rk4_table = ttk.Treeview(self.rk4_frame, show="headings", height=12, xscrollcommand=self.rk4_scroll.set)
+        self.rk4_table = TablaVirtual(self.rk4_frame, height=12, ancho_columna=100)
         self.rk4_table.pack(fill="both", expand=True)
-        self.rk4_table.configure(xscrollcommand=self.rk4_scroll.set)
-        self.rk4_scroll.config(command=self.rk4_table.xview)
 
         # --- Panel Gráfica ---
         self.plot_frame = tk.Frame(self.paned)
@@ -109,84 +146,305 @@ class RungeKuttaPro:
         self.canvas_analytic.get_tk_widget().pack(fill="both", expand=True)
 
     # --- Funciones ---
-    def f(self,t,y):
-        t_sym,y_sym = sp.symbols("t y")
-        expr = sp.sympify(self.func_str.get())
-        f_lamb = sp.lambdify((t_sym,y_sym),expr,"numpy")
-        return f_lamb(t,y)
+    def compile_rhs(self):
+        """Compila f(t,y) una sola vez por corrida; el bucle de pasos usa la función ya compilada"""
+        antes = estadisticas_cache()["compilaciones"]
+        f = compilar_sympy(self.func_str.get())
+        self.recompilaciones = estadisticas_cache()["compilaciones"] - antes
+        return f
+
+    def run_key(self):
+        return (self.func_str.get().strip(), self.t0.get(), self.y0.get(), self.t_end.get(), self.h.get())
+
+    def run_all_methods(self):
+        """
+        Todos los métodos de paso fijo en una sola pasada del motor.
+        Cacheado por (expr, t0, y0, t_end, h): la gráfica, la tabla comparativa y las
+        tablas detalladas reutilizan la misma corrida mientras no cambien los parámetros
+        (solve deja en la caché la corrida que transmite, al terminarla).
+        """
+        key = self.run_key()
+        return self._cached(key, lambda f: comparar_metodos(f, *key[1:], nombres_metodos()))
+
+    def run_adaptive(self, method):
+        key = self.run_key() + (method, self.rtol.get(), self.atol.get())
+        t0, y0, t_end, h = key[1:5]
+        # Se guardan las 7 k de cada paso: la salida densa de Dormand-Prince no vuelve a evaluar f
+        return self._cached(key, lambda f: integrar_adaptativo(f, t0, y0, t_end, method,
+                                                              rtol=key[6], atol=key[7], h0=h,
+                                                              guardar_pendientes=True))
+
+    def _cached(self, key, calcular):
+        if key in self.results_cache:
+            self.recompilaciones = 0
+            return self.results_cache[key]
+        res = calcular(self.compile_rhs())
+        self._store(key, res)
+        return res
+
+    def _store(self, key, res):
+        if len(self.results_cache) >= self.MAX_RESULTADOS:
+            self.results_cache.pop(next(iter(self.results_cache)))
+        self.results_cache[key] = res
+
+    def exact_values(self, t_values):
+        """y exacta sobre todo el vector de tiempos en un solo llamado; None si no hay solución o no es real"""
+        if self.solution_func is None:
+            return None
+        t_arr = np.asarray(t_values, dtype=float)
+        try:
+            with np.errstate(all="ignore"):
+                y = np.asarray(self.solution_func(t_arr))
+            if np.iscomplexobj(y):
+                if not np.allclose(y.imag, 0): return None
+                y = y.real
+            return np.broadcast_to(y.astype(float), t_arr.shape)
+        except Exception:
+            return None
 
     def solve(self):
-        self.table.delete(*self.table.get_children())
-        t0, y0, t_end, h = self.t0.get(), self.y0.get(), self.t_end.get(), self.h.get()
+        """
+        Los métodos de paso fijo se integran por bloques (iterar_metodos): entre bloque y
+        bloque Tk atiende eventos, las tablas suman filas y la gráfica se extiende, así una
+        corrida de 10^5-10^6 pasos no congela la ventana. Las tablas solo formatean las
+        filas visibles (TablaVirtual) y las pendientes se recalculan para esas filas.
+        """
+        self.run_id += 1  # cancela la corrida que se esté transmitiendo
+        method = self.method.get()
+        if self.event_str.get().strip():
+            self.solve_with_events(method, self.event_str.get().strip())
+            return
+        if es_adaptativo(method):
+            res = self.run_adaptive(method)
+            self.step_stats.set(res.resumen())
+            self.show_main_table(res.t, res.y, len(res.t), h_steps=res.h)
+            self.start_plot(method, res.t, res.y, compilar_sympy(self.run_key()[0]), res)
+            self.canvas.draw()
+            return
+
+        key = self.run_key()
+        t0, y0, t_end, h = key[1:]
+        cached = self.results_cache.get(key)
+        f = self.compile_rhs() if cached is None else compilar_sympy(key[0])
+        if cached is not None:
+            self.recompilaciones = 0
+            t = cached[method].t
+            ys = {m: r.y for m, r in cached.items()}
+            self.show_run(f, t, ys, method, len(t))
+            self.finish_run(key, t, ys, method)
+            return
+
+        methods = nombres_metodos()
         n_steps = int((t_end-t0)/h)
-        t_values = [t0]; y_values = [y0]
-        rk4_pendientes = []
-
-        t,y = t0,y0
-        for i in range(n_steps):
-            if self.method.get()=="Euler": y+=h*self.f(t,y)
-            elif self.method.get()=="Heun": k1=self.f(t,y); k2=self.f(t+h,y+h*k1); y+=h*(k1+k2)/2
-            elif self.method.get()=="Midpoint": k1=self.f(t,y); k2=self.f(t+h/2,y+h*k1/2); y+=h*k2
-            elif self.method.get()=="RK2": k1=self.f(t,y); k2=self.f(t+h/2,y+h*k1/2); y+=h*k2
-            elif self.method.get()=="Ralston": k1=self.f(t,y); k2=self.f(t+3*h/4, y+3*h*k1/4); y+=h*(k1+k2/3)
-            elif self.method.get()=="RK4":
-                k1=self.f(t,y); k2=self.f(t+h/2, y+h*k1/2)
-                k3=self.f(t+h/2, y+h*k2/2); k4=self.f(t+h, y+h*k3)
-                y_next = y + (h/6)*(k1+2*k2+2*k3+k4)
-                if self.show_rk4_table.get(): rk4_pendientes.append([i,t,y,k1,k2,k3,k4,y_next])
-                y = y_next
-            t+=h; t_values.append(t); y_values.append(y)
+        t = t0 + h*np.arange(n_steps+1)
+        ys = {m: np.empty(n_steps+1) for m in methods}
+        self.show_run(f, t, ys, method, 0)
+        bloques = iterar_metodos(f, t0, y0, t_end, h, methods)
+        self.stream_blocks(self.run_id, bloques, key, t, ys, method)
 
-        # Tabla normal
-        for i,(ti,yi) in enumerate(zip(t_values,y_values)):
-            y_exact_str, err_str = "-", "-"
-            if self.solution_expr is not None:
-                try:
-                    y_exact_val = float(self.solution_expr.subs("t",ti))
-                    err_val = abs(yi-y_exact_val)
-                    y_exact_str = f"{y_exact_val:.6f}"
+    def solve_with_events(self, method, expr):
+        """
+        Corrida del método elegido registrando los cruces g(t,y) = 0 (ubicados dentro del paso
+        con la salida densa). Con "Detener" termina en el primer cruce, sin integrar hasta t_end.
+        """
+        t0, y0, t_end, h = self.run_key()[1:]
+        f = self.compile_rhs()
+        try:
+            evento = Evento(compilar_sympy(expr), expr, terminal=self.event_terminal.get())
+            if es_adaptativo(method):
+                res = integrar_adaptativo(f, t0, y0, t_end, method, rtol=self.rtol.get(), atol=self.atol.get(),
+                                          h0=h, guardar_pendientes=True, eventos=[evento])
+            else:
+                res = integrar_con_eventos(f, t0, y0, t_end, h, [evento], method)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo evaluar el evento: {e}")
+            return
+        self.show_main_table(res.t, res.y, len(res.t), h_steps=getattr(res, "h", None))
+        self.start_plot(method, res.t, res.y, f, res)
+        for cruce in res.eventos:
+            self.ax.axvline(cruce.t, color="r", linestyle=":", linewidth=0.8)
+            self.ax.plot([cruce.t], [cruce.y], "rD", markersize=6)
+        self.canvas.draw()
+        tiempos = ", ".join(f"{c.t:.6g}" for c in res.eventos[:5]) + (" ..." if len(res.eventos) > 5 else "")
+        texto = f"{method}: {len(res.eventos)} cruces de {expr} = 0" + (f" en t = {tiempos}" if res.eventos else "")
+        if res.evento_terminal is not None:
+            texto += f"; detenido en t = {res.evento_terminal.t:.6g} tras {res.pasos} pasos"
+        self.step_stats.set(texto + f", {res.evaluaciones} evaluaciones de f")
+
+    def stream_blocks(self, run_id, bloques, key, t, ys, method):
+        """Avanza un bloque, actualiza tablas y gráfica y se reprograma con root.after"""
+        if run_id != self.run_id:
+            return
+        try:
+            inicio, t_bloque, bloque = next(bloques)
+        except StopIteration:
+            self.finish_run(key, t, ys, method)
+            return
+        fin = inicio + len(t_bloque)
+        for m, y in bloque.items():
+            ys[m][inicio:fin] = y
+        self.extend_run(t, ys, method, fin)
+        self.step_stats.set(f"{method}: calculando... {fin-1} de {len(t)-1} pasos")
+        self.root.after(1, self.stream_blocks, run_id, bloques, key, t, ys, method)
+
+    def show_run(self, f, t, ys, method, count):
+        """Configura las tablas sobre los arrays de la corrida (se llenan a medida que avanza)"""
+        self.show_main_table(t, ys[method], count)
+        if self.show_rk4_table.get() and method=="RK4":
+            self.rk4_table.configurar(["n","t_n","y_n","k1","k2","k3","k4","y_{n+1}"],
+                                      self.slope_rows(f, t, ys["RK4"], "RK4"), max(count-1, 0))
+        self.start_plot(method, t[:count], ys[method][:count])
+        self.canvas.draw()
+
+    def extend_run(self, t, ys, method, count):
+        self.table.agregar_filas(count)
+        tablas = [self.rk4_table] if self.show_rk4_table.get() and method=="RK4" else []
+        for tabla in tablas:
+            tabla.agregar_filas(max(count-1, 0))
+        paso = self.plot_stride(count)
+        self.line.set_data(t[:count:paso], ys[method][:count:paso])
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.canvas.draw_idle()
+
+    def finish_run(self, key, t, ys, method):
+        """Guarda la corrida completa en la caché y deja la gráfica final"""
+        n_steps = len(t)-1
+        if key not in self.results_cache:
+            self._store(key, {m: ResultadoRK(m, t, y, None, evaluaciones_metodo(m, n_steps)) for m, y in ys.items()})
+        res = self.results_cache[key][method]
+        self.step_stats.set(f"{method}: {res.pasos} pasos de h={key[4]}, {res.evaluaciones} evaluaciones de f "
+                            f"({res.evaluaciones_por_paso:.2f} por paso)")
+        self.extend_run(t, ys, method, len(t))
+        self.start_plot(method, t, ys[method], compilar_sympy(key[0]), res)
+        self.canvas.draw()
+
+    def show_main_table(self, t, y, count, h_steps=None):
+        """Tabla normal (exacta y errores por bloque de filas visibles); en modo adaptativo agrega h_n"""
+        cols = ["n","t","y_num","y_exact","Error"] + (["h_n"] if h_steps is not None else [])
+        def filas(inicio, fin):
+            y_exact = self.exact_values(t[inicio:fin])
+            rows = []
+            for i in range(inicio, fin):
+                y_exact_str, err_str = "-", "-"
+                if y_exact is not None:
+                    err_val = abs(y[i] - y_exact[i-inicio])
+                    y_exact_str = f"{y_exact[i-inicio]:.6f}"
                     err_str = f"{err_val:.6e}" if err_val<1e-6 else f"{err_val:.6f}"
-                except: pass
-            self.table.insert("", "end", values=(i,f"{ti:.3f}",f"{yi:.6f}",y_exact_str,err_str))
+                if h_steps is None:
+                    rows.append((i,f"{t[i]:.3f}",f"{y[i]:.6f}",y_exact_str,err_str))
+                else:
+                    rows.append((i,f"{t[i]:.5f}",f"{y[i]:.6f}",y_exact_str,err_str,f"{h_steps[i-1]:.4e}" if i else "-"))
+            return rows
+        self.table.configurar(cols, filas, count)
 
-        # Tabla RK4 pendientes
-        if self.show_rk4_table.get() and rk4_pendientes:
-            self.rk4_table.delete(*self.rk4_table.get_children())
-            cols = ["n","t_n","y_n","k1","k2","k3","k4","y_{n+1}"]
-            self.rk4_table["columns"] = cols
-            for c in cols:
-                self.rk4_table.heading(c,text=c)
-                self.rk4_table.column(c,width=100,anchor="center")
-            for row in rk4_pendientes:
-                self.rk4_table.insert("", "end", values=[f"{v:.6f}" if isinstance(v,float) else v for v in row])
-
-        # Gráfica
+    def slope_rows(self, f, t, y, method):
+        """Filas [n, t_n, y_n, k1..ks, y_{n+1}] de los pasos pedidos; las k se recalculan solo para esas filas"""
+        def filas(inicio, fin):
+            K = pendientes_en(f, t, y, method, inicio, fin)
+            rows = []
+            for i in range(inicio, fin):
+                k = K[i-inicio]
+                rows.append([i] + [f"{v:.6f}" for v in (t[i], y[i], *k, y[i+1])])
+            return rows
+        return filas
+
+    def plot_stride(self, n):
+        return max(1, -(-n // self.MAX_PUNTOS_GRAFICO))
+
+    def plot_solution(self, f, res, label, marker="o"):
+        """
+        Pasos del método como puntos y, si son pocos, la curva entre ellos por salida densa
+        (SalidaDensa): una corrida de paso grueso se ve suave sin volver a integrar.
+        """
+        paso = self.plot_stride(len(res.t))
+        if res.pasos >= self.PUNTOS_DENSOS:
+            linea, = self.ax.plot(res.t[::paso],res.y[::paso],label=label,marker=marker if paso==1 else None,markersize=3)
+            return linea
+        densa = SalidaDensa(f, res)
+        t_fino = np.linspace(res.t[0],res.t[-1],self.PUNTOS_DENSOS)
+        linea, = self.ax.plot(t_fino,densa(t_fino),label=label)
+        self.ax.plot(res.t,res.y,linestyle="none",marker=marker,markersize=4,color=linea.get_color())
+        return linea
+
+    def start_plot(self, method, t, y, f=None, res=None):
+        """Mientras la corrida avanza se grafican los pasos; terminada (f y res), con salida densa"""
         self.ax.clear()
-        self.ax.plot(t_values,y_values,label=self.method.get(),marker="o",markersize=3)
-        if self.solution_expr is not None:
-            t_dense = np.linspace(t0,t_end,200)
-            y_dense = [float(self.solution_expr.subs("t",tt)) for tt in t_dense]
+        if res is not None:
+            self.line = self.plot_solution(f, res, method)
+        else:
+            paso = self.plot_stride(len(t))
+            self.line, = self.ax.plot(t[::paso],y[::paso],label=method,marker="o" if paso==1 else None,markersize=3)
+        t_dense = np.linspace(self.t0.get(),self.t_end.get(),200)
+        y_dense = self.exact_values(t_dense)
+        if y_dense is not None:
             self.ax.plot(t_dense, y_dense, "k--", label="Exacta")
         self.ax.set_title("Solución Numérica vs Analítica")
         self.ax.set_xlabel("t")
         self.ax.set_ylabel("y(t)")
         self.ax.grid(True)
         self.ax.legend()
+
+    def evaluate_at(self):
+        """y(t*) del método elegido sobre la corrida ya calculada, por salida densa (no reintegra)"""
+        method = self.method.get()
+        try:
+            t_q = self.t_query.get()
+            res = self.run_adaptive(method) if es_adaptativo(method) else self.run_all_methods()[method]
+            densa = SalidaDensa(compilar_sympy(self.run_key()[0]), res)
+            y_q = float(densa(t_q))
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        texto = (f"{method}: y({t_q:g}) ≈ {y_q:.8f} (salida densa {densa.tipo}, "
+                 f"{densa.evaluaciones} evaluaciones extra de f)")
+        y_exact = self.exact_values([t_q])
+        if y_exact is not None:
+            texto += f", error {abs(y_q - y_exact[0]):.3e}"
+        self.step_stats.set(texto)
+        self.ax.plot([t_q],[y_q],"r*",markersize=10)
         self.canvas.draw()
 
     def calc_analytical(self):
+        """
+        dsolve corre en otro proceso con tiempo límite (solucion_analitica.py) y se consulta con
+        root.after, así la ventana sigue respondiendo. Un problema ya resuelto (misma expresión,
+        t0 e y0) sale de la caché en disco sin volver a llamar a dsolve.
+        """
+        if self.dsolve_task is not None:
+            self.dsolve_task.cancelar()
+        self.solution_expr = None
+        self.solution_func = None
+        self.dsolve_task = TareaDsolve(self.func_str.get(), self.t0.get(), self.y0.get(), self.TIEMPO_DSOLVE)
+        if not self.dsolve_task.terminada():
+            self.ax_analytic.clear()
+            self.ax_analytic.text(0.5,0.5,"Resolviendo con dsolve...",fontsize=14,verticalalignment="center",horizontalalignment="center")
+            self.ax_analytic.axis("off")
+            self.canvas_analytic.draw()
+        self.poll_analytical(self.dsolve_task)
+
+    def poll_analytical(self, tarea):
+        if tarea is not self.dsolve_task:
+            return  # se pidió otra solución mientras tanto
+        if not tarea.terminada():
+            self.root.after(100, self.poll_analytical, tarea)
+            return
+        self.dsolve_task = None
+        res = tarea.resultado()
         self.ax_analytic.clear()
-        t_sym = sp.symbols("t")
-        y_func = sp.Function("y")
-        try:
-            ode = sp.Eq(sp.Derivative(y_func(t_sym),t_sym), sp.sympify(self.func_str.get()).subs({"y":y_func(t_sym)}))
-            sol = sp.dsolve(ode,ics={y_func(self.t0.get()):self.y0.get()})
-            self.solution_expr = sol.rhs
-            sol_latex = sp.latex(sol)
-            self.ax_analytic.text(0.01,0.5,r"$"+sol_latex+"$",fontsize=16,verticalalignment="center",horizontalalignment="left")
-        except:
-            self.solution_expr = None
-            self.ax_analytic.text(0.5,0.5,"No tiene solución analítica",fontsize=16,verticalalignment="center",horizontalalignment="center")
+        mensaje = "No tiene solución analítica"
+        if res.estado == OK:
+            try:
+                self.solution_func = res.funcion()
+                self.solution_expr = res.solucion
+                self.ax_analytic.text(0.01,0.5,r"$"+sp.latex(res.ecuacion())+"$",fontsize=16,verticalalignment="center",horizontalalignment="left")
+                mensaje = None
+            except Exception:
+                self.solution_func = None
+        elif res.estado == TIEMPO_AGOTADO:
+            mensaje = f"dsolve no terminó en {self.TIEMPO_DSOLVE:g} s: se abandonó"
+        if mensaje:
+            self.ax_analytic.text(0.5,0.5,mensaje,fontsize=16,verticalalignment="center",horizontalalignment="center")
         self.ax_analytic.axis("off")
         self.canvas_analytic.draw()
 
@@ -198,32 +456,59 @@ Métodos disponibles:
 2. Heun: Predictor-Corrector: y_{n+1} = y_n + h*(k1+k2)/2
 3. Midpoint: y_{n+1} = y_n + h*f(t_n + h/2, y_n + h*k1/2)
 4. RK2: y_{n+1} = y_n + h*k2
-5. Ralston: y_{n+1} = y_n + h*(k1 + k2/3)
+5. Ralston: y_{n+1} = y_n + h*(k1/3 + 2*k2/3), k2 en t_n + 3h/4
 6. RK4: y_{n+1} = y_n + h*(k1+2k2+2k3+k4)/6
+7. AB2, AB3, AB4: Adams-Bashforth de 2, 3 y 4 pasos,
+   ej. AB2: y_{n+1} = y_n + h*(3f_n - f_{n-1})/2
+   Reutilizan los f de pasos anteriores: 1 evaluación de f por paso.
+8. ABM4: predictor AB4 + corrector Adams-Moulton
+   y_{n+1} = y_n + h*(9f*_{n+1} + 19f_n - 5f_{n-1} + f_{n-2})/24
+   2 evaluaciones por paso (RK4 usa 4). Los multipaso arrancan con RK4.
+9. DOPRI54 (adaptativo): Dormand-Prince 5(4). Compara dos soluciones
+   (orden 5 y 4) con las mismas etapas; si la diferencia supera
+   atol + rtol*|y| rechaza el paso y lo achica, si sobra lo agranda.
+   h se usa solo como paso inicial; la tabla lista los pasos aceptados.
+
+Salida densa: con pocos pasos, la curva entre ellos no es una recta
+sino el interpolante del método (extensión continua de RK4, de
+Dormand-Prince o cúbica de Hermite con y y f en los extremos del paso).
+"Evaluar y(t*)" da la solución en cualquier t sin volver a integrar.
+
+Eventos: si se escribe g(t,y) (p.ej. y - 2), se marcan los instantes en
+que g cruza por cero, ubicados dentro del paso con la salida densa.
+Con "Detener" la integración termina en el primer cruce.
+
+Estudio de Convergencia: resuelve la misma EDO con h, h/2, ..., h/32
+(en procesos paralelos) y ajusta el orden observado p de cada método
+(error ~ C h^p). Richardson combina dos niveles, y_h/2 + (y_h/2 - y_h)/(2^p - 1),
+y de ahí sale también una estimación del error sin usar la exacta.
+
+Barrido de Parámetros: f puede tener parámetros con nombre (p.ej. k*(t - y))
+y el barrido recorre todas las combinaciones de valores, p.ej.
+"y0=0:2:9; k=0.5,1,2" (a:b:n son n valores de a a b). Muestra y(t_end) vs
+parámetro (mapa de color con dos), las trayectorias y una tabla por caso.
 
 Donde k1,k2,k3,k4 son pendientes intermedias.
+Todos usan el mismo motor (motor_rk.py) definido por tablas de Butcher;
+registrar_metodo agrega tablas propias a la lista.
 """
         messagebox.showinfo("Ayuda - Métodos Runge-Kutta", help_text)
 
     def compare_methods(self):
-        methods = ["Euler","Heun","Midpoint","RK2","Ralston","RK4"]
-        t0,y0,t_end,h = self.t0.get(),self.y0.get(),self.t_end.get(),self.h.get()
+        t0,t_end = self.t0.get(),self.t_end.get()
+        results = self.run_all_methods()
+        f = compilar_sympy(self.run_key()[0])
         self.ax.clear()
-        for method in methods:
-            t,y = t0,y0; t_vals=[t0]; y_vals=[y0]
-            n_steps = int((t_end-t0)/h)
-            for _ in range(n_steps):
-                if method=="Euler": y+=h*self.f(t,y)
-                elif method=="Heun": k1=self.f(t,y); k2=self.f(t+h,y+h*k1); y+=h*(k1+k2)/2
-                elif method=="Midpoint": k1=self.f(t,y); k2=self.f(t+h/2,y+h*k1/2); y+=h*k2
-                elif method=="RK2": k1=self.f(t,y); k2=self.f(t+h/2,y+h*k1/2); y+=h*k2
-                elif method=="Ralston": k1=self.f(t,y); k2=self.f(t+3*h/4, y+3*h*k1/4); y+=h*(k1+k2/3)
-                elif method=="RK4": k1=self.f(t,y); k2=self.f(t+h/2, y+h*k1/2); k3=self.f(t+h/2, y+h*k2/2); k4=self.f(t+h, y+h*k3); y+=h*(k1+2*k2+2*k3+k4)/6
-                t+=h; t_vals.append(t); y_vals.append(y)
-            self.ax.plot(t_vals,y_vals,label=method,marker="o",markersize=3)
-        if self.solution_expr is not None:
-            t_dense = np.linspace(t0,t_end,200)
-            y_dense = [float(self.solution_expr.subs("t",tt)) for tt in t_dense]
+        for method,res in results.items():
+            self.plot_solution(f, res, f"{method} ({res.evaluaciones_por_paso:.2f} f/paso)")
+        # Los adaptativos eligen su propia grilla: se marcan los pasos aceptados
+        for method in nombres_adaptativos():
+            res = self.run_adaptive(method)
+            self.plot_solution(f, res, f"{method} ({res.aceptados} pasos)", marker="x")
+            self.step_stats.set(res.resumen())
+        t_dense = np.linspace(t0,t_end,200)
+        y_dense = self.exact_values(t_dense)
+        if y_dense is not None:
             self.ax.plot(t_dense,y_dense,"k--",label="Exacta")
         self.ax.set_title("Soluciones Numéricas de Todos los Métodos")
         self.ax.set_xlabel("t")
@@ -233,46 +518,203 @@ Donde k1,k2,k3,k4 son pendientes intermedias.
         self.canvas.draw()
 
     def generate_comparative_table(self):
-        self.comp_table.delete(*self.comp_table.get_children())
-        cols=["n","t","Euler","Error_Euler","Heun","Error_Heun","Midpoint","Error_Midpoint",
-              "RK2","Error_RK2","Ralston","Error_Ralston","RK4","Error_RK4","Exacta"]
-        self.comp_table["columns"]=cols
-        for c in cols:
-            self.comp_table.heading(c,text=c)
-            self.comp_table.column(c,width=100,anchor="center")
-
-        t0,y0,t_end,h=self.t0.get(),self.y0.get(),self.t_end.get(),self.h.get()
-        n_steps=int((t_end-t0)/h)
-        t_values=[t0 + i*h for i in range(n_steps+1)]
-        exact_values=[float(self.solution_expr.subs("t",ti)) if self.solution_expr else "-" for ti in t_values]
-        methods=["Euler","Heun","Midpoint","RK2","Ralston","RK4"]
-        results={m:[] for m in methods}
-
-        for method in methods:
-            t,y=t0,y0
-            ys=[y0]
-            for _ in range(n_steps):
-                if method=="Euler": y+=h*self.f(t,y)
-                elif method=="Heun": k1=self.f(t,y); k2=self.f(t+h,y+h*k1); y+=h*(k1+k2)/2
-                elif method=="Midpoint": k1=self.f(t,y); k2=self.f(t+h/2,y+h*k1/2); y+=h*k2
-                elif method=="RK2": k1=self.f(t,y); k2=self.f(t+h/2,y+h*k1/2); y+=h*k2
-                elif method=="Ralston": k1=self.f(t,y); k2=self.f(t+3*h/4, y+3*h*k1/4); y+=h*(k1+k2/3)
-                elif method=="RK4": k1=self.f(t,y); k2=self.f(t+h/2,y+h*k1/2); k3=self.f(t+h/2,y+h*k2/2); k4=self.f(t+h,y+h*k3); y+=h*(k1+2*k2+2*k3+k4)/6
-                t+=h; ys.append(y)
-            results[method]=ys
-
-        for i,ti in enumerate(t_values):
-            row=[i,f"{ti:.3f}"]
-            for m in methods:
-                yi=results[m][i]
-                row.append(f"{yi:.6f}")
-                if exact_values[i]!="-":
-                    err=abs(yi-exact_values[i])
-                    row.append(f"{err:.6e}" if err<1e-6 else f"{err:.6f}")
-                else:
-                    row.append("-")
-            row.append(f"{exact_values[i]}" if exact_values[i]!="- " else "-")
-            self.comp_table.insert("", "end", values=row)
+        methods=nombres_metodos()
+        cols=["n","t"]+[c for m in methods for c in (m,"Error_"+m)]+["Exacta"]
+        runs=self.run_all_methods()
+        t_values=runs[methods[0]].t
+        n=len(t_values)
+
+        def filas(inicio, fin):
+            # Solo las filas visibles: exacta y errores de ese bloque
+            exact=self.exact_values(t_values[inicio:min(fin,n)])
+            rows=[]
+            for i in range(inicio,min(fin,n)):
+                row=[i,f"{t_values[i]:.3f}"]
+                ex=float(exact[i-inicio]) if exact is not None else "-"
+                for m in methods:
+                    yi=runs[m].y[i]
+                    row.append(f"{yi:.6f}")
+                    if ex!="-":
+                        err=abs(yi-ex)
+                        row.append(f"{err:.6e}" if err<1e-6 else f"{err:.6f}")
+                    else:
+                        row.append("-")
+                row.append(f"{ex}")
+                rows.append(row)
+            if fin>n:
+                # Costo de cada método: evaluaciones de f por paso (RK4 = 4, AB = 1, ABM = 2 más el arranque)
+                row=["f/paso",""]
+                for m in methods:
+                    row += [f"{runs[m].evaluaciones_por_paso:.2f}",""]
+                rows.append(row+[""])
+            return rows
+
+        self.comp_table.configurar(cols, filas, n+1)
+
+    def convergence_study(self):
+        """
+        Orden de convergencia observado de todos los métodos: la misma EDO con h, h/2, ..., en
+        procesos paralelos (convergencia.py). El avance se consulta con root.after, como el
+        barrido, así la ventana sigue respondiendo; pedir otro estudio abandona el anterior.
+        """
+        t0, y0, t_end, h = self.run_key()[1:]
+        exacta = self.exact_values if self.exact_values(np.linspace(t0, t_end, 5)) is not None else None
+        try:
+            gen = iterar_convergencia(self.func_str.get().strip(), t0, y0, t_end, h,
+                                      niveles=self.NIVELES_CONVERGENCIA, exacta=exacta)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo armar el estudio: {e}")
+            return
+        if self.convergence_gen is not None:
+            self.convergence_gen.close()  # las corridas pendientes del estudio anterior no se ejecutan
+        self.convergence_id += 1
+        self.convergence_gen = gen
+        self.step_stats.set("Estudio de convergencia: iniciando")
+        self.root.after(1, self.stream_convergence, self.convergence_id, gen)
+
+    def stream_convergence(self, convergence_id, gen):
+        if convergence_id != self.convergence_id:
+            return
+        try:
+            hechas, total, estudio = next(gen)
+        except Exception as e:
+            self.convergence_gen = None
+            messagebox.showerror("Error", f"No se pudo completar el estudio: {e}")
+            return
+        if estudio is None:
+            self.step_stats.set(f"Estudio de convergencia: {hechas} de {total} corridas")
+            self.root.after(1, self.stream_convergence, convergence_id, gen)
+            return
+        self.convergence_gen = None
+        self.step_stats.set(f"Estudio de convergencia: referencia {estudio.referencia}, "
+                            f"h de {estudio.h[0]:.4g} a {estudio.h[-1]:.4g}")
+        self.show_convergence(estudio)
+
+    def show_convergence(self, estudio):
+        """Error vs h y error vs evaluaciones de f, y tabla de orden teórico, observado y Richardson"""
+        win = tk.Toplevel(self.root)
+        win.title("Estudio de Convergencia")
+        fig, (ax_h, ax_f) = plt.subplots(1, 2, figsize=(12, 4.5))
+        for m in estudio.metodos:
+            linea, = ax_h.loglog(estudio.h, estudio.errores[m], "o-", markersize=3,
+                                 label=f"{m} (p obs. {estudio.orden_observado[m]:.2f})")
+            ax_f.loglog(estudio.evaluaciones[m], estudio.errores[m], "o-", markersize=3, color=linea.get_color(), label=m)
+        ax_h.set_title("Error global vs h")
+        ax_h.set_xlabel("h")
+        ax_f.set_title("Error global vs costo")
+        ax_f.set_xlabel("evaluaciones de f")
+        for ax in (ax_h, ax_f):
+            ax.set_ylabel("error máximo")
+            ax.grid(True, which="both", alpha=0.3)
+        ax_h.legend(fontsize=7)
+        fig.tight_layout()
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        canvas.draw()
+
+        filas = [(m, p, f"{p_obs:.2f}", f"{err:.3e}", f"{err_r:.3e}", f"{est:.3e}", ev)
+                 for m, p, p_obs, err, err_r, est, ev in estudio.filas()]
+        tabla = TablaVirtual(win, height=len(filas), ancho_columna=130)
+        tabla.pack(fill="x")
+        tabla.configurar(["Método","p teórico","p observado","Error (h mín)","Error Richardson",
+                          "Estimación Richardson","Evaluaciones f"], lambda inicio, fin: filas[inicio:fin], len(filas))
+
+    def run_sweep(self):
+        """
+        Barrido de y0 y de parámetros con nombre de f, p.ej. f = k*(t - y) con "y0=0:2:5; k=0.5,1,2"
+        (a:b:n son n valores de a a b). Los casos se integran vectorizados o repartidos en procesos
+        (barrido.py); el avance se muestra con root.after y "Cancelar" deja los casos ya hechos.
+        """
+        t0, y0, t_end, h = self.run_key()[1:]
+        try:
+            gen = iterar_barrido(self.func_str.get().strip(), t0, t_end, h, interpretar_rangos(self.sweep_str.get()),
+                                 y0=y0, metodo=self.method.get())
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo armar el barrido: {e}")
+            return
+        self.cancel_sweep(mostrar=False)
+        self.sweep_id += 1
+        self.sweep_gen = gen
+        self.sweep_result = None
+        self.root.after(1, self.stream_sweep, self.sweep_id, gen)
+
+    def stream_sweep(self, sweep_id, gen):
+        if sweep_id != self.sweep_id:
+            return
+        try:
+            hechos, total, res = next(gen)
+        except Exception as e:
+            self.sweep_gen = None
+            messagebox.showerror("Error", f"El barrido falló: {e}")
+            return
+        self.sweep_result = res
+        modo = "vectorizado" if res.vectorizado else "en procesos"
+        self.step_stats.set(f"Barrido {modo}: {hechos} de {total} casos")
+        if hechos < total:
+            self.root.after(1, self.stream_sweep, sweep_id, gen)
+        else:
+            self.sweep_gen = None
+            self.show_sweep(res)
+
+    def cancel_sweep(self, mostrar=True):
+        """Detiene el barrido en curso (las tareas pendientes del pool no se ejecutan)"""
+        if self.sweep_gen is None:
+            return
+        self.sweep_id += 1
+        self.sweep_gen.close()
+        self.sweep_gen = None
+        res = self.sweep_result
+        if mostrar and res is not None and res.completos.any():
+            self.step_stats.set(f"Barrido cancelado: {int(res.completos.sum())} de {res.casos} casos")
+            self.show_sweep(res)
+
+    def show_sweep(self, res):
+        """Estado final vs parámetro (mapa de color si se barren dos), trayectorias y tabla de casos"""
+        win = tk.Toplevel(self.root)
+        win.title(f"Barrido de Parámetros - {res.metodo}")
+        fig, (ax_p, ax_t) = plt.subplots(1, 2, figsize=(12, 4.5))
+        ok = res.completos
+        variables = [i for i, n in enumerate(res.forma) if n > 1] or [res.nombres.index("y0")]
+        x = res.valores[:, variables[0]]
+        if len(variables) == 2 and ok.all():
+            malla = [res.valores[:, i].reshape(res.forma).squeeze() for i in variables]
+            im = ax_p.pcolormesh(malla[1], malla[0], res.final.reshape(res.forma).squeeze(), shading="auto")
+            fig.colorbar(im, ax=ax_p, label="y(t_end)")
+            ax_p.set_xlabel(res.nombres[variables[1]])
+        elif len(variables) >= 2:
+            sc = ax_p.scatter(x[ok], res.final[ok], c=res.valores[ok, variables[1]], s=10)
+            fig.colorbar(sc, ax=ax_p, label=res.nombres[variables[1]])
+            ax_p.set_ylabel("y(t_end)")
+        else:
+            orden = np.argsort(x[ok])
+            ax_p.plot(x[ok][orden], res.final[ok][orden], "o-", markersize=3)
+            ax_p.set_ylabel("y(t_end)")
+        if not (len(variables) == 2 and ok.all()):
+            ax_p.set_xlabel(res.nombres[variables[0]])
+        else:
+            ax_p.set_ylabel(res.nombres[variables[0]])
+        ax_p.set_title("Estado final vs parámetro")
+        casos = np.flatnonzero(ok)
+        paso = max(1, -(-len(casos) // self.MAX_TRAYECTORIAS))
+        tramo = self.plot_stride(len(res.t))
+        for i in casos[::paso]:
+            ax_t.plot(res.t[::tramo], res.trayectorias[i, ::tramo], linewidth=0.8)
+        ax_t.set_title(f"Trayectorias ({len(casos[::paso])} de {res.casos})")
+        ax_t.set_xlabel("t")
+        ax_t.set_ylabel("y(t)")
+        for ax in (ax_p, ax_t):
+            ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        canvas.draw()
+
+        columnas, datos = res.tabla()
+        tabla = TablaVirtual(win, height=10, ancho_columna=110)
+        tabla.pack(fill="x")
+        tabla.configurar(["caso"] + columnas,
+                         lambda inicio, fin: [[int(i)] + [f"{v:.6g}" for v in datos[i]] for i in casos[inicio:fin]],
+                         len(casos))
 
 if __name__=="__main__":
     root = tk.Tk()
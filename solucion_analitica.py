@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Solución analítica de y' = f(t, y), y(t0) = y0 con sympy.dsolve fuera de la interfaz.
+
+- dsolve corre en un proceso aparte con tiempo límite: si se cuelga, el
+  proceso se termina y la ventana nunca queda bloqueada. TareaDsolve se
+  consulta sin esperar (terminada()), para usarla con root.after.
+- Cada resultado (solución, sin solución o tiempo agotado) se guarda en disco
+  por (expresión, t0, y0): volver a abrir un problema ya resuelto es
+  inmediato. Un tiempo agotado se reintenta solo con un límite mayor.
+- Entre procesos y en el archivo la solución viaja como sp.srepr (texto que
+  sympify reconstruye exacto).
+
+Requisitos: sympy
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from typing import Optional
+
+import sympy as sp
+
+RUTA_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "modelado_simulacion", "dsolve.json")
+MAX_ENTRADAS = 512
+TIEMPO_LIMITE = 20.0  # segundos
+
+OK, SIN_SOLUCION, TIEMPO_AGOTADO, ERROR = "ok", "sin solución", "tiempo agotado", "error"
+
+
+def _clave(expr: str, t0: float, y0: float) -> str:
+    return repr((expr.strip(), float(t0), float(y0)))
+
+
+def _leer_cache(ruta: str) -> dict:
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_en_cache(ruta: str, clave: str, entrada: dict):
+    """Agrega la entrada (descarta las más viejas pasado MAX_ENTRADAS) y reescribe el archivo de forma atómica."""
+    cache = _leer_cache(ruta)
+    cache.pop(clave, None)
+    cache[clave] = entrada
+    while len(cache) > MAX_ENTRADAS:
+        cache.pop(next(iter(cache)))
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(cache, archivo, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    except OSError:
+        pass  # sin disco escribible la caché simplemente no persiste
+
+
+def limpiar_cache(ruta: str = RUTA_CACHE):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+def _dsolve_en_proceso(expr: str, t0: float, y0: float, conexion):
+    """Cuerpo del proceso hijo: envía (estado, srepr de la solución o mensaje)."""
+    try:
+        t = sp.symbols("t")
+        y = sp.Function("y")
+        ode = sp.Eq(sp.Derivative(y(t), t), sp.sympify(expr).subs({"y": y(t)}))
+        sol = sp.dsolve(ode, ics={y(t0): y0})
+        if isinstance(sol, list):  # varias ramas: se usa la primera
+            sol = sol[0]
+        conexion.send((OK, sp.srepr(sol.rhs)))
+    except Exception as e:
+        conexion.send((SIN_SOLUCION, f"{type(e).__name__}: {e}"))
+    finally:
+        conexion.close()
+
+
+class ResultadoDsolve:
+    """
+    - estado: OK, SIN_SOLUCION, TIEMPO_AGOTADO o ERROR
+    - solucion: lado derecho y(t) = ... como expresión sympy (None si no hay)
+    - desde_cache: True si salió del archivo sin lanzar dsolve
+    """
+
+    def __init__(self, estado: str, solucion: Optional[sp.Expr], mensaje: str = "",
+                 desde_cache: bool = False, segundos: float = 0.0):
+        self.estado = estado
+        self.solucion = solucion
+        self.mensaje = mensaje
+        self.desde_cache = desde_cache
+        self.segundos = segundos
+
+    def ecuacion(self) -> sp.Eq:
+        """y(t) = solución, para mostrar con sp.latex."""
+        return sp.Eq(sp.Function("y")(sp.symbols("t")), self.solucion)
+
+    def funcion(self):
+        """Solución lambdificada (t -> y) para evaluar sobre arrays de NumPy."""
+        return sp.lambdify(sp.symbols("t"), self.solucion, "numpy")
+
+
+class TareaDsolve:
+    """
+    dsolve de (expr, t0, y0) en otro proceso. Si el problema está en la caché en disco
+    no se lanza nada y la tarea ya nace terminada.
+    """
+
+    def __init__(self, expr: str, t0: float, y0: float, tiempo_limite: float = TIEMPO_LIMITE,
+                 ruta_cache: str = RUTA_CACHE):
+        self.clave = _clave(expr, t0, y0)
+        self.tiempo_limite = tiempo_limite
+        self.ruta_cache = ruta_cache
+        self.inicio = time.monotonic()
+        self._resultado: Optional[ResultadoDsolve] = None
+        self._proceso = None
+        self._conexion = None
+
+        entrada = _leer_cache(ruta_cache).get(self.clave)
+        if entrada is not None and (entrada["estado"] != TIEMPO_AGOTADO or entrada["limite"] >= tiempo_limite):
+            self._resultado = self._desde_entrada(entrada, desde_cache=True)
+            return
+        contexto = multiprocessing.get_context()
+        self._conexion, conexion_hijo = contexto.Pipe(duplex=False)
+        self._proceso = contexto.Process(target=_dsolve_en_proceso, daemon=True,
+                                         args=(expr.strip(), float(t0), float(y0), conexion_hijo))
+        self._proceso.start()
+        conexion_hijo.close()
+
+    @staticmethod
+    def _desde_entrada(entrada: dict, desde_cache: bool = False, segundos: float = 0.0) -> ResultadoDsolve:
+        solucion = sp.sympify(entrada["solucion"]) if entrada["estado"] == OK else None
+        return ResultadoDsolve(entrada["estado"], solucion, entrada.get("mensaje", ""), desde_cache, segundos)
+
+    def _terminar(self, entrada: dict, guardar: bool = True):
+        segundos = time.monotonic() - self.inicio
+        if guardar:
+            _guardar_en_cache(self.ruta_cache, self.clave, entrada)
+        self._resultado = self._desde_entrada(entrada, segundos=segundos)
+        self._conexion.close()
+        if self._proceso.is_alive():
+            self._proceso.terminate()
+        self._proceso.join(1)
+
+    def terminada(self) -> bool:
+        """No bloquea: revisa si el hijo respondió, murió o se pasó del tiempo límite."""
+        if self._resultado is not None:
+            return True
+        if self._conexion.poll():
+            try:
+                estado, dato = self._conexion.recv()
+            except EOFError:
+                estado, dato = ERROR, "el proceso terminó sin responder"
+            if estado == OK:
+                self._terminar({"estado": OK, "solucion": dato})
+            else:
+                self._terminar({"estado": estado, "mensaje": dato}, guardar=estado == SIN_SOLUCION)
+        elif not self._proceso.is_alive():
+            self._terminar({"estado": ERROR, "mensaje": f"el proceso terminó con código {self._proceso.exitcode}"},
+                           guardar=False)
+        elif time.monotonic() - self.inicio > self.tiempo_limite:
+            self._terminar({"estado": TIEMPO_AGOTADO, "limite": self.tiempo_limite,
+                            "mensaje": f"dsolve no terminó en {self.tiempo_limite:g} s"})
+        return self._resultado is not None
+
+    def resultado(self, esperar: bool = True) -> Optional[ResultadoDsolve]:
+        """Con esperar=True bloquea hasta terminar (como mucho el tiempo límite)."""
+        while not self.terminada():
+            if not esperar:
+                return None
+            self._conexion.poll(0.05)
+        return self._resultado
+
+    def cancelar(self):
+        """Abandona la tarea sin guardar nada (p.ej. el usuario cambió la expresión)."""
+        if self._resultado is None and self._proceso is not None:
+            self._terminar({"estado": ERROR, "mensaje": "cancelada"}, guardar=False)
+
+
+def resolver(expr: str, t0: float, y0: float, tiempo_limite: float = TIEMPO_LIMITE,
+             ruta_cache: str = RUTA_CACHE) -> ResultadoDsolve:
+    """Versión bloqueante para scripts: espera el resultado de TareaDsolve."""
+    return TareaDsolve(expr, t0, y0, tiempo_limite, ruta_cache).resultado()
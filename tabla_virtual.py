@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Treeview con ventana virtual para tablas muy largas.
+
+- Solo existen como ítems de Tk las filas que entran en pantalla; al
+  desplazarse (barra, rueda o teclas) se reemplazan por las nuevas.
+- Las filas salen de una función filas(inicio, fin) que formatea a demanda
+  un bloque de arrays NumPy, así una corrida de 10^6 pasos no crea 10^6
+  tuplas de strings ni 10^6 ítems en el Treeview.
+- agregar_filas permite ir llenándola mientras el integrador avanza: solo
+  se redibuja si las filas nuevas caen dentro de la ventana visible.
+
+Requisitos: tkinter
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Sequence
+
+ALTO_FILA = 20  # alto por defecto de una fila de ttk.Treeview (px)
+
+
+class TablaVirtual(tk.Frame):
+    def __init__(self, master, height: int = 12, ancho_columna: int = 100):
+        super().__init__(master)
+        self.visibles = height
+        self.ancho_columna = ancho_columna
+        self.total = 0
+        self.inicio = 0
+        self._filas: Callable[[int, int], List[Sequence]] = lambda inicio, fin: []
+
+        self.yscroll = ttk.Scrollbar(self, orient="vertical", command=self._desplazar)
+        self.xscroll = ttk.Scrollbar(self, orient="horizontal")
+        self.tree = ttk.Treeview(self, show="headings", height=height, xscrollcommand=self.xscroll.set)
+        self.xscroll.config(command=self.tree.xview)
+        self.yscroll.pack(side="right", fill="y")
+        self.xscroll.pack(side="bottom", fill="x")
+        self.tree.pack(fill="both", expand=True)
+
+        self.tree.bind("<MouseWheel>", lambda e: self.ir_a(self.inicio - 3 * (1 if e.delta > 0 else -1)))
+        self.tree.bind("<Button-4>", lambda e: self.ir_a(self.inicio - 3))
+        self.tree.bind("<Button-5>", lambda e: self.ir_a(self.inicio + 3))
+        self.tree.bind("<Prior>", lambda e: self.ir_a(self.inicio - self.visibles))
+        self.tree.bind("<Next>", lambda e: self.ir_a(self.inicio + self.visibles))
+        self.tree.bind("<Home>", lambda e: self.ir_a(0))
+        self.tree.bind("<End>", lambda e: self.ir_a(self.total))
+        self.tree.bind("<Configure>", self._redimensionar)
+
+    # --- Datos ---
+    def configurar(self, columnas: Sequence[str], filas: Callable[[int, int], List[Sequence]], total: int = 0):
+        """Define columnas y fuente de filas; total es la cantidad de filas ya disponibles."""
+        self.tree["columns"] = list(columnas)
+        for c in columnas:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=self.ancho_columna, anchor="center")
+        self._filas = filas
+        self.total = total
+        self.inicio = 0
+        self._mostrar()
+
+    def agregar_filas(self, total: int):
+        """La fuente ahora tiene 'total' filas; redibuja solo si cambia lo que se ve."""
+        anterior, self.total = self.total, total
+        if anterior < self.inicio + self.visibles:
+            self._mostrar()
+        else:
+            self._actualizar_barra()
+
+    def limpiar(self):
+        self.configurar([], lambda inicio, fin: [], 0)
+
+    # --- Ventana visible ---
+    def ir_a(self, inicio: int):
+        inicio = max(0, min(int(inicio), self.total - self.visibles))
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._mostrar()
+        return "break"
+
+    def _mostrar(self):
+        self.tree.delete(*self.tree.get_children())
+        fin = min(self.inicio + self.visibles, self.total)
+        if fin > self.inicio:
+            for fila in self._filas(self.inicio, fin):
+                self.tree.insert("", "end", values=fila)
+        self._actualizar_barra()
+
+    def _actualizar_barra(self):
+        if self.total <= 0:
+            self.yscroll.set(0, 1)
+        else:
+            self.yscroll.set(self.inicio / self.total, min(1.0, (self.inicio + self.visibles) / self.total))
+
+    def _desplazar(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            self.ir_a(round(float(cantidad) * self.total))
+        elif accion == "scroll":
+            paso = self.visibles if unidad == "pages" else 1
+            self.ir_a(self.inicio + int(cantidad) * paso)
+
+    def _redimensionar(self, event):
+        alto_fila = int(ttk.Style().lookup("Treeview", "rowheight") or ALTO_FILA)
+        visibles = max(1, (event.height - ALTO_FILA) // alto_fila)  # descuenta el encabezado
+        if visibles != self.visibles:
+            self.visibles = visibles
+            self.inicio = max(0, min(self.inicio, self.total - self.visibles))
+            self._mostrar()